@@ -0,0 +1,68 @@
+"""Benchmark the raster backend's frame composition.
+
+Compares drawing every frame from scratch with `tinyticker.raster.plot`, with
+composing them from the cached layers of a `tinyticker.raster.Compositor`, when the
+candles change, when only the price changes and when nothing changes. No hardware is
+required.
+
+Usage:
+    poetry run python benchmarks/bench_compositor.py
+"""
+
+import itertools
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+from tinyticker import raster
+from tinyticker.candles import Candles
+
+N_REPEAT = 500
+WIDTH, HEIGHT = 250, 122
+HISTORICAL = Path(__file__).parents[1] / "tests" / "data" / "crypto_historical.pkl"
+
+
+def main():
+    candles = Candles.from_dataframe(pd.read_pickle(HISTORICAL))
+    # a new price for every frame, so the top string is never cached
+    prices = (f"BTC: $ {price:.2f}" for price in itertools.count(30000, 0.01))
+    sub_string = f"{len(candles)}x1h"
+    kwargs = {"volume": True, "mav": 3}
+    plot = timeit.timeit(
+        lambda: raster.plot(
+            candles, WIDTH, HEIGHT, next(prices), sub_string, **kwargs
+        ).to_image(),
+        number=N_REPEAT,
+    )
+    print(f"{'plot':>12}: {1e3 * plot / N_REPEAT:6.3f} ms")
+
+    compositor = raster.Compositor(WIDTH, HEIGHT)
+    # alternate the candles, so the chart is redrawn for every frame
+    candles_cycle = itertools.cycle([candles, candles[1:]])
+    top_string = next(prices)
+    for name, compose in [
+        (
+            "new candles",
+            lambda: compositor.compose(
+                next(candles_cycle), next(prices), sub_string, **kwargs
+            ),
+        ),
+        (
+            "new price",
+            lambda: compositor.compose(candles, next(prices), sub_string, **kwargs),
+        ),
+        (
+            "unchanged",
+            lambda: compositor.compose(candles, top_string, sub_string, **kwargs),
+        ),
+    ]:
+        duration = timeit.timeit(lambda: compose().to_image(), number=N_REPEAT)
+        print(
+            f"{name:>12}: {1e3 * duration / N_REPEAT:6.3f} ms, "
+            f"speedup x{plot / duration:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
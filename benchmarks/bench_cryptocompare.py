@@ -0,0 +1,105 @@
+"""Benchmark the cryptocompare ingest and resample path.
+
+Compares `tinyticker.ticker.get_cryptocompare` with the previous, pandas based,
+implementation on a synthetic payload, no network access is required.
+
+Usage:
+    poetry run python benchmarks/bench_cryptocompare.py
+"""
+
+import timeit
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from tinyticker import ticker
+
+N_REPEAT = 200
+INTERVALS = {"1h": ("hour", 24), "5m": ("minute", 24), "30m": ("minute", 24)}
+
+
+def make_payload(periods: int, step: int):
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(periods).cumsum()
+    start = int(pd.Timestamp("2021-07-22", tz="utc").timestamp())
+    return [
+        {
+            "time": start + i * step,
+            "high": close[i] + 1,
+            "low": close[i] - 1,
+            "open": close[i] - 0.5,
+            "volumefrom": float(i),
+            "volumeto": float(i) * close[i],
+            "close": close[i],
+            "conversionType": "direct",
+            "conversionSymbol": "",
+        }
+        for i in range(periods)
+    ]
+
+
+def get_cryptocompare_pandas(payload, interval_dt: pd.Timedelta, lookback: int):
+    """The previous implementation, building and reshaping a `pd.DataFrame`."""
+    historical = pd.DataFrame(payload)
+    historical.set_index("time", inplace=True)
+    historical.index = pd.to_datetime(historical.index.to_numpy(), unit="s", utc=True)
+    historical.drop(
+        columns=["volumeto", "conversionType", "conversionSymbol"],
+        inplace=True,
+    )
+    historical.rename(
+        columns={
+            "high": "High",
+            "close": "Close",
+            "low": "Low",
+            "open": "Open",
+            "volumefrom": "Volume",
+        },
+        inplace=True,
+    )
+    if historical.index[1] - historical.index[0] != interval_dt:
+        historical_index = historical.index
+        scale_factor = int(interval_dt / (historical.index[1] - historical.index[0]))
+        historical = historical.resample(interval_dt).agg(
+            {
+                "Open": "first",
+                "High": "max",
+                "Low": "min",
+                "Close": "last",
+                "Volume": "sum",
+            }
+        )  # type: ignore
+        historical.index = historical_index[::scale_factor]
+    if len(historical) > lookback:
+        historical = historical.iloc[-lookback:]
+    return historical
+
+
+def main():
+    for interval, (crypto_interval, lookback) in INTERVALS.items():
+        interval_dt = ticker.INTERVAL_TIMEDELTAS[interval]
+        step = int(ticker.CRYPTO_INTERVAL_TIMEDELTAS[crypto_interval].total_seconds())
+        scale = int(interval_dt.total_seconds()) // step
+        payload = make_payload(lookback * scale + 1, step)
+        with mock.patch.object(
+            ticker.providers, "cryptocompare_historical", return_value=payload
+        ):
+            new = timeit.timeit(
+                lambda: ticker.get_cryptocompare("BTC", interval_dt, lookback),
+                number=N_REPEAT,
+            )
+        old = timeit.timeit(
+            lambda: get_cryptocompare_pandas(payload, interval_dt, lookback),
+            number=N_REPEAT,
+        )
+        print(
+            f"{interval:>4} ({len(payload):>4} candles): "
+            f"pandas {1e3 * old / N_REPEAT:6.2f} ms, "
+            f"numpy {1e3 * new / N_REPEAT:6.2f} ms, "
+            f"speedup x{old / new:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
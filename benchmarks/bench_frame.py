@@ -0,0 +1,84 @@
+"""Benchmark the extraction of the panel's buffers from a drawn chart.
+
+Compares the direct path, which thresholds and packs a view of the Agg canvas'
+buffer, with the previous path through the `PIL.Image.Image` conversions and the
+driver's `getbuffer`. For the displays with an extra color, both the black and the
+highlight buffers are extracted, of a flipped frame. The chart is drawn once, only
+the extraction is timed, no hardware is required.
+
+Usage:
+    poetry run python benchmarks/bench_frame.py
+"""
+
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from tinyticker.display import Display, rgba_to_ink, rgba_to_planes
+
+from bench_replay import register_null_epd
+
+N_REPEAT = 200
+HISTORICAL = Path(__file__).parents[1] / "tests" / "data" / "crypto_historical.pkl"
+
+
+def extract_pil(display: Display, rgba: np.ndarray) -> bytearray:
+    """The previous path, RGBA -> RGB -> "1" images, packed by the driver."""
+    image = Image.fromarray(rgba, mode="RGBA").convert("RGB")
+    image = image.convert("1", dither=Image.Dither.NONE)
+    return display.epd.getbuffer(image)
+
+
+def extract_direct(display: Display, rgba: np.ndarray) -> bytearray:
+    """The direct path, thresholded and packed with numpy."""
+    return display.epd.pack(rgba_to_ink(display.epd.orient(rgba)))
+
+
+def extract_planes_pil(display: Display, rgba: np.ndarray):
+    """The previous path, a highlight image of the coloured pixels, both images
+    rotated and packed by the driver."""
+    image = Image.fromarray(rgba, mode="RGBA").convert("RGB")
+    image_ar = np.array(image)
+    colored_pixels = ~(image_ar == image_ar[:, :, 0][:, :, None]).all(axis=-1)
+    highlight_image = np.ones(image_ar.shape[:-1], dtype=image_ar.dtype) * 255
+    highlight_image[colored_pixels] = 0
+    highlight_image = Image.fromarray(highlight_image, mode="L").convert(
+        "1", dither=Image.Dither.NONE
+    )
+    highlight_image = highlight_image.rotate(180)
+    image = image.convert("1", dither=Image.Dither.NONE).rotate(180)
+    return display.epd.getbuffer(image), display.epd.getbuffer(highlight_image)
+
+
+def extract_planes_direct(display: Display, rgba: np.ndarray):
+    """The direct path, both planes thresholded and packed at once."""
+    planes = rgba_to_planes(display.epd.orient(rgba[::-1, ::-1]))
+    return display.epd.pack_planes(planes)  # type: ignore
+
+
+def main():
+    historical = pd.read_pickle(HISTORICAL)
+    for model, pil, direct in [
+        ("EPD_v2", extract_pil, extract_direct),
+        ("EPD_v4", extract_pil, extract_direct),
+        ("EPDb_v3", extract_planes_pil, extract_planes_direct),
+        ("EPDb_v4", extract_planes_pil, extract_planes_direct),
+    ]:
+        display = Display(register_null_epd(model))
+        fig, _ = display.plot(historical, None, volume=True, mav=3)
+        rgba = display.fig_to_array(fig)
+        old = timeit.timeit(lambda: pil(display, rgba), number=N_REPEAT)
+        new = timeit.timeit(lambda: direct(display, rgba), number=N_REPEAT)
+        print(
+            f"{model:>7}: "
+            f"PIL {1e3 * old / N_REPEAT:7.3f} ms, "
+            f"direct {1e3 * new / N_REPEAT:7.3f} ms, "
+            f"speedup x{old / new:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
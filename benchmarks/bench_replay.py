@@ -0,0 +1,111 @@
+"""Benchmark the fetch, render and display path on recorded ticks.
+
+First record the ticks of a config, this needs network access:
+    poetry run python benchmarks/bench_replay.py record --ticks 20
+
+Then replay them, deterministically and without network access, with the recorded
+latencies or without:
+    poetry run python benchmarks/bench_replay.py replay --ticks 100 --no-latency
+
+The render backend can be overridden, to compare them on the same ticks:
+    poetry run python benchmarks/bench_replay.py replay --backend raster
+
+The display's e-Paper module is replaced with one which only computes the image
+buffer, so the benchmark runs without the hardware.
+"""
+
+import argparse
+import dataclasses as dc
+import statistics
+import time
+from pathlib import Path
+
+from tinyticker.config import RENDER_BACKENDS, ReplayConfig, TinytickerConfig
+from tinyticker.display import Display
+from tinyticker.paths import CONFIG_FILE
+from tinyticker.replay import REPLAY_DIR
+from tinyticker.ticker import Sequence
+from tinyticker.waveshare_lib.models import MODELS, EPDModel
+
+
+def register_null_epd(model: str) -> str:
+    """Register an e-Paper model which doesn't talk to the hardware."""
+    base = MODELS[model].class_
+
+    class NullEPD(base):  # type: ignore
+        def init(self, *_):
+            return 0
+
+        def display(self, *_):
+            pass
+
+        def Clear(self, *_):
+            pass
+
+        def sleep(self):
+            pass
+
+    name = f"{model}_null"
+    MODELS[name] = EPDModel(name=name, class_=NullEPD, desc="No hardware")
+    return name
+
+
+def summary(name: str, durations) -> str:
+    durations = sorted(durations)
+    p95 = durations[int(0.95 * (len(durations) - 1))]
+    return (
+        f"{name:>7}: mean {1e3 * statistics.mean(durations):7.2f} ms, "
+        f"p50 {1e3 * statistics.median(durations):7.2f} ms, "
+        f"p95 {1e3 * p95:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("--config", type=Path, default=CONFIG_FILE)
+    parser.add_argument("--directory", type=Path, default=REPLAY_DIR)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--no-latency", action="store_true")
+    parser.add_argument("--backend", choices=RENDER_BACKENDS, default=None)
+    args = parser.parse_args()
+
+    tt_config = TinytickerConfig.from_file(args.config)
+    tt_config.replay = ReplayConfig(
+        mode=args.mode,
+        directory=str(args.directory),
+        latency=not args.no_latency,
+    )
+    # don't wait in between ticks
+    tt_config.tickers = [
+        dc.replace(ticker, wait_time=0) for ticker in tt_config.tickers
+    ]
+    tt_config.epd_model = register_null_epd(tt_config.epd_model)
+    if args.backend is not None:
+        tt_config.render_backend = args.backend
+    display = Display.from_tinyticker_config(tt_config)
+    sequence = Sequence.from_tinyticker_config(tt_config)
+
+    fetch, render = [], []
+    start = time.perf_counter()
+    for i, (ticker, response) in enumerate(sequence.start()):
+        fetched = time.perf_counter()
+        fetch.append(fetched - start)
+        display.plot(
+            response.candles,
+            response.current_price,
+            top_string=f"{ticker.symbol}: $",
+            sub_string=f"{len(response.candles)}x{ticker.interval}",
+            show=True,
+            type=ticker._display_kwargs.get("plot_type", "candle"),
+        )
+        start = time.perf_counter()
+        render.append(start - fetched)
+        if i + 1 == args.ticks:
+            break
+    print(summary("fetch", fetch))
+    print(summary("render", render))
+
+
+if __name__ == "__main__":
+    main()
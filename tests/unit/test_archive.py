@@ -0,0 +1,227 @@
+from pathlib import Path
+from shutil import rmtree
+from unittest import TestCase, mock
+
+import numpy as np
+import pandas as pd
+
+from tinyticker import config, ticker
+from tinyticker.archive import ARCHIVE_SPANS, CandleArchive
+
+NOW = pd.Timestamp("2021-07-22 18:00", tz="utc")
+
+
+def fake_historical(token, currency, interval, limit, to_ts=None, api_key=None):
+    """`cryptocompare` candles, `limit` + 1 of them up to `to_ts`, as the API does."""
+    step = {"minute": 60, "hour": 3600, "day": 86400}[interval]
+    last = int(to_ts) // step * step
+    return [
+        {
+            "time": time,
+            "open": time,
+            "high": time + 1,
+            "low": time - 1,
+            "close": time,
+            "volumefrom": 1,
+        }
+        for time in range(last - limit * step, last + step, step)
+    ]
+
+
+def session_candles(days: int) -> pd.DataFrame:
+    """5 minute stock candles of the trading sessions of the last days."""
+    index = pd.DatetimeIndex([], tz="America/New_York")
+    for day in pd.bdate_range(end=NOW.tz_localize(None).normalize(), periods=days):
+        index = index.append(
+            pd.date_range(
+                day + pd.to_timedelta("9.5h"),
+                day + pd.to_timedelta("15h55m"),
+                freq="5min",
+                tz="America/New_York",
+            )
+        )
+    index = index[index <= NOW]
+    prices = np.arange(len(index), dtype=np.float64)
+    return pd.DataFrame(
+        {
+            "Open": prices,
+            "High": prices + 1,
+            "Low": prices - 1,
+            "Close": prices,
+            "Adj Close": prices,
+            "Volume": 1.0,
+        },
+        index=index,
+    )
+
+
+class TestCandleArchive(TestCase):
+    def setUp(self):
+        self.test_dir = Path("test_archive")
+        self.archive = CandleArchive(self.test_dir)
+
+    def test_persistence(self):
+        key = ("stock", "SPY", "5m")
+        candles = session_candles(5)
+        self.archive.update(key, candles)
+        assert self.archive._path(key).suffix == ".npz"
+        # a new archive instance, as after a restart of the ticker process
+        archived = CandleArchive(self.test_dir).get(key)
+        assert archived is not None
+        assert list(archived.columns) == ["Open", "High", "Low", "Close", "Volume"]
+        assert str(archived.index.tz) == "America/New_York"
+        assert (archived.index == candles.index).all()
+        assert (archived.values == candles.drop(columns="Adj Close").values).all()
+
+    def test_clear(self):
+        self.archive.update(("stock", "SPY", "5m"), session_candles(1))
+        self.archive.clear()
+        assert not list(self.test_dir.glob("*.npz"))
+
+    def tearDown(self):
+        if self.test_dir.is_dir():
+            rmtree(self.test_dir)
+
+
+class TestBackfill(TestCase):
+    def setUp(self):
+        self.test_dir = Path("test_backfill")
+        self.backfill = ticker.Backfill(CandleArchive(self.test_dir), api_key="KEY")
+        patcher = mock.patch.object(ticker.utils, "now", return_value=NOW)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_base_interval(self):
+        base_interval = ticker.Backfill.base_interval
+        assert base_interval("stock", "1h") == "1h"
+        assert base_interval("stock", "90m") == "5m"
+        assert base_interval("stock", "5d") is None
+        assert base_interval("stock", "1wk") is None
+        assert base_interval("crypto", "5d") == "1d"
+        assert base_interval("crypto", "2m") is None
+
+    def test_backfill_crypto_pages(self):
+        key = ("crypto", "BTC", "5m")
+        with mock.patch.object(
+            ticker.providers, "cryptocompare_historical", side_effect=fake_historical
+        ) as historical:
+            self.backfill.backfill(key)
+        # a call per day of minute candles
+        assert historical.call_count == 8
+        archived = self.backfill.archive.get(key)
+        assert archived is not None
+        assert (archived.index.to_series().diff()[1:] == pd.Timedelta("5m")).all()
+        assert archived.index[0] <= NOW - ARCHIVE_SPANS["crypto"]["5m"] + pd.Timedelta(
+            "5m"
+        )
+        # the 5 minute candles aggregate the minute candles, the last one is forming
+        assert (archived["Volume"][:-1] == 5).all()
+        # once backfilled, only top-ups
+        ticker.utils.now.return_value = NOW + pd.Timedelta("1h")
+        with mock.patch.object(
+            ticker.providers, "cryptocompare_historical", side_effect=fake_historical
+        ) as historical:
+            self.backfill.backfill(key)
+        historical.assert_called_once()
+        # the minute candles of the hour, and of the last archived candle
+        assert historical.call_args.kwargs["limit"] == 70
+        assert self.backfill.archive.get(key).index[-1] == NOW + pd.Timedelta("1h")
+
+    def test_serve_crypto(self):
+        with mock.patch.object(
+            ticker.providers, "cryptocompare_historical", side_effect=fake_historical
+        ):
+            self.backfill.backfill(("crypto", "BTC", "1h"))
+            self.backfill.backfill(("crypto", "BTC", "1d"))
+        tick = ticker.Ticker(
+            api_key="KEY",
+            symbol_type="crypto",
+            symbol="BTC",
+            interval="1h",
+            lookback=24,
+            backfill=self.backfill,
+        )
+        # a lookback or interval change is served from the archive
+        tick_5d = ticker.Ticker(
+            api_key="KEY",
+            symbol_type="crypto",
+            symbol="BTC",
+            interval="5d",
+            lookback=200,
+            backfill=self.backfill,
+        )
+        with mock.patch.object(
+            ticker.providers, "cryptocompare_historical"
+        ) as historical, mock.patch.object(
+            ticker.providers, "cryptocompare_price", return_value={"BTC": {"USD": 1.0}}
+        ):
+            resp = tick.single_tick()
+            resp_5d = tick_5d.single_tick()
+        # the archive was topped up when it was backfilled
+        historical.assert_not_called()
+        assert len(resp.candles) == 24
+        assert resp.historical.index[-1] == NOW
+        assert len(resp_5d.candles) == 200
+        assert (resp_5d.historical.index.to_series().diff()[1:] == "5d").all()
+        assert (resp_5d.historical["Volume"][:-1] == 5).all()
+
+    def test_serve_stock_sessions(self):
+        self.backfill.archive.update(("stock", "SPY", "5m"), session_candles(10))
+        tick = ticker.Ticker(
+            symbol_type="stock",
+            symbol="SPY",
+            interval="90m",
+            lookback=20,
+            backfill=self.backfill,
+        )
+        with mock.patch.object(ticker, "get_yfinance", return_value={}) as download:
+            served = self.backfill.serve(tick)
+        # only the candles since the last archived candle
+        assert download.call_args.kwargs["start"] == session_candles(1).index[-1]
+        assert served is not None
+        assert len(served) == 20
+        # aligned on the session open
+        opens = served.index[served.index.date != np.roll(served.index.date, 1)]
+        assert (opens[1:].time == pd.Timestamp("09:30").time()).all()
+
+    def test_not_covered(self):
+        self.backfill.archive.update(
+            ("stock", "SPY", "1d"), session_candles(1).iloc[-10:]
+        )
+        tick = ticker.Ticker(
+            symbol_type="stock",
+            symbol="SPY",
+            interval="1d",
+            lookback=30,
+            backfill=self.backfill,
+        )
+        with mock.patch.object(ticker, "get_yfinance", return_value={}):
+            assert self.backfill.serve(tick) is None
+        # not backfilled yet
+        tick_1h = ticker.Ticker(
+            symbol_type="stock", symbol="SPY", interval="1h", backfill=self.backfill
+        )
+        assert self.backfill.serve(tick_1h) is None
+
+    def test_backfill_from_tt_config(self):
+        tt_config = config.TinytickerConfig(
+            tickers=[
+                config.TickerConfig(symbol="SPY", interval="1d"),
+                config.TickerConfig(symbol="SPY", interval="90m"),
+            ],
+            archive=config.ArchiveConfig(backfill=True, directory=str(self.test_dir)),
+        )
+        sequence = ticker.Sequence.from_tinyticker_config(tt_config)
+        assert sequence.backfill is not None
+        assert sequence.backfill.archive.directory == self.test_dir
+        assert all(tick.backfill is sequence.backfill for tick in sequence.tickers)
+        # the displayed intervals are backfilled first
+        assert sequence.backfill._keys() == [
+            ("stock", "SPY", "1d"),
+            ("stock", "SPY", "5m"),
+            ("stock", "SPY", "1h"),
+        ]
+
+    def tearDown(self):
+        if self.test_dir.is_dir():
+            rmtree(self.test_dir)
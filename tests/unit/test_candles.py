@@ -0,0 +1,155 @@
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tinyticker.candles import COLUMNS, CandleRing, Candles
+from tinyticker.ticker import Response
+
+
+class TestCandles(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        data_dir = Path(__file__).parents[1] / "data"
+        cls.crypto_historical: pd.DataFrame = pd.read_pickle(
+            data_dir / "crypto_historical.pkl"
+        )
+        cls.stock_historical: pd.DataFrame = pd.read_pickle(
+            data_dir / "stock_historical.pkl"
+        )
+
+    def test_round_trip(self):
+        for historical in (self.crypto_historical, self.stock_historical):
+            candles = Candles.from_dataframe(historical)
+            assert len(candles) == len(historical)
+            assert candles.timestamps.dtype == np.int64
+            assert candles.values.dtype == np.float32
+            df = candles.to_dataframe()
+            assert list(df.columns) == list(COLUMNS)
+            assert (df.index == historical.index).all()
+            assert df.index.tz == historical.index.tz  # type: ignore
+            assert np.allclose(df.to_numpy(), historical[list(COLUMNS)], rtol=1e-6)
+
+    def test_time_zone(self):
+        historical = self.crypto_historical.tz_convert("America/New_York")
+        candles = Candles.from_dataframe(historical)
+        assert candles.last_timestamp == historical.index[-1]
+        assert str(candles.index.tz) == "America/New_York"  # type: ignore
+
+    def test_slice(self):
+        candles = Candles.from_dataframe(self.crypto_historical)
+        last = candles[-5:]
+        assert len(last) == 5
+        # views, not copies
+        assert np.shares_memory(last.values, candles.values)
+        assert last.close[-1] == candles.close[-1]
+        assert len(candles[0]) == 1
+        assert len(candles[-1]) == 1
+        assert candles[-1].last_timestamp == candles.last_timestamp
+
+    def test_empty(self):
+        candles = Candles.from_dataframe(self.crypto_historical.iloc[:0])
+        assert candles.empty
+        assert candles.to_dataframe().empty
+
+    def test_shape(self):
+        with pytest.raises(ValueError):
+            Candles(np.arange(3), np.zeros((2, 5)))
+
+    def test_memory(self):
+        candles = Candles.from_dataframe(self.crypto_historical)
+        assert candles.nbytes == len(candles) * (8 + 4 * len(COLUMNS))
+        assert candles.nbytes < self.crypto_historical.memory_usage(deep=True).sum()
+
+    def test_response(self):
+        response = Response(self.crypto_historical, 1.0)
+        assert isinstance(response.candles, Candles)
+        assert (response.historical.index == self.crypto_historical.index).all()
+
+    def test_fingerprint(self):
+        candles = Candles.from_dataframe(self.crypto_historical)
+        response = Response(candles, 1.0)
+        assert Response(candles.copy(), 1.0).fingerprint == response.fingerprint
+        assert Response(candles, 2.0).fingerprint != response.fingerprint
+        assert Response(candles, 1.0, stale=True).fingerprint != response.fingerprint
+        changed = candles.copy()
+        changed.values[-1, 3] += 1
+        assert changed.digest() != candles.digest()
+        # views of the same candles
+        assert (
+            candles[-5:].digest()
+            == Candles.from_dataframe(self.crypto_historical.iloc[-5:]).digest()
+        )
+
+
+def make_candles(timestamps, close) -> Candles:
+    close = np.asarray(close, dtype=np.float32)
+    return Candles(
+        np.asarray(timestamps, dtype=np.int64),
+        np.stack([close, close, close, close, close], axis=1),
+    )
+
+
+class TestCandleRing(TestCase):
+    def test_append(self):
+        ring = CandleRing(3)
+        ring.update(make_candles([1, 2], [1, 2]))
+        assert list(ring.view().timestamps) == [1, 2]
+        ring.update(make_candles([3, 4, 5], [3, 4, 5]))
+        assert list(ring.view().timestamps) == [3, 4, 5]
+        assert len(ring) == 3
+
+    def test_overwrite_last(self):
+        ring = CandleRing(3)
+        ring.update(make_candles([1, 2, 3], [1, 2, 3]))
+        # the last candle was still forming
+        ring.update(make_candles([3, 4], [30, 4]))
+        view = ring.view()
+        assert list(view.timestamps) == [2, 3, 4]
+        assert list(view.close) == [2, 30, 4]
+
+    def test_constant_memory(self):
+        ring = CandleRing(10)
+        timestamps = ring._timestamps
+        for i in range(1000):
+            ring.update(make_candles([i - 1, i], [i - 1, i]))
+            assert len(ring) == min(i + 2, 10)
+        assert ring._timestamps is timestamps
+        assert list(ring.view().timestamps) == list(range(990, 1000))
+
+    def test_view_no_copy(self):
+        ring = CandleRing(5)
+        ring.update(make_candles(range(5), range(5)))
+        view = ring.view()
+        assert np.shares_memory(view.values, ring._values)
+        assert np.shares_memory(view.timestamps, ring._timestamps)
+
+    def test_view_intact_after_update(self):
+        ring = CandleRing(4)
+        ring.update(make_candles(range(4), range(4)))
+        for i in range(4, 20):
+            view = ring.view()
+            expected = view.timestamps.copy()
+            ring.update(make_candles([i], [i]))
+            assert (view.timestamps == expected).all()
+
+    def test_rebuild(self):
+        ring = CandleRing(5)
+        ring.update(make_candles([1, 3, 5], [1, 3, 5]))
+        # fills a gap
+        ring.update(make_candles([2, 3, 6], [2, 30, 6]))
+        view = ring.view()
+        assert list(view.timestamps) == [1, 2, 3, 5, 6]
+        assert list(view.close) == [1, 2, 30, 5, 6]
+
+    def test_extend_back(self):
+        ring = CandleRing(24)
+        ring.update(make_candles(range(15, 24), range(15, 24)))
+        # a longer fetch goes further back than the buffer
+        ring.update(make_candles(range(24), range(24)))
+        assert list(ring.view().timestamps) == list(range(24))
+        # once full, older candles are dropped
+        ring.update(make_candles(range(-5, 25), range(-5, 25)))
+        assert list(ring.view().timestamps) == list(range(1, 25))
@@ -0,0 +1,127 @@
+import threading
+import time
+from pathlib import Path
+from shutil import rmtree
+from unittest import TestCase, mock
+
+import pandas as pd
+
+from tinyticker import clock, ticker, utils
+from tinyticker.replay import Recorded, Replay
+
+
+class ClockTicker(ticker.Ticker):
+    """A stock `Ticker` whose last candle is at the clock's current time."""
+
+    def __init__(self, historical: pd.DataFrame, **kwargs):
+        super().__init__(symbol_type="stock", **kwargs)
+        self.historical = historical
+        self.tick_times = []
+        self._symbol_type_map["stock"] = self._tick_clock
+
+    def _tick_clock(self) -> ticker.Response:
+        now = clock.get_clock().now()
+        self.tick_times.append(now)
+        historical = self.historical.copy()
+        offset = now.floor(self._interval_dt) - historical.index[-1]
+        historical.index = historical.index + offset
+        return ticker.Response(historical, 1.0)
+
+
+class TestSimulatedClock(TestCase):
+    def test_sleep(self):
+        sim = clock.SimulatedClock("2021-07-22 18:00")
+        start = time.monotonic()
+        sim.sleep(86400)
+        assert time.monotonic() - start < 1
+        assert sim.elapsed == sim.monotonic() == 86400
+        assert sim.now() == pd.Timestamp("2021-07-23 18:00", tz="utc")
+
+    def test_wait(self):
+        sim = clock.SimulatedClock()
+        event = threading.Event()
+        assert not sim.wait(event, 10)
+        assert sim.elapsed == 10
+        event.set()
+        assert sim.wait(event, 10)
+        assert sim.elapsed == 10
+
+    def test_set_clock(self):
+        sim = clock.SimulatedClock()
+        previous = clock.set_clock(sim)
+        try:
+            assert clock.get_clock() is sim
+        finally:
+            assert clock.set_clock(previous) is sim
+        assert type(clock.get_clock()) is clock.Clock
+
+
+class TestSimulatedSequence(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = Path(__file__).parents[1] / "data"
+        cls.historical: pd.DataFrame = pd.read_pickle(
+            cls.data_dir / "stock_historical.pkl"
+        )
+
+    def _simulate(self, start: str, hours: float, **kwargs):
+        sim = clock.SimulatedClock(start)
+        previous = clock.set_clock(sim)
+        self.addCleanup(clock.set_clock, previous)
+        # the test modules patch `utils.now`
+        self.addCleanup(setattr, utils, "now", utils.now)
+        utils.now = lambda: clock.get_clock().now()
+        sequence = ticker.Sequence(**kwargs)
+        for _ in sequence.start():
+            if sim.elapsed >= hours * 3600:
+                break
+        return sim
+
+    def test_soak_day(self):
+        tickers = [
+            ClockTicker(self.historical, symbol=symbol, interval="1h", wait_time=300)
+            for symbol in ("A", "B", "C")
+        ]
+        start = time.monotonic()
+        self._simulate("2021-07-22 00:00", 24, tickers=tickers, skip_outdated=False)
+        # a day of rotation in seconds
+        assert time.monotonic() - start < 30
+        # every 5min, from 00:00 to 24:00 included
+        assert [len(tick.tick_times) for tick in tickers] == [97, 96, 96]
+        assert tickers[0].tick_times[1] - tickers[0].tick_times[0] == pd.Timedelta(
+            "15min"
+        )
+
+    def test_weekend(self):
+        tick = ClockTicker(self.historical, symbol="SPY", interval="1h", wait_time=300)
+        # on a saturday, the market is closed until monday
+        self._simulate("2021-07-24 12:00", 50, tickers=[tick])
+        assert tick.tick_times[0] == pd.Timestamp("2021-07-26 13:30", tz="utc")
+
+
+class TestSimulatedReplay(TestCase):
+    def setUp(self):
+        self.test_dir = Path("test_clock_replay")
+        self.sim = clock.SimulatedClock()
+        self.previous = clock.set_clock(self.sim)
+
+    def test_latency(self):
+        historical = pd.read_pickle(
+            Path(__file__).parents[1] / "data" / "stock_historical.pkl"
+        )
+        replay = Replay("replay", self.test_dir)
+        replay.record(
+            ("stock", "SPY", "1d"), Recorded(5.0, ticker.Response(historical, 1.0))
+        )
+        tick = ticker.Ticker(symbol_type="stock", symbol="SPY", replay=replay)
+        tick._symbol_type_map["stock"] = mock.Mock()
+        start = time.monotonic()
+        tick.single_tick()
+        # the recorded latency is simulated
+        assert self.sim.elapsed == 5.0
+        assert time.monotonic() - start < 1
+
+    def tearDown(self):
+        clock.set_clock(self.previous)
+        if self.test_dir.is_dir():
+            rmtree(self.test_dir)
@@ -1,14 +1,18 @@
+import gc
 from pathlib import Path
-from typing import Literal
-from unittest import TestCase
+from typing import Literal, Optional, Tuple
+from unittest import TestCase, mock
 
+import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import pytest
 from PIL import Image
 
+from tinyticker.candles import Candles
 from tinyticker.config import TinytickerConfig
-from tinyticker.display import Display
-from tinyticker.waveshare_lib._base import EPDMonochrome
+from tinyticker.display import Display, rgba_to_ink, rgba_to_planes
+from tinyticker.waveshare_lib._base import EPDHighlight, EPDMonochrome
 from tinyticker.waveshare_lib.models import MODELS, EPDModel
 
 from .utils import expected_fig
@@ -37,11 +41,37 @@ class EPDMock(EPDMonochrome):
         pass
 
 
+class EPDHighlightMock(EPDHighlight, EPDMock):
+    def display(self, imageblack: bytearray, highlights: Optional[bytearray]) -> None:
+        pass
+
+
 MODELS["mock"] = EPDModel(
     name="mock",
     class_=EPDMock,
     desc="A Mock display for testing",
 )
+MODELS["mock_highlight"] = EPDModel(
+    name="mock_highlight",
+    class_=EPDHighlightMock,
+    desc="A Mock display with an extra color for testing",
+)
+
+
+def random_frame(shape: Tuple[int, int]) -> np.ndarray:
+    """An RGBA frame of random black, white, grey and coloured pixels."""
+    rng = np.random.default_rng(0)
+    rgba = rng.integers(0, 256, (*shape, 4), dtype=np.uint8)
+    grey = rng.random(shape) < 0.5
+    rgba[grey, 1] = rgba[grey, 2] = rgba[grey, 0]
+    return rgba
+
+
+def shown_bits(epd, shape: Tuple[int, int]) -> np.ndarray:
+    """The bits of the panel's buffer which are shown, for a frame of this shape."""
+    white = np.unpackbits(epd.getbuffer(Image.new("1", shape[::-1], 1)))
+    black = np.unpackbits(epd.getbuffer(Image.new("1", shape[::-1], 0)))
+    return white != black
 
 
 class TestDisplay(TestCase):
@@ -63,6 +93,8 @@ class TestDisplay(TestCase):
     def test_init(self):
         with pytest.raises(KeyError):
             Display("Some model which does not exist")
+        with pytest.raises(ValueError):
+            Display("mock", backend="Some backend which does not exist")
         assert self.display.epd.is_init  # type: ignore
 
     def test_from_tt_config(self):
@@ -92,9 +124,144 @@ class TestDisplay(TestCase):
         self._check_fig_ax(fig, ax)
         assert expected_fig(fig, self.crypto_historical_plot_volume_file)
 
+    def test_plot_candles(self):
+        fig, ax = self.display.plot(Candles.from_dataframe(self.historical), None)
+        self._check_fig_ax(fig, ax)
+        assert expected_fig(fig, self.crypto_historical_plot_file)
+
+    def test_frame_unchanged(self):
+        display = Display("mock")
+        display.fingerprint = "data"
+        with mock.patch.object(
+            display.epd, "getbuffer", side_effect=lambda image: image.tobytes()
+        ), mock.patch.object(display.epd, "display") as epd_display:
+            fig, _ = display.plot(self.historical, None)
+            display.show_fig(fig)
+            assert display.fingerprint is None
+            display.show_fig(fig)
+            # the same frame isn't sent again
+            assert epd_display.call_count == 1
+            display.text("Some text", show=True)
+            assert epd_display.call_count == 2
+            display.init_epd()
+            display.text("Some text", show=True)
+            assert epd_display.call_count == 3
+
     def test_text(self):
         text = "Some text"
         fig, ax = self.display.text(text)
         self._check_fig_ax(fig, ax)
         assert ax.texts[0]._text == text  # type: ignore
         assert expected_fig(fig, self.text_plot_file)
+
+    def test_figure_reuse(self):
+        display = Display("mock")
+        fig, _ = display.plot(self.historical, None, volume=True)
+        assert display.plot(self.historical, None, volume=True)[0] is fig
+        # a figure per layout, the error text uses the single axis layout
+        assert display.plot(self.historical, None)[0] is display.text("Some text")[0]
+        assert len(display._figures) == 2
+        # not held by pyplot
+        assert not plt.get_fignums()
+        # the reused figures are as new
+        assert expected_fig(display.text("Some text")[0], self.text_plot_file)
+        assert expected_fig(
+            display.plot(self.historical, None, volume=True)[0],
+            self.crypto_historical_plot_volume_file,
+        )
+
+    def test_show_fig(self):
+        display = Display("mock", flip=True)
+        fig, _ = display.plot(self.historical, None)
+        image = display.fig_to_image(fig).convert("1", dither=Image.Dither.NONE)
+        with mock.patch.object(display.epd, "display") as epd_display:
+            display.show_fig(fig)
+        # packed straight from the canvas, flipped
+        ink = ~np.asarray(image.rotate(180))
+        assert epd_display.call_args.args[0] == display.epd.pack(
+            display.epd.orient(ink)
+        )
+
+    def test_show_highlight(self):
+        display = Display("mock_highlight", flip=True)
+        rgba = random_frame((display.epd.width, display.epd.height))
+        with mock.patch.object(display.epd, "display") as epd_display:
+            display.show_image(Image.fromarray(rgba, mode="RGBA").convert("RGB"))
+        planes = rgba_to_planes(display.epd.orient(rgba[::-1, ::-1]))
+        assert planes[1].any()
+        assert epd_display.call_args.args == display.epd.pack_planes(planes)
+        # a monochrome image, nothing is highlighted
+        with mock.patch.object(display.epd, "display") as epd_display:
+            display.show_image(Image.fromarray(~planes[0]).rotate(-90, expand=True))
+        assert epd_display.call_args.args[1] is None
+
+    def test_memory_long_run(self):
+        display = Display("mock")
+
+        def run(frames: int) -> None:
+            for i in range(frames):
+                display.plot(
+                    self.historical.iloc[i % 5 :],
+                    1.0,
+                    volume=i % 2 == 0,
+                    mav=3,
+                    show=True,
+                )
+                if i % 10 == 0:
+                    display.text("Some text", show=True)
+
+        run(10)
+        gc.collect()
+        n_objects = len(gc.get_objects())
+        run(100)
+        gc.collect()
+        # nothing accumulates from frame to frame
+        assert len(gc.get_objects()) - n_objects < 100
+
+
+class TestPack(TestCase):
+    def test_pack(self):
+        for name, model in MODELS.items():
+            if name.startswith("mock"):
+                continue
+            epd = model.class_()
+            for shape in [(epd.height, epd.width), (epd.width, epd.height)]:
+                rgba = random_frame(shape)
+                image = (
+                    Image.fromarray(rgba, mode="RGBA")
+                    .convert("RGB")
+                    .convert("1", dither=Image.Dither.NONE)
+                )
+                ink = ~np.asarray(image)
+                assert (rgba_to_ink(rgba) == ink).all()
+                shown = shown_bits(epd, shape)
+                expected = np.unpackbits(epd.getbuffer(image))
+                for buffer in [
+                    epd.pack(rgba_to_ink(epd.orient(rgba))),
+                    epd.pack(epd.orient(ink)),
+                ]:
+                    bits = np.unpackbits(np.frombuffer(buffer, dtype=np.uint8))
+                    assert (bits[shown] == expected[shown]).all(), (name, shape)
+
+    def test_pack_planes(self):
+        for name, model in MODELS.items():
+            if name.startswith("mock") or not issubclass(model.class_, EPDHighlight):
+                continue
+            epd = model.class_()
+            for shape in [(epd.height, epd.width), (epd.width, epd.height)]:
+                rgba = random_frame(shape)
+                image = Image.fromarray(rgba, mode="RGBA").convert("RGB")
+                # the black pixels, and the coloured pixels as black
+                colored = (rgba[..., :3] != rgba[..., :1]).any(axis=-1)
+                expected = [
+                    np.unpackbits(epd.getbuffer(plane.rotate(180)))
+                    for plane in [
+                        image.convert("1", dither=Image.Dither.NONE),
+                        Image.fromarray(~colored),
+                    ]
+                ]
+                buffers = epd.pack_planes(rgba_to_planes(epd.orient(rgba[::-1, ::-1])))
+                shown = shown_bits(epd, shape)
+                for buffer, bits in zip(buffers, expected):
+                    unpacked = np.unpackbits(np.frombuffer(buffer, dtype=np.uint8))
+                    assert (unpacked[shown] == bits[shown]).all(), (name, shape)
@@ -0,0 +1,304 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase, mock
+
+import pandas as pd
+import pytest
+
+from tinyticker import clock, providers
+from tinyticker.config import RateLimitConfig
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.time = 0.0
+
+    def __call__(self) -> float:
+        return self.time
+
+    def sleep(self, seconds: float) -> None:
+        self.time += seconds
+
+
+class TestRateLimiter(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def _limiter(self, **kwargs) -> providers.RateLimiter:
+        return providers.RateLimiter(
+            "test",
+            RateLimitConfig(**kwargs),
+            clock=self.clock,
+            sleep=self.clock.sleep,
+        )
+
+    def test_burst(self):
+        limiter = self._limiter(per_minute=60, burst=5)
+        assert [limiter.acquire() for _ in range(5)] == [0] * 5
+        assert self.clock.time == 0
+        # then the requests are spread out
+        limiter.acquire()
+        assert self.clock.time == pytest.approx(60 / 55)
+
+    def test_quota(self):
+        limiter = self._limiter(per_minute=30, per_hour=100)
+        for _ in range(200):
+            limiter.acquire()
+            usage = limiter.usage()
+            assert usage["minute"] <= 30
+            assert usage["hour"] <= 100
+        # the hourly quota is the bottleneck
+        assert self.clock.time > 3600
+
+    def test_throttled(self):
+        limiter = self._limiter(per_minute=60, burst=1)
+        limiter.acquire()
+        limiter.throttled()
+        assert limiter.factor == 0.5
+        # the requests are blocked for the backoff delay
+        limiter.acquire()
+        assert self.clock.time == pytest.approx(5)
+        limiter.acquire()
+        # the refill rate is halved
+        assert self.clock.time == pytest.approx(5 + 2 * 60 / 59)
+        for _ in range(8):
+            limiter.succeeded()
+        assert limiter.factor == 1
+
+    def test_throttled_no_limits(self):
+        limiter = self._limiter()
+        limiter.throttled()
+        assert limiter.acquire() == pytest.approx(5)
+        # the backoff grows exponentially while throttled
+        limiter.throttled()
+        assert limiter.acquire() == pytest.approx(10)
+        limiter.succeeded()
+        assert limiter.acquire() == 0
+        # and starts over after a success
+        limiter.throttled()
+        assert limiter.acquire() == pytest.approx(5)
+
+    def test_acquire_n(self):
+        limiter = self._limiter(per_minute=60, burst=5)
+        assert limiter.acquire(5) == 0
+        assert limiter.usage()["minute"] == 5
+        # the batch used up the burst
+        limiter.acquire()
+        assert self.clock.time == pytest.approx(60 / 55)
+
+    def test_no_limits(self):
+        limiter = self._limiter()
+        for _ in range(100):
+            assert limiter.acquire() == 0
+
+    def test_process_clock(self):
+        simulated = clock.SimulatedClock()
+        previous = clock.set_clock(simulated)
+        self.addCleanup(clock.set_clock, previous)
+        limiter = providers.RateLimiter("test", RateLimitConfig(per_minute=60, burst=1))
+        limiter.acquire()
+        # the wait is simulated
+        assert limiter.acquire() == pytest.approx(60 / 59)
+        assert simulated.elapsed == pytest.approx(60 / 59)
+
+
+class TestLatencyStats(TestCase):
+    def test_percentiles(self):
+        stats = providers.LatencyStats(window=100)
+        assert stats.percentiles() == {}
+        for latency in range(200):
+            stats.record(latency / 1000)
+        # only the last latencies are kept
+        assert len(stats) == 100
+        percentiles = stats.percentiles((50, 99))
+        assert percentiles.keys() == {"p50", "p99"}
+        assert percentiles["p50"] == pytest.approx(0.1495)
+        assert percentiles["p99"] == pytest.approx(0.19801)
+
+    def test_provider_stats(self):
+        providers.get_latency_stats("test").record(0.25)
+        stats = providers.provider_stats("test")
+        assert stats["latency_p50_ms"] == 250
+        assert stats["requests"] == 0
+        providers.LATENCIES.pop("test")
+
+
+class TestCircuitBreaker(TestCase):
+    def test_open_close(self):
+        probe = mock.Mock(side_effect=[ConnectionError, None])
+        sleep = mock.Mock()
+        breaker = providers.CircuitBreaker(
+            "test", probe, failure_threshold=2, reset_timeout=1, sleep=sleep
+        )
+        breaker.record_failure()
+        breaker.check()
+        breaker.record_success()
+        breaker.record_failure()
+        assert not breaker.is_open
+        with mock.patch.object(breaker, "_probe_until_closed"):
+            breaker.record_failure()
+        assert breaker.is_open
+        with pytest.raises(providers.CircuitOpenError):
+            breaker.check()
+        # the background probe closes the circuit once the provider responds
+        breaker._probe_until_closed()
+        assert not breaker.is_open
+        assert probe.call_count == 2
+        # exponential backoff in between probes
+        assert [call.args[0] for call in sleep.call_args_list] == [1, 2]
+
+    def test_background_probe(self):
+        probed = threading.Event()
+        breaker = providers.CircuitBreaker(
+            "test", probed.set, failure_threshold=1, sleep=lambda _: None
+        )
+        breaker.record_failure()
+        assert probed.wait(5)
+        breaker._prober.join(5)  # type: ignore
+        assert not breaker.is_open
+
+
+class TestCryptocompare(TestCase):
+    def setUp(self):
+        self.limiter = mock.Mock()
+        providers.RATE_LIMITERS["cryptocompare"] = self.limiter
+        self.breaker = providers.CircuitBreaker(
+            "cryptocompare", mock.Mock(), failure_threshold=1
+        )
+        providers.CIRCUIT_BREAKERS["cryptocompare"] = self.breaker
+        self.session = providers.get_session("cryptocompare")
+
+    def _response(self, data: dict, status_code: int = 200) -> mock.Mock:
+        response = mock.Mock(status_code=status_code, reason="Too Many Requests")
+        response.json.return_value = data
+        return response
+
+    def test_historical(self):
+        candles = [{"time": 0, "close": 1.0}]
+        response = self._response({"Response": "Success", "Data": {"Data": candles}})
+        with mock.patch.object(self.session, "get", return_value=response) as get:
+            assert (
+                providers.cryptocompare_historical(
+                    "BTC", "USD", "hour", limit=24, api_key="KEY"
+                )
+                == candles
+            )
+        assert get.call_args.args[0].endswith("v2/histohour")
+        assert get.call_args.kwargs["params"]["limit"] == "24"
+        assert get.call_args.kwargs["headers"] == {"authorization": "Apikey KEY"}
+        self.limiter.acquire.assert_called_once()
+        self.limiter.succeeded.assert_called_once()
+        assert len(providers.get_latency_stats("cryptocompare")) == 1
+
+    def test_throttled(self):
+        response = self._response(
+            {
+                "Response": "Error",
+                "Message": "You are over your rate limit please upgrade your account!",
+            }
+        )
+        with mock.patch.object(self.session, "get", return_value=response):
+            with pytest.raises(providers.RateLimitError):
+                providers.cryptocompare_price(["BTC"], "USD")
+        self.limiter.throttled.assert_called_once()
+
+    def test_throttled_status(self):
+        response = self._response({}, status_code=429)
+        with mock.patch.object(self.session, "get", return_value=response):
+            with pytest.raises(providers.RateLimitError):
+                providers.cryptocompare_price(["BTC"], "USD")
+        self.limiter.throttled.assert_called_once()
+
+    def test_error(self):
+        response = self._response({"Response": "Error", "Message": "unknown fsym"})
+        with mock.patch.object(self.session, "get", return_value=response):
+            with pytest.raises(ValueError):
+                providers.cryptocompare_price(["NOTACOIN"], "USD")
+        self.limiter.throttled.assert_not_called()
+
+    def test_circuit_open(self):
+        with mock.patch.object(
+            self.session, "get", side_effect=providers.requests.ConnectionError
+        ) as get, mock.patch.object(self.breaker, "_probe_until_closed"):
+            with pytest.raises(providers.requests.ConnectionError):
+                providers.cryptocompare_price(["BTC"], "USD")
+            assert self.breaker.is_open
+            # the endpoint isn't hit while the circuit is open
+            with pytest.raises(providers.CircuitOpenError):
+                providers.cryptocompare_price(["BTC"], "USD")
+        assert get.call_count == 1
+
+    def tearDown(self):
+        providers.RATE_LIMITERS.pop("cryptocompare")
+        providers.CIRCUIT_BREAKERS.pop("cryptocompare")
+        providers.LATENCIES.pop("cryptocompare", None)
+
+
+class TestYfinance(TestCase):
+    def setUp(self):
+        self.limiter = mock.Mock()
+        providers.RATE_LIMITERS["yfinance"] = self.limiter
+
+    def test_throttled(self):
+        with mock.patch.object(
+            providers.yfinance, "download", return_value=pd.DataFrame()
+        ), mock.patch.dict(
+            providers.yfinance.shared._ERRORS, {"SPY": "429 Client Error"}
+        ):
+            providers.yfinance_download(["SPY"], interval="1d")
+        self.limiter.acquire.assert_called_once()
+        self.limiter.throttled.assert_called_once()
+
+    def test_succeeded(self):
+        with mock.patch.object(
+            providers.yfinance, "download", return_value=pd.DataFrame()
+        ) as download:
+            providers.yfinance_download(["SPY"], interval="1d")
+        self.limiter.succeeded.assert_called_once()
+        # the requests can't hang
+        assert download.call_args.kwargs["timeout"] == providers.REQUEST_TIMEOUT
+
+    def tearDown(self):
+        providers.RATE_LIMITERS.pop("yfinance")
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_):
+        pass
+
+
+class TestSession(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def test_connection_reuse(self):
+        session = providers.get_session("test")
+        assert providers.get_session("test") is session
+        url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        for _ in range(5):
+            assert session.get(url, timeout=5).status_code == 200
+        assert providers.connection_stats("test") == {
+            "requests": 5,
+            "connections": 1,
+            "reused": 4,
+        }
+
+    def test_no_session(self):
+        assert providers.connection_stats("unknown")["requests"] == 0
+
+    def tearDown(self):
+        if "test" in providers.SESSIONS:
+            providers.SESSIONS.pop("test").close()
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,151 @@
+from pathlib import Path
+from unittest import TestCase, mock
+
+import numpy as np
+import pandas as pd
+import pytest
+from PIL import Image, ImageDraw
+
+from tinyticker import raster
+from tinyticker.candles import Candles
+from tinyticker.display import Display, rgba_to_planes
+
+from .test_display import EPDMock  # noqa: F401, registers the mock models
+
+
+def to_bits(image: Image.Image) -> np.ndarray:
+    """The black pixels of an image."""
+    return ~np.asarray(image.convert("RGB").convert("1", dither=Image.Dither.NONE))
+
+
+class TestRaster(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = Path(__file__).parents[1] / "data"
+        cls.historical: pd.DataFrame = pd.read_pickle(
+            cls.data_dir / "crypto_historical.pkl"
+        )
+        cls.display = Display("mock", backend="raster")
+        cls.reference = Display("mock")
+
+    def _pixel_diff(self, **kwargs) -> np.ndarray:
+        """The pixels which differ from the matplotlib backend's frame."""
+        fig, _ = self.reference.plot(self.historical, None, **kwargs)
+        expected = to_bits(self.reference.fig_to_image(fig))
+        return to_bits(self.display.plot(self.historical, None, **kwargs)) != expected
+
+    def test_reference_plots(self):
+        for volume, reference in [
+            (False, "crypto_historical_plot.png"),
+            (True, "crypto_historical_plot_volume.png"),
+        ]:
+            image = self.display.plot(self.historical, None, volume=volume)
+            assert image.size == (250, 122)
+            diff = to_bits(image) != to_bits(Image.open(self.data_dir / reference))
+            # only the text's glyphs differ
+            assert diff.mean() < 0.01
+            assert diff[15:].mean() < 0.001
+
+    def test_plot_types(self):
+        for type in ["candle", "line", "ohlc"]:
+            for volume in [False, True]:
+                diff = self._pixel_diff(type=type, volume=volume, mav=5)
+                assert diff.mean() < 0.015, (type, volume)
+                # below the top string
+                assert diff[15:].mean() < 0.005, (type, volume)
+
+    def test_xlim(self):
+        diff = self._pixel_diff(type="line", xlim=(-0.75, 29.75))
+        assert diff[15:].mean() < 0.005
+
+    def test_sub_string(self):
+        diff = self._pixel_diff(top_string="BTC: $", sub_string="24x1h", delta=1.0)
+        assert diff.mean() < 0.03
+        assert diff[30:].mean() < 0.001
+
+    def test_highlight(self):
+        candles = Candles.from_dataframe(self.historical)
+        image = raster.plot(candles, 250, 122, "BTC", mav=3, highlight=True)
+        assert image.highlight.any()
+        rgb = np.asarray(image.to_image())
+        assert ((rgb == (255, 0, 0)).all(axis=-1) == image.highlight).all()
+        # without highlighted pixels, a 1-bit image
+        assert raster.plot(candles, 250, 122, "BTC").to_image().mode == "1"
+
+    def test_show_highlight(self):
+        display = Display("mock_highlight", backend="raster")
+        with mock.patch.object(display.epd, "display") as epd_display:
+            image = display.plot(self.historical, None, mav=3, show=True)
+        # the planes of the image, red is black and highlighted
+        planes = rgba_to_planes(display.epd.orient(np.asarray(image.convert("RGBA"))))
+        assert planes[1].any()
+        assert epd_display.call_args.args == display.epd.pack_planes(planes)
+
+    def test_rect_snapping(self):
+        frame = raster.Raster(10, 10)
+        frame.rect(2.4, 6.6, 2.6, 7.4, face=False)
+        # the outline is on the pixels nearest to the edges
+        assert frame.frame[3:8, 2].all() and frame.frame[3:8, 7].all()
+        assert frame.frame[3, 2:8].all() and frame.frame[7, 2:8].all()
+        assert not frame.frame[4:7, 3:7].any()
+        assert frame.frame.sum() == 18
+
+    def test_invalid_type(self):
+        with pytest.raises(ValueError):
+            self.display.plot(self.historical, None, type="renko")
+
+
+class TestCompositor(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.candles = Candles.from_dataframe(
+            pd.read_pickle(Path(__file__).parents[1] / "data" / "crypto_historical.pkl")
+        )
+
+    def _expected(self, candles, top_string, sub_string, **kwargs) -> raster.Raster:
+        return raster.plot(candles, 250, 122, top_string, sub_string, **kwargs)
+
+    def test_compose(self):
+        compositor = raster.Compositor(250, 122)
+        frames = [
+            (self.candles, "BTC: $ 32000.00 +1.00%", "24x1h", {"volume": True}),
+            # a new price
+            (self.candles, "BTC: $ 32100.00 +1.31%", "24x1h", {"volume": True}),
+            (self.candles, "BTC: $ 32100.00 +1.31%", None, {"volume": True}),
+            # new candles
+            (self.candles[1:], "BTC: $ 32100.00 +1.31%", "23x1h", {"volume": True}),
+            # new options
+            (self.candles[1:], "BTC: $ 32100.00 +1.31%", "23x1h", {"mav": 3}),
+        ]
+        expected = [self._expected(*frame[:3], **frame[3]) for frame in frames]
+        with mock.patch.object(raster, "chart", wraps=raster.chart) as chart:
+            for (candles, top_string, sub_string, kwargs), plotted in zip(
+                frames, expected
+            ):
+                frame = compositor.compose(candles, top_string, sub_string, **kwargs)
+                assert (frame.frame == plotted.frame).all()
+                assert (frame.highlight == plotted.highlight).all()
+        # the chart is only redrawn for the new candles and options
+        assert chart.call_count == 3
+
+    def test_labels_cached(self):
+        compositor = raster.Compositor(250, 122)
+        compositor.compose(self.candles, "ETH: $ 2000.00", "24x1h")
+        hits = raster._label.cache_info().hits
+        compositor.compose(self.candles, "ETH: $ 2000.00", "24x1h")
+        assert raster._label.cache_info().hits == hits + 2
+
+    def test_glyphs(self):
+        # the text assembled from the cached glyphs is the text drawn by PIL
+        for x, y, text in [(3.3, 12.6, "BTC: $ 32100.00"), (-4.7, -2.4, "Wg|y (")]:
+            frame = raster.Raster(120, 30)
+            frame.text(x, y, text, 13.3)
+            image = Image.new("L", (120, 30))
+            ImageDraw.Draw(image).text(
+                (x, y),
+                text,
+                fill=255,
+                font=raster._font(frame.points(13.3)),
+                anchor="ls",
+            )
+            assert (frame.frame == (np.asarray(image) >= 128)).all()
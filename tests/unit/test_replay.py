@@ -0,0 +1,93 @@
+import time
+from pathlib import Path
+from shutil import rmtree
+from unittest import TestCase, mock
+
+import pandas as pd
+import pytest
+
+from tinyticker import config, ticker
+from tinyticker.replay import Replay
+
+
+class TestReplay(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.test_dir = Path("test_replay")
+        cls.historical: pd.DataFrame = pd.read_pickle(
+            Path(__file__).parents[1] / "data" / "stock_historical.pkl"
+        )
+
+    def _ticker(self, replay: Replay, tick) -> ticker.Ticker:
+        tick_ = ticker.Ticker(symbol_type="stock", symbol="SPY", replay=replay)
+        tick_._symbol_type_map["stock"] = tick
+        return tick_
+
+    def _record(self):
+        responses = [
+            ticker.Response(self.historical, 1.0),
+            ticker.Response(self.historical.iloc[:-1], 2.0),
+        ]
+
+        def tick():
+            time.sleep(0.05)
+            if not responses:
+                raise ConnectionError("no network")
+            return responses.pop(0)
+
+        recorder = self._ticker(Replay("record", self.test_dir), tick)
+        recorded = [recorder.single_tick(), recorder.single_tick()]
+        with pytest.raises(ConnectionError):
+            recorder.single_tick()
+        return recorded
+
+    def test_record_replay(self):
+        recorded = self._record()
+        tick = mock.Mock()
+        player = self._ticker(Replay("replay", self.test_dir, latency=False), tick)
+        for _ in range(2):
+            for response in recorded:
+                replayed = player.single_tick()
+                assert replayed.current_price == response.current_price
+                assert (replayed.candles.values == response.candles.values).all()
+            with pytest.raises(ConnectionError, match="no network"):
+                player.single_tick()
+        tick.assert_not_called()
+
+    def test_latency(self):
+        self._record()
+        player = self._ticker(Replay("replay", self.test_dir), mock.Mock())
+        start = time.perf_counter()
+        player.single_tick()
+        assert time.perf_counter() - start >= 0.05
+
+    def test_nothing_recorded(self):
+        player = self._ticker(Replay("replay", self.test_dir), mock.Mock())
+        with pytest.raises(KeyError):
+            player.single_tick()
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            Replay("rewind")
+
+    def test_replay_from_tt_config(self):
+        self._record()
+        tt_config = config.TinytickerConfig(
+            tickers=[config.TickerConfig(symbol="SPY", interval="1d", wait_time=0)],
+            replay=config.ReplayConfig(
+                mode="replay", directory=str(self.test_dir), latency=False
+            ),
+        )
+        sequence = ticker.Sequence.from_tinyticker_config(tt_config)
+        # the replayed candles aren't skipped for being outdated
+        assert not sequence.skip_outdated
+        with mock.patch.object(ticker.providers.yfinance, "download") as download:
+            for i, (_, response) in enumerate(sequence.start()):
+                assert response.current_price == 1.0 + i
+                if i == 1:
+                    break
+        download.assert_not_called()
+
+    def tearDown(self):
+        if self.test_dir.is_dir():
+            rmtree(self.test_dir)
@@ -0,0 +1,106 @@
+from datetime import timezone
+from pathlib import Path
+from unittest import TestCase, mock
+
+import pandas as pd
+import pytest
+
+from tinyticker import clock, ticker
+from tinyticker.store import CandleStore
+
+KEY = ("crypto", "BTC", "1h")
+
+
+class TestCandleStore(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = Path(__file__).parents[1] / "data"
+        cls.historical: pd.DataFrame = pd.read_pickle(
+            cls.data_dir / "crypto_historical.pkl"
+        )
+
+    @pytest.fixture(autouse=True)
+    def _test_dir(self, tmp_path: Path):
+        self.test_dir = tmp_path / "store"
+        self.store = CandleStore(self.test_dir)
+
+    def test_get_empty(self):
+        assert self.store.get(KEY) is None
+        assert self.store.last_timestamp(KEY) is None
+
+    def test_update_merge(self):
+        self.store.update(KEY, self.historical.iloc[:20])
+        # overlapping candles replace the stored ones
+        new = self.historical.iloc[18:].copy()
+        new.loc[new.index[0], "Close"] = 0
+        merged = self.store.update(KEY, new)
+        assert len(merged) == len(self.historical)
+        assert merged.index.is_monotonic_increasing
+        assert merged.loc[new.index[0], "Close"] == 0
+        assert self.store.last_timestamp(KEY) == self.historical.index[-1]
+
+    def test_update_max_length(self):
+        merged = self.store.update(KEY, self.historical, max_length=10)
+        assert len(merged) == 10
+        assert (merged.index == self.historical.index[-10:]).all()
+
+    def test_persistence(self):
+        self.store.update(KEY, self.historical)
+        # a new store instance, as after a restart of the ticker process
+        store = CandleStore(self.test_dir)
+        stored = store.get(KEY)
+        assert stored is not None
+        assert (stored.index == self.historical.index).all()
+
+    def test_write_throttled(self):
+        simulated = clock.SimulatedClock()
+        previous = clock.set_clock(simulated)
+        self.addCleanup(clock.set_clock, previous)
+        self.store.update(KEY, self.historical)
+        path = self.store._path(KEY)
+        path.unlink()
+        # the same candles, nothing to write
+        self.store.update(KEY, self.historical.iloc[-2:])
+        # only the forming candle changed, written at most once per write_interval
+        forming = self.historical.iloc[-1:].copy()
+        for close in range(3):
+            forming["Close"] = close
+            self.store.update(KEY, forming)
+        assert not path.exists()
+        simulated.advance(self.store.write_interval)
+        self.store.update(KEY, forming)
+        assert CandleStore(self.test_dir).get(KEY)["Close"].iloc[-1] == 2
+        # a new candle is written right away
+        new = forming.copy()
+        new.index = new.index + pd.to_timedelta("1h")
+        self.store.update(KEY, new)
+        assert CandleStore(self.test_dir).last_timestamp(KEY) == new.index[-1]
+
+    def test_corrupted_file(self):
+        self.test_dir.mkdir()
+        self.store._path(KEY).write_text("not a pickle")
+        assert self.store.get(KEY) is None
+
+    def test_ticker_incremental_fetch(self):
+        self.store.update(KEY, self.historical.iloc[:-2])
+        now = self.historical.index[-1] + pd.to_timedelta("10m")
+        tick = ticker.Ticker(
+            api_key="KEY",
+            symbol_type="crypto",
+            symbol="BTC",
+            interval="1h",
+            lookback=20,
+            store=self.store,
+        )
+        with mock.patch.object(
+            ticker.utils, "now", return_value=now.tz_convert(timezone.utc)
+        ), mock.patch.object(
+            ticker, "get_cryptocompare", return_value=self.historical.iloc[-4:]
+        ) as get_cryptocompare, mock.patch.object(
+            ticker.providers, "cryptocompare_price", side_effect=ValueError
+        ):
+            resp = tick.single_tick()
+        # only the missing candles are requested
+        assert get_cryptocompare.call_args.args[-1] == 4
+        assert len(resp.historical) == tick.lookback
+        assert (resp.historical.index == self.historical.index[-20:]).all()
@@ -0,0 +1,309 @@
+import base64
+import hashlib
+import json
+import queue
+import socket
+import struct
+import threading
+import time
+from typing import List
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from tinyticker import clock, stream, ticker
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class FeedServer:
+    """Local websocket server, pushing the queued messages to its client."""
+
+    def __init__(self) -> None:
+        self.sock = socket.create_server(("127.0.0.1", 0))
+        self.url = f"ws://127.0.0.1:{self.sock.getsockname()[1]}/v2"
+        self.received: "queue.Queue[str]" = queue.Queue()
+        self.outbox: "queue.Queue[bytes]" = queue.Queue()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def push(self, message: dict) -> None:
+        self.outbox.put(self._frame(0x1, json.dumps(message).encode()))
+
+    def ping(self) -> None:
+        self.outbox.put(self._frame(0x9, b"ping"))
+
+    @staticmethod
+    def _frame(opcode: int, payload: bytes) -> bytes:
+        if len(payload) < 126:
+            return bytes([0x80 | opcode, len(payload)]) + payload
+        return bytes([0x80 | opcode, 126]) + struct.pack("!H", len(payload)) + payload
+
+    def _serve(self) -> None:
+        conn, _ = self.sock.accept()
+        file = conn.makefile("rb")
+        key = ""
+        while True:
+            line = file.readline().decode().strip()
+            if not line:
+                break
+            if line.lower().startswith("sec-websocket-key"):
+                key = line.split(":", 1)[1].strip()
+        accept = base64.b64encode(
+            hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()
+        ).decode()
+        conn.sendall(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+            ).encode()
+        )
+        threading.Thread(target=self._read, args=(file,), daemon=True).start()
+        while True:
+            frame = self.outbox.get()
+            if frame is None:
+                break
+            conn.sendall(frame)
+        conn.close()
+
+    def _read(self, file) -> None:
+        try:
+            while True:
+                first, second = file.read(2)
+                length = second & 0x7F
+                if length == 126:
+                    (length,) = struct.unpack("!H", file.read(2))
+                mask = file.read(4)
+                payload = bytes(
+                    b ^ mask[i % 4] for i, b in enumerate(file.read(length))
+                )
+                self.received.put((first & 0x0F, payload.decode()))
+        except (ValueError, OSError):
+            pass
+
+    def close(self) -> None:
+        self.outbox.put(None)  # type: ignore
+        self.sock.close()
+
+
+def make_historical(end: pd.Timestamp, periods: int) -> pd.DataFrame:
+    index = pd.date_range(end=end, periods=periods, freq="1h")
+    close = np.full(periods, 100.0)
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close + 1,
+            "Low": close - 1,
+            "Close": close,
+            "Volume": np.ones(periods),
+        },
+        index=index,
+    )
+
+
+def price_update(price: float, timestamp: float, volume: float = 1) -> dict:
+    return {
+        "TYPE": "5",
+        "MARKET": "CCCAGG",
+        "FROMSYMBOL": "BTC",
+        "TOSYMBOL": "USD",
+        "PRICE": price,
+        "LASTUPDATE": timestamp,
+        "LASTVOLUME": volume,
+    }
+
+
+class TestStreamTimeout(TestCase):
+    def setUp(self):
+        self.server = FeedServer()
+        self.stream = stream.PriceStream(
+            url=self.server.url, reconnect_delay=60, timeout=0.5
+        )
+        self.ticker = ticker.Ticker(
+            api_key="KEY", symbol="BTC", interval="1h", stream=self.stream
+        )
+        self.stream.start()
+        assert self.stream.wait_connected(5)
+        # the subscription
+        self.server.received.get(timeout=5)
+        self.ticker.stream_synced = True
+
+    def test_heartbeat(self):
+        for _ in range(10):
+            self.server.push({"TYPE": "999", "MESSAGE": "HEARTBEAT"})
+            self.server.ping()
+            time.sleep(0.1)
+        # longer than the timeout, kept alive by the heartbeats
+        assert self.stream.is_connected
+        assert self.ticker.stream_synced
+        # the pings are answered
+        assert self.server.received.get(timeout=5) == (0xA, "ping")
+
+    def test_idle(self):
+        start = time.monotonic()
+        while self.stream.is_connected and time.monotonic() - start < 5:
+            time.sleep(0.05)
+        # no heartbeat, the connection is considered dead
+        assert not self.stream.is_connected
+        assert not self.ticker.stream_synced
+        assert stream.STREAM_HEARTBEAT < stream.PriceStream().timeout
+
+    def tearDown(self):
+        self.stream.stop()
+        self.server.close()
+
+
+class TestParseTrade(TestCase):
+    def test_price_update(self):
+        assert stream.parse_trade(price_update(100.5, 1626976800, 0.1)) == (
+            stream.Trade("BTC", 1626976800, 100.5, 0.1)
+        )
+
+    def test_trade(self):
+        message = {"TYPE": "0", "FSYM": "ETH", "TS": 1626976800, "P": 2000, "Q": 2}
+        assert stream.parse_trade(message) == stream.Trade("ETH", 1626976800, 2000, 2)
+
+    def test_no_timestamp(self):
+        simulated = clock.SimulatedClock("2021-07-22 18:00")
+        previous = clock.set_clock(simulated)
+        self.addCleanup(clock.set_clock, previous)
+        message = price_update(100.5, 0)
+        del message["LASTUPDATE"]
+        assert stream.parse_trade(message).timestamp == 1626976800
+
+    def test_other(self):
+        assert stream.parse_trade({"TYPE": "20", "MESSAGE": "STREAMERWELCOME"}) is None
+        # volume only update
+        assert stream.parse_trade({"TYPE": "5", "FROMSYMBOL": "BTC"}) is None
+
+
+class TestStreamTicker(TestCase):
+    def setUp(self):
+        self.end = pd.Timestamp("2021-07-22 18:00", tz="utc")
+        self.stream = stream.PriceStream(url="ws://unused", move_threshold=0.01)
+        self.ticker = ticker.Ticker(
+            api_key="KEY", symbol="BTC", interval="1h", lookback=24, stream=self.stream
+        )
+        self.ticker._current_price_fallback(make_historical(self.end, 24), None)
+
+    def test_subscribed(self):
+        assert self.stream.tickers == {"BTC": [self.ticker]}
+        weekly = ticker.Ticker(api_key="KEY", interval="1wk", stream=self.stream)
+        # the weekly candles aren't aligned on the epoch
+        assert weekly.stream is None
+        assert self.stream.tickers == {"BTC": [self.ticker]}
+
+    def test_candle_update(self):
+        timestamp = self.end.timestamp() + 60
+        self.ticker.on_trade(timestamp, 103.0, 2)
+        self.ticker.on_trade(timestamp + 1, 98.0, 1)
+        last = self.ticker._candles.view()[-1]
+        assert last.last_timestamp == self.end
+        assert list(last.values[0]) == [100, 103, 98, 98, 4]
+        assert len(self.ticker._candles) == 24
+
+    def test_new_candle(self):
+        self.ticker.on_trade(self.end.timestamp() + 3600 + 60, 101.0, 2)
+        candles = self.ticker._candles.view()
+        assert len(candles) == 24
+        assert candles.last_timestamp == self.end + pd.Timedelta("1h")
+        assert list(candles.values[-1]) == [101, 101, 101, 101, 2]
+        # old trades are ignored
+        self.ticker.on_trade(self.end.timestamp() - 3600, 50.0, 1)
+        assert self.ticker._candles.view().low.min() == 99
+
+    def test_stream_tick(self):
+        self.ticker.stream_synced = True
+        self.ticker.on_trade(self.end.timestamp(), 100.5, 1)
+        assert self.ticker.single_tick == self.ticker._tick_stream
+        response = self.ticker.single_tick()
+        assert response.current_price == 100.5
+        # the response doesn't change with the stream
+        self.ticker.on_trade(self.end.timestamp(), 120, 1)
+        assert response.candles.close[-1] == 100.5
+
+    def test_derived_stream_tick(self):
+        daily = ticker.Ticker(
+            api_key="KEY", symbol="BTC", interval="1d", lookback=2, stream=self.stream
+        )
+        daily.source = self.ticker
+        self.ticker.fetch_lookback = 48
+        self.ticker._current_price_fallback(make_historical(self.end, 48), None)
+        self.ticker.stream_synced = True
+        # derived from the fetch
+        assert daily.single_tick().current_price == 100
+        self.ticker.on_trade(self.end.timestamp() + 3600, 110, 1)
+        response = daily.single_tick()
+        # then from the streamed candles
+        assert response.current_price == 110
+        assert len(response.candles) == 2
+        assert response.candles.high[-1] == 110
+        self.ticker.on_trade(self.end.timestamp() + 7200, 120, 1)
+        response = daily.single_tick()
+        assert response.current_price == 120
+        assert response.candles.high[-1] == 120
+        # the fetch's older candles are kept
+        assert len(self.ticker._fetched[1]) == 48
+
+    def test_price_moved(self):
+        self.ticker.stream_synced = True
+        self.ticker.shown(100)
+        self.ticker.on_trade(self.end.timestamp(), 100.5, 1)
+        assert not self.ticker.wait_for_move(0.01)
+        self.ticker.on_trade(self.end.timestamp(), 101, 1)
+        assert self.ticker.wait_for_move(0.01)
+        # the event is reset
+        assert not self.ticker.wait_for_move(0.01)
+
+
+class TestPriceStream(TestCase):
+    def setUp(self):
+        self.server = FeedServer()
+        self.stream = stream.PriceStream(url=self.server.url, move_threshold=0.01)
+        self.end = pd.Timestamp("2021-07-22 18:00", tz="utc")
+        self.ticker = ticker.Ticker(
+            api_key="KEY",
+            symbol="BTC",
+            interval="1h",
+            lookback=24,
+            wait_time=30,
+            stream=self.stream,
+        )
+        historical = make_historical(self.end, 24)
+        self.ticker._symbol_type_map["crypto"] = lambda: (
+            self.ticker._current_price_fallback(historical, None)
+        )
+
+    def test_push_refresh(self):
+        self.stream.start()
+        assert self.stream.wait_connected(5)
+        subscription = json.loads(self.server.received.get(timeout=5)[1])
+        assert subscription == {"action": "SubAdd", "subs": ["5~CCCAGG~BTC~USD"]}
+        sequence = ticker.Sequence(
+            [self.ticker], skip_outdated=False, stream=self.stream
+        )
+        responses: List[ticker.Response] = []
+        start = time.monotonic()
+        yields = sequence.start()
+        for _, response in yields:
+            responses.append(response)
+            if len(responses) == 1:
+                assert self.ticker.stream_synced
+                # below the move threshold
+                self.server.push(price_update(100.5, self.end.timestamp()))
+                self.server.push(price_update(102, self.end.timestamp()))
+            else:
+                break
+        # refreshed by the push, without waiting for the wait_time
+        assert time.monotonic() - start < 10
+        assert responses[1].current_price == 102
+        assert responses[1].candles.high[-1] == 102
+        # the stream is stopped with the sequence
+        yields.close()
+        assert not self.stream.is_connected
+
+    def tearDown(self):
+        self.stream.stop()
+        self.server.close()
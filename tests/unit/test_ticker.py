@@ -1,9 +1,10 @@
 import os
+import threading
 import time
 from datetime import timezone
 from pathlib import Path
-from typing import Optional
-from unittest import TestCase
+from typing import List, Optional
+from unittest import TestCase, mock
 
 import numpy as np
 import pandas as pd
@@ -11,7 +12,7 @@ import pytest
 import pytz
 
 from tinyticker import utils
-from tinyticker import config, ticker
+from tinyticker import candles, config, ticker
 
 # monkey patch the now function to be time indenpendent
 utils.__dict__["now"] = lambda: pd.Timestamp(
@@ -82,7 +83,7 @@ class TestTicker(TestCase):
         assert ticker.wait_time == pd.to_timedelta(ticker.interval).total_seconds()
         assert resp.historical.index.tzinfo == pytz.UTC  # type: ignore
         assert (resp.historical.index == expected.index).all()
-        assert (resp.historical.columns == expected.columns).all()
+        assert list(resp.historical.columns) == list(candles.COLUMNS)
         # assert same(resp.historical, expected)
 
     def test_crypto_ticker_tick(self):
@@ -162,3 +163,667 @@ class TestSequence(TestCase):
             assert ticker_.symbol == sequence.tickers[i % 2].symbol
             if i == 5:
                 break
+
+
+class TestStockBatch(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = Path(__file__).parents[1] / "data"
+        cls.stock_historical: pd.DataFrame = pd.read_pickle(
+            cls.data_dir / "stock_historical.pkl"
+        )
+        cls.crypto_historical: pd.DataFrame = pd.read_pickle(
+            cls.data_dir / "crypto_historical.pkl"
+        )
+
+    def _download(self, symbols, **_):
+        return pd.concat({symbol: self.stock_historical for symbol in symbols}, axis=1)
+
+    def test_batch(self):
+        batch = ticker.StockBatch()
+        tickers = [
+            ticker.Ticker(
+                symbol=symbol,
+                symbol_type="stock",
+                interval=interval,
+                lookback=20,
+                batch=batch,
+            )
+            for symbol in ["SPY", "AAPL", "GOOG"]
+            for interval in ["1d", "1h"]
+        ]
+        assert len(batch.tickers) == len(tickers)
+        with mock.patch.object(
+            ticker.providers.yfinance, "download", side_effect=self._download
+        ) as download:
+            responses = [tick.single_tick() for tick in tickers]
+        # one call per interval group and one for the current prices
+        assert download.call_count == 3
+        for resp in responses:
+            assert len(resp.historical) == 20
+            assert resp.current_price == self.stock_historical.iloc[-1]["Close"]
+
+    def test_batch_refetch(self):
+        batch = ticker.StockBatch()
+        tickers = [
+            ticker.Ticker(
+                symbol=symbol,
+                symbol_type="stock",
+                interval="1d",
+                lookback=20,
+                wait_time=300,
+                batch=batch,
+            )
+            for symbol in ["SPY", "AAPL"]
+        ]
+        later = utils.now() + pd.to_timedelta("6h")
+        with mock.patch.object(
+            ticker.providers.yfinance, "download", side_effect=self._download
+        ) as download:
+            tickers[0].single_tick()
+            tickers[1].single_tick()
+            # ticked again, well within the interval
+            with mock.patch.object(ticker.utils, "now", return_value=later):
+                tickers[0].single_tick()
+        intervals = [call.kwargs["interval"] for call in download.call_args_list]
+        # the group shares a download per cycle, the daily candles are refetched
+        assert intervals.count("1d") == 2
+
+    def test_batch_fan_out(self):
+        batch = ticker.StockBatch()
+        quotes = ticker.CryptoQuotes()
+        tickers = [
+            ticker.Ticker(
+                symbol=symbol,
+                symbol_type="stock",
+                interval="1d",
+                lookback=20,
+                batch=batch,
+            )
+            for symbol in ["SPY", "AAPL", "GOOG", "MSFT"]
+        ] + [
+            ticker.Ticker(
+                api_key="KEY",
+                symbol=symbol,
+                symbol_type="crypto",
+                interval="1d",
+                lookback=20,
+                quotes=quotes,
+            )
+            for symbol in ["BTC", "ETH", "DOGE", "LTC"]
+        ]
+        running = []
+        overlapped = threading.Event()
+
+        def download(symbols, **kwargs):
+            running.append(symbols)
+            if len(running) > 1:
+                overlapped.set()
+            time.sleep(0.1)
+            running.pop()
+            return self._download(symbols, **kwargs)
+
+        def get_price(symbols, currency, api_key=None):
+            time.sleep(0.1)
+            return {symbol: {currency: 1.0} for symbol in symbols}
+
+        fan_out = ticker.FanOut(lambda tick: tick.single_tick(), tickers, 8)
+        with mock.patch.object(
+            ticker.providers.yfinance, "download", side_effect=download
+        ) as yf_download, mock.patch.object(
+            ticker.providers, "cryptocompare_price", side_effect=get_price
+        ) as crypto_price, mock.patch.object(
+            ticker, "get_cryptocompare", return_value=self.crypto_historical
+        ):
+            fan_out.refresh()
+            responses = [fan_out.get(i) for i in range(len(tickers))]
+        fan_out.shutdown()
+        # one download for the group and one for the current prices, not concurrent
+        assert yf_download.call_count == 2
+        assert not overlapped.is_set()
+        # the crypto tickers share the quotes' fetch
+        assert crypto_price.call_count == 1
+        assert all(len(resp.historical) == 20 for resp in responses)
+        assert all(resp.current_price == 1.0 for resp in responses[4:])
+
+    def test_responses_detached(self):
+        tick = ticker.Ticker(symbol="SPY", symbol_type="stock", lookback=20)
+        historical = self.stock_historical
+        # the forming candle moved, the ticker's candles are updated in place
+        moved = historical.assign(Close=historical["Close"] * 2)
+        with mock.patch.object(
+            ticker.providers,
+            "yfinance_download",
+            side_effect=[historical, historical, moved, moved],
+        ):
+            first = tick.single_tick()
+            close = first.candles.close.copy()
+            second = tick.single_tick()
+        assert (second.candles.close[-1:] != close[-1:]).all()
+        # the first response, still displayed, is left intact
+        assert (first.candles.close == close).all()
+
+    def test_get_yfinance_single_symbol(self):
+        with mock.patch.object(
+            ticker.providers.yfinance, "download", return_value=self.stock_historical
+        ):
+            data = ticker.get_yfinance(
+                ["SPY"], start=utils.now(), end=utils.now(), interval="1d"
+            )
+        assert list(data.keys()) == ["SPY"]
+        assert same(data["SPY"], self.stock_historical)
+
+
+class TestCryptoQuotes(TestCase):
+    @staticmethod
+    def _get_price(symbols, currency, api_key=None):
+        return {symbol: {currency: float(i)} for i, symbol in enumerate(symbols)}
+
+    def test_quotes(self):
+        quotes = ticker.CryptoQuotes(ttl=60)
+        tickers = [
+            ticker.Ticker(
+                api_key="KEY",
+                symbol_type="crypto",
+                symbol=symbol,
+                quotes=quotes,
+            )
+            for symbol in ["BTC", "ETH", "DOGE"]
+        ]
+        assert quotes.symbols == ["BTC", "ETH", "DOGE"]
+        now = utils.now()
+        with mock.patch.object(
+            ticker.providers, "cryptocompare_price", side_effect=self._get_price
+        ) as get_price, mock.patch.object(ticker.utils, "now", return_value=now):
+            prices = [quotes.get(tick.symbol) for tick in tickers]
+            assert prices == [0.0, 1.0, 2.0]
+            assert get_price.call_count == 1
+            # the quotes expire after the ttl
+            ticker.utils.now.return_value = now + pd.to_timedelta("61s")  # type: ignore
+            quotes.get("BTC")
+            assert get_price.call_count == 2
+            # unknown symbols get added
+            assert quotes.get("LTC") == 3.0
+            assert get_price.call_count == 3
+
+    def test_quotes_failed(self):
+        quotes = ticker.CryptoQuotes()
+        with mock.patch.object(
+            ticker.providers, "cryptocompare_price", side_effect=ValueError
+        ):
+            assert quotes.get("BTC") is None
+
+
+class FakeTicker(ticker.Ticker):
+    """A stock `Ticker` which returns canned data after some latency."""
+
+    def __init__(self, historical: pd.DataFrame, latency: float = 0, **kwargs):
+        super().__init__(symbol_type="stock", **kwargs)
+        self.historical = historical
+        self.latency = latency
+        self.n_ticks = 0
+        self._symbol_type_map["stock"] = self._tick_fake
+
+    def _tick_fake(self) -> ticker.Response:
+        time.sleep(self.latency)
+        self.n_ticks += 1
+        return ticker.Response(self.historical, 1.0)
+
+
+class TestSequencePrefetch(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = Path(__file__).parents[1] / "data"
+        cls.historical: pd.DataFrame = pd.read_pickle(
+            cls.data_dir / "stock_historical.pkl"
+        )
+
+    def _sequence(self, prefetch: bool) -> ticker.Sequence:
+        return ticker.Sequence(
+            [
+                FakeTicker(self.historical, latency=0.2, symbol="A", wait_time=0),
+                FakeTicker(pd.DataFrame(), latency=0, symbol="EMPTY", wait_time=0),
+                FakeTicker(self.historical, latency=0.2, symbol="B", wait_time=0),
+            ],
+            skip_outdated=False,
+            prefetch=prefetch,
+        )
+
+    def _time_yields(self, sequence: ticker.Sequence, wait_time: float):
+        symbols = []
+        times = []
+        for i, (ticker_, _) in enumerate(sequence.start()):
+            ticker_.wait_time = wait_time  # type: ignore
+            symbols.append(ticker_.symbol)
+            times.append(time.time())
+            if i == 4:
+                break
+        return symbols, np.diff(times)
+
+    def test_prefetch(self):
+        symbols, deltas = self._time_yields(self._sequence(prefetch=True), 0.4)
+        # the empty ticker is skipped
+        assert symbols == ["A", "B", "A", "B", "A"]
+        # the fetch latency is hidden behind the wait time
+        assert np.mean(deltas) == pytest.approx(0.4, abs=0.1)
+
+    def test_no_prefetch(self):
+        symbols, deltas = self._time_yields(self._sequence(prefetch=False), 0.4)
+        assert symbols == ["A", "B", "A", "B", "A"]
+        assert np.mean(deltas) == pytest.approx(0.6, abs=0.1)
+
+
+class CountingTicker(FakeTicker):
+    """A `FakeTicker` which counts the concurrent ticks."""
+
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def _tick_fake(self) -> ticker.Response:
+        cls = CountingTicker
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            return super()._tick_fake()
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+
+class TestSequenceFanOut(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = Path(__file__).parents[1] / "data"
+        cls.historical: pd.DataFrame = pd.read_pickle(
+            cls.data_dir / "stock_historical.pkl"
+        )
+
+    def setUp(self):
+        CountingTicker.max_in_flight = 0
+
+    def _sequence(self, concurrency: int, wait_time: int = 0) -> ticker.Sequence:
+        return ticker.Sequence(
+            [
+                CountingTicker(
+                    self.historical, latency=0.2, symbol=str(i), wait_time=wait_time
+                )
+                for i in range(6)
+            ],
+            skip_outdated=False,
+            concurrency=concurrency,
+        )
+
+    def _yields(self, sequence: ticker.Sequence, n: int) -> List[str]:
+        symbols = []
+        yields = sequence.start()
+        with mock.patch.object(ticker.Ticker, "wait_for_move", return_value=False):
+            for i, (ticker_, _) in enumerate(yields):
+                symbols.append(ticker_.symbol)
+                if i == n - 1:
+                    break
+        yields.close()
+        # the fetches still in flight aren't waited on
+        while CountingTicker.in_flight:
+            time.sleep(0.01)
+        return symbols
+
+    def test_concurrent(self):
+        sequence = self._sequence(concurrency=6)
+        start = time.time()
+        symbols = self._yields(sequence, 6)
+        # the tickers are fetched at once, not one after the other
+        assert time.time() - start < 0.8
+        assert symbols == [str(i) for i in range(6)]
+        assert CountingTicker.max_in_flight == 6
+
+    def test_concurrency_limit(self):
+        self._yields(self._sequence(concurrency=2), 6)
+        assert CountingTicker.max_in_flight == 2
+
+    def test_refresh(self):
+        sequence = self._sequence(concurrency=3, wait_time=60)
+        assert self._yields(sequence, 12) == [str(i) for i in range(6)] * 2
+        # the data isn't older than the wait time, it isn't refetched
+        assert [tick.n_ticks for tick in sequence.tickers] == [1] * 6  # type: ignore
+        for tick in sequence.tickers:
+            tick.wait_time = 0
+        self._yields(sequence, 6)
+        assert all(tick.n_ticks >= 2 for tick in sequence.tickers)  # type: ignore
+
+    def test_invalid_concurrency(self):
+        with pytest.raises(ValueError):
+            self._sequence(concurrency=0)
+
+
+class TestSequenceDeadline(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = Path(__file__).parents[1] / "data"
+        cls.historical: pd.DataFrame = pd.read_pickle(
+            cls.data_dir / "stock_historical.pkl"
+        )
+
+    def test_fetch_timeout(self):
+        tick = FakeTicker(self.historical, latency=0, symbol="SPY")
+        sequence = ticker.Sequence([tick], skip_outdated=False, fetch_timeout=0.2)
+        response = sequence._fetch(tick)
+        assert response is not None
+        tick.latency = 1
+        start = time.monotonic()
+        stale = sequence._fetch(tick)
+        assert time.monotonic() - start < 0.5
+        assert stale is not None and stale.stale
+        # the hung tick isn't ticked again until it completes
+        assert sequence._fetch(tick).stale  # type: ignore
+        time.sleep(1)
+        assert tick.n_ticks == 2
+        tick.latency = 0
+        assert not sequence._fetch(tick).stale  # type: ignore
+        assert tick.n_ticks == 3
+
+    def test_no_previous_response(self):
+        tick = FakeTicker(self.historical, latency=1, symbol="SPY")
+        sequence = ticker.Sequence([tick], skip_outdated=False, fetch_timeout=0.1)
+        with pytest.raises(ticker.DeadlineExceeded):
+            sequence._tick(tick, 0.1)
+
+    def test_cycle_timeout(self):
+        tickers = [
+            FakeTicker(self.historical, latency=latency, symbol=str(i))
+            for i, latency in enumerate([1, 1, 0])
+        ]
+        sequence = ticker.Sequence(
+            tickers, skip_outdated=False, fetch_timeout=0.2, cycle_timeout=0.3
+        )
+        start = time.monotonic()
+        assert sequence._next(0) is None
+        assert time.monotonic() - start < 0.5
+        # the budget was spent before the last ticker
+        assert [tick.n_ticks for tick in tickers] == [0, 0, 0]
+        time.sleep(1)
+        assert [tick.n_ticks for tick in tickers] == [1, 1, 0]
+
+    def test_no_deadline(self):
+        tick = FakeTicker(self.historical, latency=0.2, symbol="SPY")
+        sequence = ticker.Sequence([tick], skip_outdated=False)
+        # the deadlines are opt-in
+        assert sequence.fetch_timeout is None and sequence.cycle_timeout is None
+        assert sequence._fetch(tick) is not None
+        assert sequence._tick_executor is None
+
+    def test_bounded_threads(self):
+        tickers = [
+            FakeTicker(self.historical, latency=0.5, symbol=str(i)) for i in range(2)
+        ]
+        sequence = ticker.Sequence(tickers, skip_outdated=False, fetch_timeout=0.05)
+        for _ in range(5):
+            for tick in tickers:
+                sequence._fetch(tick)
+        # a tick thread per ticker at most, the hung ticks aren't ticked again
+        assert len(sequence._tick_executor._threads) <= len(tickers)  # type: ignore
+        time.sleep(0.6)
+        assert [tick.n_ticks for tick in tickers] == [1, 1]
+
+
+class TestSequenceMarketHours(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = Path(__file__).parents[1] / "data"
+        cls.historical: pd.DataFrame = pd.read_pickle(
+            cls.data_dir / "stock_historical.pkl"
+        )
+
+    def _next(self, sequence: ticker.Sequence, now: str):
+        with mock.patch.object(
+            ticker.utils, "now", return_value=pd.Timestamp(now, tz="utc")
+        ):
+            return sequence._next(0), sequence._sleep_time(300)
+
+    def test_closed_market_not_fetched(self):
+        tick = FakeTicker(self.historical, symbol="SPY", interval="1h")
+        sequence = ticker.Sequence([tick])
+        # saturday
+        next_, sleep_time = self._next(sequence, "2021-07-24 12:00")
+        assert next_ is None
+        assert tick.n_ticks == 0
+        # until monday's open
+        expected = pd.Timestamp("2021-07-26 13:30", tz="utc")
+        assert (
+            sleep_time
+            == (expected - pd.Timestamp("2021-07-24 12:00", tz="utc")).total_seconds()
+        )
+
+    def test_recently_closed_market_fetched(self):
+        tick = FakeTicker(self.historical, symbol="SPY", interval="1h")
+        sequence = ticker.Sequence([tick])
+        # 30 minutes after the close, the last candle might still be recent
+        self._next(sequence, "2021-07-23 20:30")
+        assert tick.n_ticks == 1
+
+    def test_no_skip_outdated(self):
+        tick = FakeTicker(self.historical, symbol="SPY", interval="1h")
+        sequence = ticker.Sequence([tick], skip_outdated=False)
+        next_, _ = self._next(sequence, "2021-07-24 12:00")
+        assert next_ is not None
+        assert tick.n_ticks == 1
+
+    def test_non_us_symbols_fetched(self):
+        for symbol in ["^N225", "BTC-EUR"]:
+            tick = FakeTicker(self.historical, symbol=symbol, interval="1h")
+            sequence = ticker.Sequence([tick])
+            # the NYSE is closed, the Tokyo exchange and the crypto markets are open
+            self._next(sequence, "2021-07-23 02:00")
+            assert tick.n_ticks == 1, symbol
+
+    def test_non_us_index_window(self):
+        tick = ticker.Ticker(
+            symbol_type="stock", symbol="^N225", interval="1h", lookback=7
+        )
+        start, _ = tick._get_yfinance_start_end()
+        # the NYSE sessions would only reach back to the 21st's US session, after the
+        # Tokyo session of the 21st, the 22nd being a Japanese holiday
+        assert start < pd.Timestamp("2021-07-21 00:00", tz="utc")
+
+    def test_unknown_exchange_cooldown(self):
+        sequence = ticker.Sequence(
+            [
+                FakeTicker(self.historical, symbol="SPY", interval="1h"),
+                FakeTicker(pd.DataFrame(), symbol="EURUSD=X", interval="1h"),
+            ]
+        )
+        next_, sleep_time = self._next(sequence, "2021-07-24 12:00")
+        assert next_ is None
+        assert sleep_time == 300
+
+
+class TestSequenceStale(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = Path(__file__).parents[1] / "data"
+        cls.historical: pd.DataFrame = pd.read_pickle(
+            cls.data_dir / "stock_historical.pkl"
+        )
+
+    def test_stale(self):
+        tick = FakeTicker(self.historical, symbol="SPY", interval="1d")
+        sequence = ticker.Sequence([tick], skip_outdated=False)
+        response = sequence._fetch(tick)
+        assert response is not None
+        assert not response.stale
+        tick._symbol_type_map["stock"] = mock.Mock(side_effect=ConnectionError)
+        stale = sequence._fetch(tick)
+        assert stale is not None
+        assert stale.stale
+        assert stale.candles is response.candles
+
+    def test_no_previous_response(self):
+        tick = FakeTicker(self.historical, symbol="SPY", interval="1d")
+        tick._symbol_type_map["stock"] = mock.Mock(side_effect=ConnectionError)
+        sequence = ticker.Sequence([tick], skip_outdated=False)
+        assert sequence._fetch(tick) is None
+
+
+def make_candles(start: str, periods: int, freq: str, tz="utc") -> pd.DataFrame:
+    index = pd.date_range(start, periods=periods, freq=freq, tz=tz)
+    close = np.arange(periods, dtype=float) + 1
+    return pd.DataFrame(
+        {
+            "Open": close - 0.5,
+            "High": close + 1,
+            "Low": close - 1,
+            "Close": close,
+            "Volume": np.ones(periods),
+        },
+        index=index,
+    )
+
+
+class TestResample(TestCase):
+    def test_resample_ohlcv(self):
+        historical = make_candles("2021-07-20", 48, "1h")
+        resampled = ticker.resample_ohlcv(historical, pd.to_timedelta("1d"))
+        assert len(resampled) == 2
+        day = historical.iloc[:24]
+        assert resampled.iloc[0]["Open"] == day.iloc[0]["Open"]
+        assert resampled.iloc[0]["High"] == day["High"].max()
+        assert resampled.iloc[0]["Low"] == day["Low"].min()
+        assert resampled.iloc[0]["Close"] == day.iloc[-1]["Close"]
+        assert resampled.iloc[0]["Volume"] == 24
+
+    def test_resample_ohlcv_session(self):
+        # two trading sessions of 30m candles, opening at 9:30
+        historical = pd.concat(
+            [
+                make_candles(f"2021-07-{day} 09:30", 13, "30min", tz="America/New_York")
+                for day in (21, 22)
+            ]
+        )
+        resampled = ticker.resample_ohlcv(
+            historical, pd.to_timedelta("1h"), session=True
+        )
+        # candles are aligned with the session open, the last candle is a half hour
+        assert len(resampled) == 14
+        assert resampled.index[0].strftime("%H:%M") == "09:30"
+        assert resampled.index[6].strftime("%H:%M") == "15:30"
+        assert resampled.index[7].strftime("%H:%M") == "09:30"
+
+    def test_derive_lookback(self):
+        hour = ticker.Ticker(api_key="KEY", symbol="BTC", interval="1h", lookback=24)
+        day = ticker.Ticker(api_key="KEY", symbol="BTC", interval="1d", lookback=5)
+        month = ticker.Ticker(api_key="KEY", symbol="BTC", interval="1mo")
+        minute = ticker.Ticker(api_key="KEY", symbol="BTC", interval="1m")
+        assert hour.derive_lookback(day) == 24 * 6
+        assert hour.derive_lookback(month) is None
+        # would require too many candles
+        assert minute.derive_lookback(day) is None
+        stock_min = ticker.Ticker(symbol_type="stock", symbol="SPY", interval="1m")
+        stock_hour = ticker.Ticker(symbol_type="stock", symbol="SPY", interval="1h")
+        stock_day = ticker.Ticker(symbol_type="stock", symbol="SPY", interval="1d")
+        assert stock_hour.derive_lookback(stock_day) == 7 * 31
+        assert stock_min.derive_lookback(stock_day) is None
+
+    def test_sequence_resample(self):
+        historical = make_candles("2021-07-16", 24 * 7, "1h")
+        tickers = [
+            ticker.Ticker(api_key="KEY", symbol="BTC", interval="1d", lookback=5),
+            ticker.Ticker(api_key="KEY", symbol="BTC", interval="1h", lookback=24),
+            ticker.Ticker(api_key="KEY", symbol="ETH", interval="1d", lookback=5),
+        ]
+        sequence = ticker.Sequence(tickers, skip_outdated=False)
+        assert tickers[0].source is tickers[1]
+        assert tickers[1].source is None
+        assert tickers[2].source is None
+        assert tickers[1].fetch_lookback == 24 * 6
+        with mock.patch.object(
+            ticker, "get_cryptocompare", return_value=historical
+        ) as get_cryptocompare, mock.patch.object(
+            ticker.providers, "cryptocompare_price", side_effect=ValueError
+        ):
+            hour = tickers[1].single_tick()
+            day = tickers[0].single_tick()
+        # the source ticker only fetched once
+        assert get_cryptocompare.call_count == 1
+        assert get_cryptocompare.call_args.args[-1] == 24 * 6
+        assert len(hour.historical) == 24
+        assert len(day.historical) == 5
+        assert day.current_price == hour.current_price
+        assert day.historical.iloc[-1]["High"] == historical.iloc[-24:]["High"].max()
+        with mock.patch.object(
+            ticker, "get_cryptocompare", return_value=historical
+        ) as get_cryptocompare, mock.patch.object(
+            ticker.providers, "cryptocompare_price", side_effect=ValueError
+        ):
+            tickers[0].single_tick()
+        # the derived ticker already derived from the source's last fetch
+        assert get_cryptocompare.call_count == 1
+        assert not ticker.Sequence(tickers[:2], resample=False).resample
+
+
+def make_crypto_payload(start: int, periods: int, step: int) -> List[dict]:
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(periods).cumsum()
+    return [
+        {
+            "time": start + i * step,
+            "high": close[i] + 1,
+            "low": close[i] - 1,
+            "open": close[i] - 0.5,
+            "volumefrom": float(i),
+            "volumeto": float(i) * close[i],
+            "close": close[i],
+            "conversionType": "direct",
+            "conversionSymbol": "",
+        }
+        for i in range(periods)
+    ]
+
+
+class TestGetCryptocompare(TestCase):
+    def test_columns(self):
+        expected: pd.DataFrame = pd.read_pickle(
+            Path(__file__).parents[1] / "data" / "crypto_historical.pkl"
+        )
+        payload = make_crypto_payload(1626894000, 25, 3600)
+        with mock.patch.object(
+            ticker.providers, "cryptocompare_historical", return_value=payload
+        ):
+            historical = ticker.get_cryptocompare("BTC", pd.to_timedelta("1h"), 24)
+        assert (historical.columns == expected.columns).all()
+        assert len(historical) == 24
+        assert historical.index.tzinfo == pytz.UTC  # type: ignore
+        assert historical.index[-1].timestamp() == payload[-1]["time"]
+
+    def test_resample(self):
+        # not aligned on the 5m buckets
+        payload = make_crypto_payload(1626894000 + 120, 121, 60)
+        with mock.patch.object(
+            ticker.providers, "cryptocompare_historical", return_value=payload
+        ) as api_method:
+            historical = ticker.get_cryptocompare("BTC", pd.to_timedelta("5m"), 24)
+        assert api_method.call_args.kwargs["limit"] == 120
+        raw = pd.DataFrame(payload).set_index("time")
+        raw.index = pd.to_datetime(raw.index, unit="s", utc=True)
+        expected = raw.resample("5min").agg(
+            {
+                "open": "first",
+                "high": "max",
+                "low": "min",
+                "close": "last",
+                "volumefrom": "sum",
+            }
+        )
+        assert len(historical) == 24
+        assert (historical.index == expected.index[-24:]).all()
+        assert np.allclose(
+            historical[["Open", "High", "Low", "Close", "Volume"]].to_numpy(),
+            expected.iloc[-24:].to_numpy(),
+        )
+
+    def test_no_data(self):
+        with mock.patch.object(
+            ticker.providers, "cryptocompare_historical", return_value=[]
+        ):
+            with pytest.raises(ValueError):
+                ticker.get_cryptocompare("BTC", pd.to_timedelta("1h"), 24)
@@ -0,0 +1,105 @@
+import datetime as dt
+from unittest import TestCase
+
+import pandas as pd
+
+from tinyticker import trading_calendar as tc
+
+
+class TestTradingCalendar(TestCase):
+    def test_easter(self):
+        assert tc.easter(2021) == dt.date(2021, 4, 4)
+        assert tc.easter(2024) == dt.date(2024, 3, 31)
+        assert tc.easter(2025) == dt.date(2025, 4, 20)
+
+    def test_nyse_holidays(self):
+        assert tc.nyse_holidays(2021) == {
+            dt.date(2021, 1, 1),
+            dt.date(2021, 1, 18),
+            dt.date(2021, 2, 15),
+            dt.date(2021, 4, 2),
+            dt.date(2021, 5, 31),
+            dt.date(2021, 7, 5),
+            dt.date(2021, 9, 6),
+            dt.date(2021, 11, 25),
+            dt.date(2021, 12, 24),
+        }
+        # new year's day on a saturday isn't observed on the friday before
+        assert dt.date(2021, 12, 31) not in tc.nyse_holidays(2022)
+        assert dt.date(2022, 6, 20) in tc.nyse_holidays(2022)
+
+    def test_nyse_early_closes(self):
+        assert tc.nyse_early_closes(2021) == {dt.date(2021, 11, 26): dt.time(13)}
+        assert tc.nyse_early_closes(2024) == {
+            dt.date(2024, 7, 3): dt.time(13),
+            dt.date(2024, 11, 29): dt.time(13),
+            dt.date(2024, 12, 24): dt.time(13),
+        }
+
+    def test_lse_substitute_days(self):
+        holidays = tc.lse_holidays(2021)
+        assert dt.date(2021, 12, 27) in holidays
+        assert dt.date(2021, 12, 28) in holidays
+
+    def test_get_exchange(self):
+        assert tc.get_exchange("AAPL") is tc.NYSE
+        assert tc.get_exchange("^GSPC") is tc.NYSE
+        assert tc.get_exchange("BRK.B") is None
+        assert tc.get_exchange("VOD.L") is tc.LSE
+        assert tc.get_exchange("SAP.DE") is tc.XETRA
+        assert tc.get_exchange("EURUSD=X") is None
+        assert tc.get_exchange("BTC-USD") is None
+        # only the US indices follow the NYSE sessions
+        assert tc.get_exchange("^N225") is None
+        assert tc.get_exchange("^FTSE") is None
+        # crypto pairs in any currency trade around the clock, unlike share classes
+        assert tc.get_exchange("BTC-EUR") is None
+        assert tc.get_exchange("ETH-GBP") is None
+        assert tc.get_exchange("BRK-B") is tc.NYSE
+
+    def test_session(self):
+        assert tc.NYSE.session(dt.date(2021, 7, 5)) is None
+        assert tc.NYSE.session(dt.date(2021, 7, 24)) is None
+        open_, close = tc.NYSE.session(dt.date(2021, 11, 26))  # type: ignore
+        assert open_ == pd.Timestamp("2021-11-26 14:30", tz="utc")
+        assert close == pd.Timestamp("2021-11-26 18:00", tz="utc")
+        assert tc.NYSE.is_open(pd.Timestamp("2021-07-22 18:00", tz="utc"))
+        assert not tc.NYSE.is_open(pd.Timestamp("2021-07-22 20:00", tz="utc"))
+
+    def test_start_for_lookback_daily(self):
+        end = pd.Timestamp("2021-07-22 18:00", tz="utc")
+        start = tc.NYSE.start_for_lookback(end, pd.to_timedelta("1d"), 30)
+        assert start == pd.Timestamp("2021-06-10", tz="America/New_York")
+        # before the open, the day's candle doesn't exist yet
+        end = pd.Timestamp("2021-07-06 13:00", tz="utc")
+        start = tc.NYSE.start_for_lookback(end, pd.to_timedelta("1d"), 2)
+        assert start == pd.Timestamp("2021-07-01", tz="America/New_York")
+
+    def test_start_for_lookback_intraday(self):
+        end = pd.Timestamp("2021-07-22 18:00", tz="utc")
+        # 5 candles on the 22nd, 7 on each of the 21st, 20th and 19th
+        start = tc.NYSE.start_for_lookback(end, pd.to_timedelta("1h"), 24)
+        assert start == pd.Timestamp("2021-07-19 11:30", tz="America/New_York")
+        # skips the weekend and the july 5th holiday
+        end = pd.Timestamp("2021-07-06 14:00", tz="utc")
+        start = tc.NYSE.start_for_lookback(end, pd.to_timedelta("30min"), 14)
+        assert start == pd.Timestamp("2021-07-02 09:30", tz="America/New_York")
+        # half day
+        end = pd.Timestamp("2021-11-29 14:30", tz="utc")
+        start = tc.NYSE.start_for_lookback(end, pd.to_timedelta("1h"), 4)
+        assert start == pd.Timestamp("2021-11-26 09:30", tz="America/New_York")
+
+    def test_next_open_previous_close(self):
+        # friday evening
+        time = pd.Timestamp("2021-07-02 22:00", tz="utc")
+        # monday is the observed independence day
+        assert tc.NYSE.next_open(time) == pd.Timestamp("2021-07-06 13:30", tz="utc")
+        assert tc.NYSE.previous_close(time) == pd.Timestamp(
+            "2021-07-02 20:00", tz="utc"
+        )
+        # during a session
+        time = pd.Timestamp("2021-07-22 18:00", tz="utc")
+        assert tc.NYSE.next_open(time) == pd.Timestamp("2021-07-23 13:30", tz="utc")
+        assert tc.NYSE.previous_close(time) == pd.Timestamp(
+            "2021-07-21 20:00", tz="utc"
+        )
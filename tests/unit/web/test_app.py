@@ -105,3 +105,16 @@ def test_logs(client: FlaskClient):
     resp = client.get("logfiles")
     assert resp.status_code == 200
     assert LOG_FILE.name in resp.data.decode("utf8")
+
+
+def test_config_keeps_options(client: FlaskClient):
+    tt_config = TinytickerConfig.from_file(CONFIG_FILE)
+    tt_config.sequence.prefetch = True
+    tt_config.rate_limits["yfinance"].per_minute = 10
+    tt_config.to_file(CONFIG_FILE)
+    resp = client.get("/config", query_string={"skip_outdated": True})
+    assert resp.status_code == 302
+    new_config = TinytickerConfig.from_file(CONFIG_FILE)
+    assert new_config.sequence.prefetch is True
+    assert new_config.sequence.skip_outdated is True
+    assert new_config.rate_limits["yfinance"].per_minute == 10
@@ -79,30 +79,46 @@ def start_ticker(config_file: Path) -> None:
 
     try:
         for ticker, resp in sequence.start():
-            logger.debug("API len(historical): %s", len(resp.historical))
+            logger.debug("API len(candles): %s", len(resp.candles))
             logger.debug("API current_price: %s", resp.current_price)
-            delta = (
-                100
-                * (resp.current_price - resp.historical.iloc[0]["Open"])
-                / resp.historical.iloc[0]["Open"]
-            )
+            first_open = float(resp.candles.open[0])
+            delta = 100 * (resp.current_price - first_open) / first_open
             xlim = None
             # if incomplete data, leave space for the missing data
-            if len(resp.historical) < ticker.lookback:
+            if len(resp.candles) < ticker.lookback:
                 # the floats are to leave padding left and right of the edge candles
                 xlim = (-0.75, ticker.lookback - 0.25)
             logger.debug("xlim: %s", xlim)
+            sub_string = f"{len(resp.candles)}x{ticker.interval}"
+            if resp.stale:
+                # the last fetch failed, this is the previous data
+                sub_string += " (stale)"
+            plot_kwargs = dict(ticker._display_kwargs)
+            plot_type = plot_kwargs.pop("plot_type", "candle")
+            fingerprint = (
+                resp.fingerprint,
+                ticker.symbol,
+                sub_string,
+                xlim,
+                plot_type,
+                tuple(sorted(plot_kwargs.items())),
+            )
+            if fingerprint == display.fingerprint:
+                # e.g. the market is closed, no need to render the same chart
+                logger.info("%s unchanged, not rendering.", ticker)
+                continue
             display.plot(
-                resp.historical,
+                resp.candles,
                 resp.current_price,
                 top_string=f"{ticker.symbol}: $",
-                sub_string=f"{len(resp.historical)}x{ticker.interval}",
+                sub_string=sub_string,
                 delta=delta,
                 show=True,
                 xlim=xlim,
-                type=ticker._display_kwargs.pop("plot_type", "candle"),
-                **ticker._display_kwargs,
+                type=plot_type,
+                **plot_kwargs,
             )
+            display.fingerprint = fingerprint
     except Exception as exc:
         logger.error(exc, stack_info=True)
         display.text(
@@ -0,0 +1,262 @@
+import datetime as dt
+import hashlib
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+
+class Candles:
+    """Compact OHLCV candles, backed by numpy arrays.
+
+    A `pd.DataFrame` and its `pd.DatetimeIndex` weigh a few kilobytes even for the
+    handful of candles a chart shows, this keeps only an int64 array of timestamps and
+    a float32 array of the "Open", "High", "Low", "Close" and "Volume" values.
+
+    Args:
+        timestamps: the candles' timestamps, in nanoseconds since the epoch.
+        values: the candles' values, of shape (n_candles, 5), in `COLUMNS` order.
+        tz: the time zone of the timestamps.
+    """
+
+    __slots__ = ("timestamps", "values", "tz")
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        values: np.ndarray,
+        tz: Optional[dt.tzinfo] = dt.timezone.utc,
+    ) -> None:
+        if values.shape != (len(timestamps), len(COLUMNS)):
+            raise ValueError(
+                f"values shape {values.shape} doesn't match "
+                f"{(len(timestamps), len(COLUMNS))}."
+            )
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float32)
+        self.tz = tz
+
+    @classmethod
+    def from_dataframe(cls, historical: pd.DataFrame) -> "Candles":
+        """Create `Candles` from a `pd.DataFrame` with a time index.
+
+        Args:
+            historical: `pd.DataFrame` with "Open", "High", "Low", "Close" and "Volume"
+                columns, extra columns are dropped.
+
+        Returns:
+            The `Candles`.
+        """
+        index: pd.DatetimeIndex = historical.index  # type: ignore
+        if len(historical) == 0:
+            return cls.empty_like(index.tz)
+        return cls(
+            index.asi8,
+            historical[list(COLUMNS)].to_numpy(dtype=np.float32),
+            index.tz,
+        )
+
+    @classmethod
+    def empty_like(cls, tz: Optional[dt.tzinfo] = dt.timezone.utc) -> "Candles":
+        """Create empty `Candles`."""
+        return cls(
+            np.empty(0, dtype=np.int64),
+            np.empty((0, len(COLUMNS)), dtype=np.float32),
+            tz,
+        )
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Convert to a `pd.DataFrame` with a time index."""
+        return pd.DataFrame(
+            # going through the shortest decimal representation gives back the
+            # original prices, e.g. 32287.16 and not 32287.16015625
+            self.values.astype(str).astype(np.float64),
+            columns=list(COLUMNS),
+            index=self.index,
+        )
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """The timestamps as a `pd.DatetimeIndex`."""
+        if self.tz is None:
+            return pd.DatetimeIndex(pd.to_datetime(self.timestamps, unit="ns"))
+        return pd.to_datetime(self.timestamps, unit="ns", utc=True).tz_convert(self.tz)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.timestamps) == 0
+
+    @property
+    def last_timestamp(self) -> pd.Timestamp:
+        """The timestamp of the last candle."""
+        return self.index[-1]
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.values[:, 0]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.values[:, 1]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.values[:, 2]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.values[:, 3]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.values[:, 4]
+
+    @property
+    def nbytes(self) -> int:
+        """The memory used by the arrays."""
+        return self.timestamps.nbytes + self.values.nbytes
+
+    def digest(self) -> bytes:
+        """Hash of the timestamps and values, to detect changes."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(self.timestamps).data)
+        digest.update(np.ascontiguousarray(self.values).data)
+        digest.update(str(self.tz).encode())
+        return digest.digest()
+
+    def copy(self) -> "Candles":
+        """Copy the arrays, e.g. to detach a view from a `CandleRing`."""
+        return Candles(self.timestamps.copy(), self.values.copy(), self.tz)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, key: Union[int, slice]) -> "Candles":
+        """Select candles, slices are views, without copies."""
+        if isinstance(key, int):
+            key = slice(key, key + 1 if key != -1 else None)
+        return Candles(self.timestamps[key], self.values[key], self.tz)
+
+    def __repr__(self) -> str:
+        return f"Candles(n={len(self)}, tz={self.tz})"
+
+
+class CandleRing:
+    """Fixed capacity buffer of the most recent candles, updated in place.
+
+    The arrays are allocated once, with twice the capacity: new candles are written
+    after the current ones and once the end of the arrays is reached, the last
+    `capacity` candles are moved back to the start. This way the candles are always
+    contiguous and `view` doesn't copy, and a view stays intact for at least the next
+    update, except for its still forming last candle which gets overwritten in place.
+
+    Args:
+        capacity: the maximum number of candles.
+    """
+
+    __slots__ = ("capacity", "tz", "_timestamps", "_values", "_start", "_len")
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("'capacity' must be at least 1.")
+        self.capacity = capacity
+        self.tz: Optional[dt.tzinfo] = dt.timezone.utc
+        self._timestamps = np.empty(2 * capacity, dtype=np.int64)
+        self._values = np.empty((2 * capacity, len(COLUMNS)), dtype=np.float32)
+        self._start = 0
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def view(self) -> Candles:
+        """The candles, oldest first, without copying."""
+        end = self._start + self._len
+        return Candles(
+            self._timestamps[self._start : end],
+            self._values[self._start : end],
+            self.tz,
+        )
+
+    def clear(self) -> None:
+        self._start = 0
+        self._len = 0
+
+    def update(self, candles: Candles) -> None:
+        """Merge candles, by timestamp.
+
+        Candles newer than the last one are appended, candles with the timestamp of a
+        buffered candle overwrite it. If the candles can't be merged in place, e.g.
+        they fill a gap, the buffer is rebuilt.
+
+        Args:
+            candles: the candles to merge, sorted by timestamp.
+        """
+        if candles.empty:
+            return
+        if self._len == 0 or candles.tz != self.tz:
+            self.tz = candles.tz
+            self._load(candles.timestamps, candles.values)
+            return
+        current = self.view()
+        new = candles.timestamps > current.timestamps[-1]
+        n_old = len(new) - int(new.sum())
+        if n_old:
+            old_timestamps = candles.timestamps[:n_old]
+            in_range = old_timestamps >= current.timestamps[0]
+            # the candles older than a full buffer are dropped, a buffer with room
+            # left is extended with them
+            if not in_range.all() and self._len < self.capacity:
+                self._rebuild(candles)
+                return
+            positions = np.searchsorted(current.timestamps, old_timestamps[in_range])
+            if not np.array_equal(
+                current.timestamps[positions], old_timestamps[in_range]
+            ):
+                self._rebuild(candles)
+                return
+            current.values[positions] = candles.values[:n_old][in_range]
+        self._append(candles.timestamps[n_old:], candles.values[n_old:])
+
+    def _append(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        n_new = len(timestamps)
+        if n_new == 0:
+            return
+        if n_new >= self.capacity:
+            self._load(timestamps, values)
+            return
+        end = self._start + self._len
+        if end + n_new > len(self._timestamps):
+            # move the candles which are kept back to the start of the arrays
+            n_keep = min(self._len, self.capacity - n_new)
+            keep = slice(end - n_keep, end)
+            self._timestamps[:n_keep] = self._timestamps[keep]
+            self._values[:n_keep] = self._values[keep]
+            self._start = 0
+            self._len = n_keep
+            end = n_keep
+        self._timestamps[end : end + n_new] = timestamps
+        self._values[end : end + n_new] = values
+        self._len += n_new
+        if self._len > self.capacity:
+            self._start += self._len - self.capacity
+            self._len = self.capacity
+
+    def _load(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        timestamps = timestamps[-self.capacity :]
+        values = values[-self.capacity :]
+        self._timestamps[: len(timestamps)] = timestamps
+        self._values[: len(values)] = values
+        self._start = 0
+        self._len = len(timestamps)
+
+    def _rebuild(self, candles: Candles) -> None:
+        current = self.view()
+        timestamps = np.concatenate([current.timestamps, candles.timestamps])
+        values = np.concatenate([current.values, candles.values])
+        # keep the last occurrence of each timestamp, the new candles win
+        _, last = np.unique(timestamps[::-1], return_index=True)
+        order = len(timestamps) - 1 - last
+        self._load(timestamps[order], values[order])
@@ -0,0 +1,105 @@
+"""The clock used for the scheduling, the outdated checks and the sleeps.
+
+`utils.now`, the `Sequence` and `Ticker` schedules, the replayed latencies, the
+providers' rate limiters and circuit breakers and the streamed trades without a
+timestamp all go through the process wide clock returned by `get_clock`. Replacing it
+with a `SimulatedClock` fast-forwards the sleeps, e.g. a day of rotation with replayed
+data runs in seconds.
+
+The `Sequence` still waits on its fetches' threads on the wall clock, the fetch
+deadlines guard against real network requests hanging. The providers' latency stats
+also measure the real requests on the wall clock.
+"""
+
+import threading
+import time
+from typing import Optional, Union
+
+import pandas as pd
+
+
+class Clock:
+    """The wall clock."""
+
+    def now(self) -> pd.Timestamp:
+        """The current UTC timestamp."""
+        return pd.to_datetime("now", utc=True)
+
+    def monotonic(self) -> float:
+        """Monotonic time, in seconds, to measure durations."""
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep for a number of seconds."""
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """Wait for an event to be set, at most `timeout` seconds.
+
+        Returns:
+            Whether the event is set.
+        """
+        return event.wait(timeout)
+
+
+class SimulatedClock(Clock):
+    """A clock which doesn't wait, sleeping advances its time instead.
+
+    Args:
+        start: the simulated time to start at.
+    """
+
+    def __init__(self, start: Union[str, pd.Timestamp] = "2021-07-22 18:00") -> None:
+        start = pd.Timestamp(start)
+        self.start = start if start.tzinfo is not None else start.tz_localize("utc")
+        self._elapsed = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self) -> float:
+        """The simulated time elapsed since `start`, in seconds."""
+        return self._elapsed
+
+    def advance(self, seconds: float) -> None:
+        """Move the time forward."""
+        if seconds > 0:
+            with self._lock:
+                self._elapsed += seconds
+
+    def now(self) -> pd.Timestamp:
+        return self.start + pd.to_timedelta(self._elapsed, unit="s")
+
+    def monotonic(self) -> float:
+        return self._elapsed
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        if not event.is_set():
+            self.advance(timeout)
+        return event.is_set()
+
+
+_CLOCK: Clock = Clock()
+
+
+def get_clock() -> Clock:
+    """The process wide clock."""
+    return _CLOCK
+
+
+def set_clock(clock: Optional[Clock] = None) -> Clock:
+    """Replace the process wide clock.
+
+    Args:
+        clock: the new clock, None for the wall clock.
+
+    Returns:
+        The previous clock.
+    """
+    global _CLOCK
+    previous = _CLOCK
+    _CLOCK = Clock() if clock is None else clock
+    return previous
@@ -2,12 +2,14 @@ import dataclasses as dc
 import json
 import logging
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 
 LOGGER = logging.getLogger(__name__)
 
 # remove hollow types because white on white doesn't show
 PLOT_TYPES = ["candle", "line", "ohlc"]
+# "raster" draws the charts straight into a 1-bit frame, without matplotlib
+RENDER_BACKENDS = ["matplotlib", "raster"]
 
 
 @dc.dataclass
@@ -26,6 +28,44 @@ class TickerConfig:
 class SequenceConfig:
     skip_outdated: bool = True
     skip_empty: bool = True
+    prefetch: bool = False
+    resample: bool = True
+    stream: bool = False
+    stream_threshold: float = 0.002
+    concurrency: int = 1
+    # deadlines of the fetches, in seconds, opt-in
+    fetch_timeout: Optional[float] = None
+    cycle_timeout: Optional[float] = None
+
+
+@dc.dataclass
+class RateLimitConfig:
+    per_minute: Optional[int] = None
+    per_hour: Optional[int] = None
+    burst: Optional[int] = None
+
+
+@dc.dataclass
+class ReplayConfig:
+    # None, "record" or "replay"
+    mode: Optional[str] = None
+    directory: Optional[str] = None
+    latency: bool = True
+
+
+@dc.dataclass
+class ArchiveConfig:
+    # build and serve the tickers from a long local history of their symbols
+    backfill: bool = False
+    directory: Optional[str] = None
+
+
+# the requests aren't limited unless configured, the free tiers allow about 60 per
+# minute, 1500 per hour for cryptocompare and 2000 per hour for yfinance
+DEFAULT_RATE_LIMITS = {
+    "cryptocompare": RateLimitConfig(),
+    "yfinance": RateLimitConfig(),
+}
 
 
 @dc.dataclass
@@ -35,6 +75,15 @@ class TinytickerConfig:
     epd_model: str = "EPD_v3"
     api_key: Optional[str] = None
     flip: bool = False
+    render_backend: str = "matplotlib"
+    rate_limits: Dict[str, RateLimitConfig] = dc.field(
+        default_factory=lambda: {
+            provider: dc.replace(config)
+            for provider, config in DEFAULT_RATE_LIMITS.items()
+        }
+    )
+    replay: ReplayConfig = dc.field(default_factory=lambda: ReplayConfig())
+    archive: ArchiveConfig = dc.field(default_factory=lambda: ArchiveConfig())
 
     @classmethod
     def from_file(cls, file: Path) -> "TinytickerConfig":
@@ -54,6 +103,15 @@ class TinytickerConfig:
         data["sequence"] = SequenceConfig(
             **data.get("sequence", dc.asdict(SequenceConfig()))
         )
+        if "rate_limits" in data:
+            data["rate_limits"] = {
+                provider: RateLimitConfig(**config)
+                for provider, config in data["rate_limits"].items()
+            }
+        if "replay" in data:
+            data["replay"] = ReplayConfig(**data["replay"])
+        if "archive" in data:
+            data["archive"] = ArchiveConfig(**data["archive"])
         return cls(**data)
 
     def to_json(self) -> str:
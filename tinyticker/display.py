@@ -1,16 +1,21 @@
+import hashlib
 import logging
-from typing import Optional, Tuple
+from typing import Dict, Hashable, Optional, Tuple, Union
 
 import matplotlib as mpl
-from matplotlib.figure import Figure
 from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
+from matplotlib.transforms import Bbox
 import mplfinance as mpf
 import numpy as np
 import pandas as pd
 from PIL import Image
 
-from .config import TinytickerConfig
+from . import raster
+from .candles import Candles
+from .config import RENDER_BACKENDS, TinytickerConfig
 from .waveshare_lib import CONFIG, MODELS
 from .waveshare_lib._base import EPDHighlight
 
@@ -30,33 +35,100 @@ TEXT_BBOX = {
     "facecolor": "white",
     "edgecolor": "white",
 }
+# ITU-R 601-2 luma weights of the RGBA channels, in thousandths, as used by PIL
+LUMA_WEIGHTS = np.array([299, 587, 114, 0], dtype=np.float32)
+
+
+def rgba_to_ink(rgba: np.ndarray) -> np.ndarray:
+    """The black pixels of an RGBA frame.
+
+    Thresholds the luma at half intensity, the pixels are the black pixels of PIL's
+    conversion of the frame to mode "1", without dithering.
+
+    Args:
+        rgba: the (height, width, 4) uint8 array of the frame, can be a view with
+            reordered rows and columns, the alpha channel is ignored.
+
+    Returns:
+        The boolean array of the black pixels.
+    """
+    # gather the pixels as 32 bit words, much faster than byte by byte
+    rgba = np.ascontiguousarray(rgba.view(np.uint32)).view(np.uint8)
+    # the luma is exact in float32, and the product is a BLAS call
+    return rgba.astype(np.float32) @ LUMA_WEIGHTS < 128000
+
+
+def rgba_to_planes(rgba: np.ndarray) -> np.ndarray:
+    """The black and the coloured pixels of an RGBA frame.
+
+    The frame's pixels are gathered once, the black pixels are those of
+    `rgba_to_ink`, the coloured pixels are those whose channels differ.
+
+    Args:
+        rgba: the (height, width, 4) uint8 array of the frame, can be a view with
+            reordered rows and columns, the alpha channel is ignored.
+
+    Returns:
+        The (2, height, width) boolean array of the black pixels and of the coloured
+            pixels.
+    """
+    rgba = np.ascontiguousarray(rgba.view(np.uint32)).view(np.uint8)
+    planes = np.empty((2, *rgba.shape[:2]), dtype=bool)
+    np.less(rgba.astype(np.float32) @ LUMA_WEIGHTS, 128000, out=planes[0])
+    np.not_equal(rgba[..., 0], rgba[..., 1], out=planes[1])
+    planes[1] |= rgba[..., 1] != rgba[..., 2]
+    return planes
 
 
 class Display:
     """Display the API response on the e-Paper display.
 
+    The charts are plotted on a pool of figures, one per layout, which are cleared
+    and reused for every frame, see `_get_fig_ax`. With the "raster" backend, the
+    frames are composed from cached layers, see `raster.Compositor`.
+
     Args:
         model: epd model name.
         flip: Flip the display.
+        backend: how to render the charts, "matplotlib" to plot them with
+            `mplfinance`, "raster" to draw them straight into a 1-bit frame, see
+            `raster.plot`.
     """
 
     @classmethod
     def from_tinyticker_config(cls, tt_config: TinytickerConfig) -> "Display":
-        return cls(model=tt_config.epd_model, flip=tt_config.flip)
+        return cls(
+            model=tt_config.epd_model,
+            flip=tt_config.flip,
+            backend=tt_config.render_backend,
+        )
 
     def __init__(
         self,
         model: str = "EPD_v2",
         flip: bool = False,
+        backend: str = "matplotlib",
     ) -> None:
         if model not in MODELS:
             raise KeyError(
                 f"Model '{model}' not found. Available models: {list(MODELS.keys())}"
             )
+        if backend not in RENDER_BACKENDS:
+            raise ValueError(f"'backend' not in {RENDER_BACKENDS}")
         self._log = logging.getLogger(__name__)
         self.flip = flip
+        self.backend = backend
         self.epd = MODELS[model].class_()
         self.has_highlight = isinstance(self.epd, EPDHighlight)
+        # identifies the data on the display, set by the caller after showing it
+        self.fingerprint: Optional[Hashable] = None
+        # hash of the frame buffers on the display
+        self._frame_digest: Optional[bytes] = None
+        # the figure and axes of each layout, keyed by the axes' height ratios
+        self._figures: Dict[Tuple[int, ...], Tuple[Figure, np.ndarray]] = {}
+        self._compositor = raster.Compositor(
+            self.epd.height, self.epd.width, dpi=plt.rcParams.get("figure.dpi", 96)
+        )
         self.init_epd()
 
     def init_epd(self):
@@ -64,9 +136,26 @@ class Display:
         self._log.info("Init ePaper display.")
         self.epd.init()
         self.epd.Clear()
+        self.fingerprint = None
+        self._frame_digest = None
 
     @staticmethod
-    def fig_to_image(fig: Figure) -> Image.Image:
+    def fig_to_array(fig: Figure) -> np.ndarray:
+        """Draw a `plt.Figure` and get its pixels.
+
+        Args:
+            fig: The `plt.Figure` to draw.
+
+        Returns:
+            The (height, width, 4) RGBA array of the figure, a view of the canvas'
+                buffer, valid until the figure is drawn again.
+        """
+        mpl.use("Agg")
+        fig.canvas.draw()
+        return np.asarray(fig.canvas.buffer_rgba())  # type: ignore
+
+    @classmethod
+    def fig_to_image(cls, fig: Figure) -> Image.Image:
         """Convert a `plt.Figure` to `PIL.Image.Image`.
 
         Args:
@@ -75,19 +164,17 @@ class Display:
         Returns:
             The `PIL.Image.Image` representation of the provided `plt.Figure`.
         """
-        mpl.use("Agg")
-        fig.canvas.draw()
-        return Image.fromarray(
-            np.asarray(fig.canvas.buffer_rgba()),  # type: ignore
-            mode="RGBA",
-        ).convert("RGB")
+        return Image.fromarray(cls.fig_to_array(fig), mode="RGBA").convert("RGB")
 
     def _create_fig_ax(self, n_axes: int = 1, **kwargs) -> Tuple[Figure, np.ndarray]:
         """Create the `plt.Figure` and `plt.Axes` used to plot the chart.
 
+        The figure is not registered with `pyplot`'s figure manager, which would keep
+        it alive until closed, it is freed once it is no longer referenced.
+
         Args:
             n_axes: the number of subplot axes to create.
-            **kwargs: passed to `plt.subplots`.
+            **kwargs: passed to `Figure.subplots`.
 
         Returns:
             The `plt.Figure` and an array of `plt.Axes`.
@@ -96,19 +183,44 @@ class Display:
         px = 1 / dpi
         self._log.debug("Plot width: %s", self.epd.width)
         self._log.debug("Plot height: %s", self.epd.height)
-        fig, axes = plt.subplots(
-            n_axes,
-            1,
-            figsize=(self.epd.height * px, self.epd.width * px),
-            sharex=True,
-            **kwargs,
-        )
-        if not isinstance(axes, np.ndarray):
-            axes = np.array([axes])
+        fig = Figure(figsize=(self.epd.height * px, self.epd.width * px), dpi=dpi)
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(n_axes, 1, sharex=True, squeeze=False, **kwargs)[:, 0]
         fig.subplots_adjust(top=1, bottom=0, right=1, left=0, hspace=0, wspace=0)
         for ax in axes:
             self._strip_ax(ax)
-        return fig, axes  # type: ignore
+        return fig, axes
+
+    def _get_fig_ax(
+        self, height_ratios: Tuple[int, ...] = (1,)
+    ) -> Tuple[Figure, np.ndarray]:
+        """Get the pooled `plt.Figure` and `plt.Axes` of a layout, for a new frame.
+
+        The figure of a layout is created on first use, afterwards its axes are
+        cleared of the previous frame's artists and it is reused. This saves the
+        figure creation of every frame and the memory use stays flat.
+
+        Args:
+            height_ratios: the relative heights of the stacked axes, one per axis.
+
+        Returns:
+            The `plt.Figure` and an array of `plt.Axes`.
+        """
+        if height_ratios not in self._figures:
+            self._figures[height_ratios] = self._create_fig_ax(
+                n_axes=len(height_ratios),
+                gridspec_kw={"height_ratios": list(height_ratios)},
+            )
+            return self._figures[height_ratios]
+        fig, axes = self._figures[height_ratios]
+        for ax in axes:
+            ax.clear()
+            # `clear` keeps the data limits, which would autoscale the next frame
+            ax.dataLim.set(Bbox.null())
+            self._strip_ax(ax)
+        # undo the previous frame's tight layout
+        fig.subplots_adjust(top=1, bottom=0, right=1, left=0, hspace=0, wspace=0)
+        return fig, axes
 
     def _strip_ax(self, ax: Axes) -> None:
         """Strip all visuals from `plt.Axes` object."""
@@ -125,9 +237,10 @@ class Display:
             **kwargs: Passed to `ax.text`.
 
         Returns:
-            The `plt.Figure` and `plt.Axes` with the text.
+            The `plt.Figure` and `plt.Axes` with the text, they are reused by the
+                next `plot` or `text` call.
         """
-        fig, ax = self._create_fig_ax(n_axes=1)
+        fig, ax = self._get_fig_ax()
         ax = ax[0]
         ax.text(0, 0, text, ha="center", va="center", wrap=True, **kwargs)
         if show:
@@ -135,61 +248,109 @@ class Display:
         return fig, ax
 
     def show_fig(self, fig: Figure) -> None:
-        """Show a `plt.Figure` on the display."""
-        image = self.fig_to_image(fig)
-        self.show_image(image)
+        """Show a `plt.Figure` on the display.
+
+        The panel's buffers are packed straight from a view of the canvas' buffer,
+        without the `PIL.Image.Image` conversions.
+        """
+        self._show_rgba(self.fig_to_array(fig))
+
+    def _show_rgba(self, rgba: np.ndarray) -> None:
+        """Show an RGBA frame, with its coloured pixels highlighted if possible."""
+        if self.flip:
+            rgba = rgba[::-1, ::-1]
+        rgba = self.epd.orient(rgba)
+        # the caller sets the fingerprint of the new data
+        self.fingerprint = None
+        if isinstance(self.epd, EPDHighlight):
+            self._show_buffers(*self.epd.pack_planes(rgba_to_planes(rgba)))
+        else:
+            self._show_buffers(self.epd.pack(rgba_to_ink(rgba)))
+
+    def show_ink(self, ink: np.ndarray, highlight: Optional[np.ndarray] = None) -> None:
+        """Show the black pixels of a frame on the display.
 
-    def _show_image(
-        self, image: Image.Image, highlight: Optional[Image.Image] = None
+        Args:
+            ink: boolean array of the frame's black pixels, (height, width).
+            highlight: boolean array of the frame's highlighted pixels, shown if the
+                display has an extra color.
+        """
+        if self.flip:
+            ink = ink[::-1, ::-1]
+            highlight = highlight[::-1, ::-1] if highlight is not None else None
+        # the caller sets the fingerprint of the new data
+        self.fingerprint = None
+        if highlight is not None and isinstance(self.epd, EPDHighlight):
+            planes = np.stack([self.epd.orient(ink), self.epd.orient(highlight)])
+            self._show_buffers(*self.epd.pack_planes(planes))
+        else:
+            self._show_buffers(self.epd.pack(self.epd.orient(ink)))
+
+    def _show_buffers(
+        self, buffer: bytearray, highlight_buffer: Optional[bytearray] = None
     ) -> None:
-        """Small wrapper to handle the capabalities of the display."""
+        """Send the buffers to the display.
+
+        The frame isn't sent if it is the frame already on the display, this saves a
+        full refresh of the panel.
+        """
+        digest = hashlib.blake2b(bytes(buffer), digest_size=16)
+        if highlight_buffer is not None:
+            digest.update(bytes(highlight_buffer))
+        if digest.digest() == self._frame_digest:
+            self._log.info("Frame unchanged, not refreshing the display.")
+            return
+        self._log.info("Wake up.")
+        # I think this wakes it from sleep
+        self.epd.init()
         if isinstance(self.epd, EPDHighlight):
-            self.epd.display(
-                self.epd.getbuffer(image),
-                self.epd.getbuffer(highlight) if highlight is not None else None,
-            )
+            self.epd.display(buffer, highlight_buffer)
         else:
-            self.epd.display(self.epd.getbuffer(image))
+            self.epd.display(buffer)
+        self._frame_digest = digest.digest()
+        self._log.info("Display sleep.")
+        self.epd.sleep()
 
     def show_image(self, image: Image.Image) -> None:
         """Show a `PIL.Image.Image` on the display.
 
+        On the displays with an extra color, the coloured pixels of an "RGB" image
+        are highlighted.
+
         Args:
             image: The image to display.
         """
-        highlight_image = None
+        self._log.debug("Image size: %s", image.size)
         if self.has_highlight and image.mode == "RGB":
-            self._log.info("Computing highlight pixels.")
-            # create an image with the pixels which are coloured
-            image_ar = np.array(image)
-            colored_pixels = ~(image_ar == image_ar[:, :, 0][:, :, None]).all(axis=-1)
-            highlight_image = np.ones(image_ar.shape[:-1], dtype=image_ar.dtype) * 255
-            self._log.debug("Number of coloured pixels: %s", colored_pixels.sum())
-            highlight_image[colored_pixels] = 0
-            # I think there is a bug with PIL, need to convert from "L"
-            # https://stackoverflow.com/questions/32159076/python-pil-bitmap-png-from-array-with-mode-1
-            highlight_image = Image.fromarray(highlight_image, mode="L").convert(
-                "1", dither=Image.Dither.NONE
-            )
-            if self.flip:
-                highlight_image = highlight_image.rotate(180)
-            self._log.debug("Highlight image size: %s", highlight_image.size)
-
+            self._show_rgba(np.asarray(image.convert("RGBA")))
+            return
         if image.mode != "1":
             image = image.convert("1", dither=Image.Dither.NONE)
-        if self.flip:
-            image = image.rotate(180)
-        self._log.debug("Image size: %s", image.size)
-        self._log.info("Wake up.")
-        # I think this wakes it from sleep
-        self.epd.init()
-        self._show_image(image, highlight_image)
-        self._log.info("Display sleep.")
-        self.epd.sleep()
+        self.show_ink(~np.asarray(image))
+
+    @staticmethod
+    def _top_string(
+        last_close: float,
+        current_price: Optional[float],
+        delta: Optional[float],
+        top_string: Optional[str],
+    ) -> str:
+        """The top left string, with the current price and its relative change."""
+        # Fall back to using the last closing price
+        if current_price is None:
+            current_price = last_close
+        if top_string is not None:
+            top_string += f" {current_price:.2f}"
+        else:
+            top_string = str(current_price)
+
+        if delta is not None:
+            top_string += f" {delta:+.2f}%"
+        return top_string
 
     def plot(
         self,
-        historical: pd.DataFrame,
+        historical: Union[Candles, pd.DataFrame],
         current_price: Optional[float],
         delta: Optional[float] = None,
         top_string: Optional[str] = None,
@@ -198,12 +359,12 @@ class Display:
         type: str = "candle",
         volume: bool = False,
         **kwargs,
-    ) -> Tuple[Figure, Axes]:
+    ) -> Union[Tuple[Figure, Axes], Image.Image]:
         """Plot symbol historical data chart.
 
         Args:
-            historical: API response, `pd.DataFrame` containing the historical
-                price of the symbol.
+            historical: API response, `Candles` or `pd.DataFrame` containing the
+                historical price of the symbol.
             current_price: API response, the current price of the symbol.
             delta: relative percentage change.
             top_string: Contents of the top left string, the `current_price` will be
@@ -212,22 +373,44 @@ class Display:
             show: display the plot on the ePaper display.
             type: the chart type, see `mplfinance.plot`.
             volume: also plot the trade volume data.
-            **kwargs: passed to `mplfinance.plot`.
+            **kwargs: passed to `mplfinance.plot`, or to `raster.Compositor.compose`.
 
         Returns:
-            The `plt.Figure` and `plt.Axes` of the plot.
+            The `plt.Figure` and `plt.Axes` of the plot, they are reused by the next
+                `plot` or `text` call, or the `PIL.Image.Image` of the frame with the
+                "raster" backend.
         """
-        if volume:
-            fig, axes = self._create_fig_ax(
-                n_axes=2, gridspec_kw={"height_ratios": [3, 1]}
+        # remove Nones, it doesn't play well with mplfinance
+        kwargs = {key: value for key, value in kwargs.items() if value is not None}
+        if self.backend == "raster":
+            candles = (
+                historical
+                if isinstance(historical, Candles)
+                else Candles.from_dataframe(historical)
             )
+            frame = self._compositor.compose(
+                candles,
+                self._top_string(candles.close[-1], current_price, delta, top_string),
+                sub_string=sub_string,
+                type=type,
+                volume=volume,
+                highlight=self.has_highlight,
+                **kwargs,
+            )
+            if show:
+                # the highlighted pixels are also black, as the red of the image
+                self.show_ink(frame.frame | frame.highlight, frame.highlight)
+            return frame.to_image()
+        if isinstance(historical, Candles):
+            # mplfinance needs a DataFrame
+            historical = historical.to_dataframe()
+        if volume:
+            fig, axes = self._get_fig_ax(height_ratios=(3, 1))
             volume_ax = axes[1]
         else:
-            fig, axes = self._create_fig_ax(n_axes=1)
+            fig, axes = self._get_fig_ax()
             volume_ax = False
         ax: Axes = axes[0]
-        # remove Nones, it doesn't play well with mplfinance
-        kwargs = {key: value for key, value in kwargs.items() if value is not None}
         mpf.plot(
             historical,
             type=type,
@@ -238,20 +421,12 @@ class Display:
             linecolor="k",
             **kwargs,
         )
-        # Fall back to using the last closing price
-        if current_price is None:
-            current_price = historical.iloc[-1]["Close"]
-        if top_string is not None:
-            top_string += f" {current_price:.2f}"
-        else:
-            top_string = str(current_price)
-
-        if delta is not None:
-            top_string += f" {delta:+.2f}%"
         ax.text(
             0,
             1,
-            top_string,
+            self._top_string(
+                historical.iloc[-1]["Close"], current_price, delta, top_string
+            ),
             transform=ax.transAxes,
             fontsize=10,
             weight="bold",
@@ -8,6 +8,8 @@ HOME_DIR = Path(os.path.expanduser(f"~{USER}"))
 CONFIG_DIR = HOME_DIR / ".config" / "tinyticker"
 CONFIG_FILE = CONFIG_DIR / "config.json"
 
+CACHE_DIR = HOME_DIR / ".cache" / "tinyticker"
+
 TMP_DIR = Path("/tmp/tinyticker/")
 LOG_DIR = Path("/var/log")
 PID_FILE = TMP_DIR / "tinyticker_pid"
@@ -0,0 +1,701 @@
+"""Access to the data providers' APIs.
+
+All the requests to a provider go through its `CircuitBreaker`, its `RateLimiter` and
+its pooled HTTP session, which are shared by all the `Ticker` instances of the process.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from functools import partial
+from typing import Callable, Deque, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import requests
+import yfinance
+from requests.adapters import HTTPAdapter
+
+from .clock import get_clock
+from .config import DEFAULT_RATE_LIMITS, RateLimitConfig
+
+LOGGER = logging.getLogger(__name__)
+
+PROVIDERS = ["cryptocompare", "yfinance"]
+
+CRYPTOCOMPARE_URL = "https://min-api.cryptocompare.com/data/"
+# used when no api key is provided, same as the `cryptocompare` package
+CRYPTOCOMPARE_API_KEY_ENV = "CRYPTOCOMPARE_API_KEY"
+REQUEST_TIMEOUT = 10
+# how many of the last request latencies the percentiles are computed on
+LATENCY_WINDOW = 500
+# yfinance downloads the symbols of a batch in parallel
+POOL_MAXSIZE = 10
+# substrings of the error messages of throttled requests
+THROTTLED_MESSAGES = ["rate limit", "too many requests", "429"]
+# substrings of the error messages of failed connections
+NETWORK_ERROR_MESSAGES = [
+    "connection",
+    "timed out",
+    "timeout",
+    "max retries",
+    "name resolution",
+]
+# any response from these means the provider is reachable
+PROBE_URLS = {
+    "cryptocompare": CRYPTOCOMPARE_URL + "pricemulti?fsyms=BTC&tsyms=USD",
+    "yfinance": "https://query1.finance.yahoo.com/",
+}
+
+
+class RateLimitError(Exception):
+    """The provider throttled the request."""
+
+
+class CircuitOpenError(Exception):
+    """The provider is unreachable, the request wasn't made."""
+
+
+class TokenBucket:
+    """Token bucket enforcing a request quota over a time window.
+
+    The bucket holds up to `burst` tokens and refills continuously, so that no more
+    than `limit` requests are made in any `window`.
+
+    Args:
+        limit: the maximum number of requests per window.
+        window: the window duration, in seconds.
+        burst: the bucket's capacity, how many requests can be made at once.
+    """
+
+    def __init__(self, limit: int, window: float, burst: Optional[int] = None) -> None:
+        self.limit = limit
+        self.window = window
+        self.burst = max(1, limit // 10) if burst is None else min(burst, limit)
+        self.rate = max(limit - self.burst, 1) / window
+        self.tokens = float(self.burst)
+        self._last: Optional[float] = None
+
+    def refill(self, now: float, factor: float = 1) -> None:
+        """Add the tokens accumulated since the last refill.
+
+        Args:
+            now: the current time, in seconds.
+            factor: multiplies the refill rate.
+        """
+        if self._last is not None:
+            self.tokens = min(
+                self.burst, self.tokens + (now - self._last) * self.rate * factor
+            )
+        self._last = now
+
+    def wait_time(self, factor: float = 1, n: int = 1) -> float:
+        """How long until `n` tokens are available, in seconds.
+
+        At most `burst` tokens are waited for, larger requests leave the bucket in
+        debt, which the next requests wait out.
+        """
+        return max(0, (min(n, self.burst) - self.tokens) / (self.rate * factor))
+
+
+class RateLimiter:
+    """Rate limiter of a provider's requests.
+
+    Requests take a token from a per minute and a per hour `TokenBucket`, waiting if
+    needed. When the provider reports throttling, the refill rate is halved and it
+    recovers additively with each successful request, which keeps the request rate
+    close to the actual limit. Throttling also blocks the requests for an
+    exponentially growing delay until a request succeeds, so that providers without
+    configured quotas are backed off from as well.
+
+    Args:
+        name: the provider's name.
+        config: the provider's quotas.
+        min_factor: lowest fraction of the configured rate to back off to.
+        backoff: the initial delay after throttling, in seconds.
+        max_backoff: the maximum delay after throttling, in seconds.
+        clock: returns the current time in seconds, defaults to the process wide
+            clock's `monotonic`.
+        sleep: sleeps for the given number of seconds, defaults to the process wide
+            clock's `sleep`.
+        stats: returns extra statistics to log along with the quota usage.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        config: RateLimitConfig,
+        min_factor: float = 1 / 32,
+        backoff: float = 5,
+        max_backoff: float = 300,
+        clock: Optional[Callable[[], float]] = None,
+        sleep: Optional[Callable[[float], None]] = None,
+        stats: Optional[Callable[[], Dict[str, float]]] = None,
+    ) -> None:
+        self.name = name
+        self.config = config
+        self.buckets: Dict[str, TokenBucket] = {}
+        if config.per_minute is not None:
+            self.buckets["minute"] = TokenBucket(config.per_minute, 60, config.burst)
+        if config.per_hour is not None:
+            self.buckets["hour"] = TokenBucket(config.per_hour, 3600, config.burst)
+        self.min_factor = min_factor
+        self.factor = 1.0
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._backoff_delay = backoff
+        self._blocked_until: Optional[float] = None
+        self._clock = clock
+        self._sleep = sleep
+        self._stats = stats
+        self._lock = threading.Lock()
+        self._requests: Deque[float] = deque()
+        self._last_report: Optional[float] = None
+
+    def acquire(self, n: int = 1) -> float:
+        """Wait until requests can be made.
+
+        Args:
+            n: the number of requests, e.g. one per symbol of a batch download.
+
+        Returns:
+            The time waited, in seconds.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._now()
+                for bucket in self.buckets.values():
+                    bucket.refill(now, self.factor)
+                if self._blocked_until is not None and now < self._blocked_until:
+                    wait_time = self._blocked_until - now
+                else:
+                    wait_time = max(
+                        [
+                            bucket.wait_time(self.factor, n)
+                            for bucket in self.buckets.values()
+                        ],
+                        default=0,
+                    )
+                # allow for floating point errors in the refills
+                if wait_time < 1e-6:
+                    for bucket in self.buckets.values():
+                        bucket.tokens -= n
+                    self._record(now, n)
+                    return waited
+            LOGGER.debug("%s rate limited, waiting %.2fs", self.name, wait_time)
+            self._wait(wait_time)
+            waited += wait_time
+
+    def throttled(self) -> None:
+        """The provider throttled a request, back off."""
+        with self._lock:
+            self.factor = max(self.min_factor, self.factor / 2)
+            for bucket in self.buckets.values():
+                bucket.tokens = min(bucket.tokens, 0)
+            delay = self._backoff_delay
+            self._blocked_until = self._now() + delay
+            self._backoff_delay = min(self.max_backoff, 2 * delay)
+        LOGGER.warning(
+            "%s throttled, rate factor: %.3f, backing off %.0fs",
+            self.name,
+            self.factor,
+            delay,
+        )
+
+    def succeeded(self) -> None:
+        """A request went through, recover from previous backoffs."""
+        with self._lock:
+            self.factor = min(1.0, self.factor + 1 / 16)
+            self._blocked_until = None
+            self._backoff_delay = self.backoff
+
+    def usage(self) -> Dict[str, int]:
+        """The number of requests made in the last minute and in the last hour."""
+        with self._lock:
+            now = self._now()
+            self._prune(now)
+            return {
+                "minute": sum(1 for request in self._requests if now - request < 60),
+                "hour": len(self._requests),
+            }
+
+    def _now(self) -> float:
+        return get_clock().monotonic() if self._clock is None else self._clock()
+
+    def _wait(self, seconds: float) -> None:
+        if self._sleep is None:
+            get_clock().sleep(seconds)
+        else:
+            self._sleep(seconds)
+
+    def _prune(self, now: float) -> None:
+        while self._requests and now - self._requests[0] >= 3600:
+            self._requests.popleft()
+
+    def _record(self, now: float, n: int = 1) -> None:
+        self._requests.extend([now] * n)
+        self._prune(now)
+        if self._last_report is None or now - self._last_report >= 60:
+            self._last_report = now
+            per_minute = sum(1 for request in self._requests if now - request < 60)
+            LOGGER.info(
+                "%s quota usage: %s/%s per minute, %s/%s per hour, rate factor: %.3f",
+                self.name,
+                per_minute,
+                self.config.per_minute,
+                len(self._requests),
+                self.config.per_hour,
+                self.factor,
+            )
+            if self._stats is not None:
+                LOGGER.info("%s %s", self.name, self._stats())
+
+
+RATE_LIMITERS: Dict[str, RateLimiter] = {}
+
+
+def configure_rate_limits(rate_limits: Dict[str, RateLimitConfig]) -> None:
+    """Set the providers' quotas.
+
+    Args:
+        rate_limits: the `RateLimitConfig` of each provider.
+    """
+    for provider, config in rate_limits.items():
+        if provider not in PROVIDERS:
+            LOGGER.warning("Unknown provider: %s", provider)
+            continue
+        RATE_LIMITERS[provider] = RateLimiter(
+            provider, config, stats=partial(provider_stats, provider)
+        )
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """Get the `RateLimiter` of a provider.
+
+    Args:
+        provider: the provider's name, one of `PROVIDERS`.
+
+    Returns:
+        The provider's `RateLimiter`.
+    """
+    if provider not in RATE_LIMITERS:
+        RATE_LIMITERS[provider] = RateLimiter(
+            provider,
+            DEFAULT_RATE_LIMITS.get(provider, RateLimitConfig()),
+            stats=partial(provider_stats, provider),
+        )
+    return RATE_LIMITERS[provider]
+
+
+class CircuitBreaker:
+    """Stops the requests to an unreachable provider.
+
+    After `failure_threshold` consecutive failures the circuit opens: requests fail
+    right away, without hitting the network. A background thread then probes the
+    provider, with an exponential backoff, and closes the circuit once it responds.
+
+    Args:
+        name: the provider's name.
+        probe: makes a cheap request to the provider, raises if it is unreachable.
+        failure_threshold: the number of consecutive failures which opens the circuit.
+        reset_timeout: the time to wait before the first probe, in seconds.
+        max_reset_timeout: the maximum time in between probes, in seconds.
+        sleep: sleeps for the given number of seconds, defaults to the process wide
+            clock's `sleep`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        probe: Callable[[], None],
+        failure_threshold: int = 3,
+        reset_timeout: float = 30,
+        max_reset_timeout: float = 600,
+        sleep: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.failures = 0
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._open = threading.Event()
+        self._prober: Optional[threading.Thread] = None
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the requests to the provider are stopped."""
+        return self._open.is_set()
+
+    def check(self) -> None:
+        """Raise if the circuit is open.
+
+        Raises:
+            CircuitOpenError: if the circuit is open.
+        """
+        if self.is_open:
+            raise CircuitOpenError(f"{self.name} unreachable, circuit open.")
+
+    def record_success(self) -> None:
+        """A request reached the provider."""
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        """A request couldn't reach the provider."""
+        with self._lock:
+            self.failures += 1
+            if self.failures < self.failure_threshold or self.is_open:
+                return
+            LOGGER.warning(
+                "%s failed %s times, opening the circuit.", self.name, self.failures
+            )
+            self._open.set()
+            self._prober = threading.Thread(
+                target=self._probe_until_closed,
+                name=f"{self.name}-probe",
+                daemon=True,
+            )
+            self._prober.start()
+
+    def _probe_until_closed(self) -> None:
+        reset_timeout = self.reset_timeout
+        while True:
+            if self._sleep is None:
+                get_clock().sleep(reset_timeout)
+            else:
+                self._sleep(reset_timeout)
+            try:
+                self.probe()
+            except Exception as exc:
+                LOGGER.info("%s probe failed: %s", self.name, exc)
+                reset_timeout = min(2 * reset_timeout, self.max_reset_timeout)
+                continue
+            LOGGER.info("%s reachable, closing the circuit.", self.name)
+            with self._lock:
+                self.failures = 0
+                self._open.clear()
+            return
+
+
+def _probe(provider: str) -> None:
+    response = get_session(provider).get(PROBE_URLS[provider], timeout=REQUEST_TIMEOUT)
+    if response.status_code >= 500:
+        raise ConnectionError(f"{provider} probe: {response.status_code}")
+
+
+CIRCUIT_BREAKERS: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """Get the `CircuitBreaker` of a provider.
+
+    Args:
+        provider: the provider's name, one of `PROVIDERS`.
+
+    Returns:
+        The provider's `CircuitBreaker`.
+    """
+    if provider not in CIRCUIT_BREAKERS:
+        CIRCUIT_BREAKERS[provider] = CircuitBreaker(provider, partial(_probe, provider))
+    return CIRCUIT_BREAKERS[provider]
+
+
+SESSIONS: Dict[str, requests.Session] = {}
+
+
+def get_session(provider: str) -> requests.Session:
+    """Get the HTTP session of a provider.
+
+    The session keeps its connections alive, so the TCP and TLS handshakes are only
+    done once and not on every request.
+
+    Args:
+        provider: the provider's name, one of `PROVIDERS`.
+
+    Returns:
+        The provider's `requests.Session`.
+    """
+    if provider not in SESSIONS:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=POOL_MAXSIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        SESSIONS[provider] = session
+    return SESSIONS[provider]
+
+
+def connection_stats(provider: str) -> Dict[str, int]:
+    """Connection reuse statistics of a provider's HTTP session.
+
+    Args:
+        provider: the provider's name, one of `PROVIDERS`.
+
+    Returns:
+        The number of requests made, of connections opened and of requests which
+            reused an open connection.
+    """
+    n_requests = 0
+    n_connections = 0
+    session = SESSIONS.get(provider, None)
+    if session is not None:
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools  # type: ignore
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    n_requests += pool.num_requests
+                    n_connections += pool.num_connections
+    return {
+        "requests": n_requests,
+        "connections": n_connections,
+        "reused": n_requests - n_connections,
+    }
+
+
+class LatencyStats:
+    """Latencies of a provider's last requests.
+
+    Args:
+        window: how many of the last latencies to keep.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._latencies)
+
+    def record(self, latency: float) -> None:
+        """Record the latency of a request, in seconds."""
+        with self._lock:
+            self._latencies.append(latency)
+
+    def percentiles(
+        self, percentiles: Sequence[float] = (50, 90, 99)
+    ) -> Dict[str, float]:
+        """The latency percentiles, in seconds.
+
+        Args:
+            percentiles: the percentiles to compute.
+
+        Returns:
+            The percentiles, keyed "p50", "p90", ..., empty if no latencies were
+                recorded.
+        """
+        with self._lock:
+            latencies = np.array(self._latencies)
+        if len(latencies) == 0:
+            return {}
+        return {
+            f"p{percentile:g}": float(value)
+            for percentile, value in zip(
+                percentiles, np.percentile(latencies, percentiles)
+            )
+        }
+
+
+LATENCIES: Dict[str, LatencyStats] = {}
+
+
+def get_latency_stats(provider: str) -> LatencyStats:
+    """Get the `LatencyStats` of a provider.
+
+    Args:
+        provider: the provider's name, one of `PROVIDERS`.
+
+    Returns:
+        The provider's `LatencyStats`.
+    """
+    if provider not in LATENCIES:
+        LATENCIES[provider] = LatencyStats()
+    return LATENCIES[provider]
+
+
+def provider_stats(provider: str) -> Dict[str, float]:
+    """The connection statistics and the latency percentiles of a provider.
+
+    Args:
+        provider: the provider's name, one of `PROVIDERS`.
+
+    Returns:
+        The `connection_stats` and the latency percentiles, in milliseconds.
+    """
+    stats: Dict[str, float] = dict(connection_stats(provider))
+    for name, latency in get_latency_stats(provider).percentiles().items():
+        stats[f"latency_{name}_ms"] = round(1e3 * latency, 1)
+    return stats
+
+
+def is_throttled_message(message: str) -> bool:
+    """Whether an error message reports throttling."""
+    message = message.lower()
+    return any(throttled in message for throttled in THROTTLED_MESSAGES)
+
+
+def is_network_error_message(message: str) -> bool:
+    """Whether an error message reports a failed connection."""
+    message = message.lower()
+    return any(error in message for error in NETWORK_ERROR_MESSAGES)
+
+
+def cryptocompare_get(
+    endpoint: str, params: Dict[str, str], api_key: Optional[str] = None
+) -> dict:
+    """Query the CryptoCompare API.
+
+    Args:
+        endpoint: the endpoint, relative to `CRYPTOCOMPARE_URL`.
+        params: the query parameters.
+        api_key: CryptoCompare API key.
+
+    Returns:
+        The decoded response.
+
+    Raises:
+        CircuitOpenError: if the API is unreachable.
+        RateLimitError: if the request was throttled.
+        ValueError: if the API returned an error.
+    """
+    breaker = get_circuit_breaker("cryptocompare")
+    breaker.check()
+    limiter = get_rate_limiter("cryptocompare")
+    limiter.acquire()
+    if api_key is None:
+        api_key = os.environ.get(CRYPTOCOMPARE_API_KEY_ENV, None)
+    headers = {"authorization": f"Apikey {api_key}"} if api_key else {}
+    start = time.monotonic()
+    try:
+        response = get_session("cryptocompare").get(
+            CRYPTOCOMPARE_URL + endpoint,
+            params=params,
+            headers=headers,
+            timeout=REQUEST_TIMEOUT,
+        )
+    except (requests.ConnectionError, requests.Timeout):
+        breaker.record_failure()
+        raise
+    finally:
+        get_latency_stats("cryptocompare").record(time.monotonic() - start)
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    if response.status_code == 429:
+        limiter.throttled()
+        raise RateLimitError(f"cryptocompare: {response.reason}")
+    response.raise_for_status()
+    data = response.json()
+    if data.get("Response") == "Error":
+        message = data.get("Message", "")
+        if is_throttled_message(message):
+            limiter.throttled()
+            raise RateLimitError(f"cryptocompare: {message}")
+        raise ValueError(f"cryptocompare: {message}")
+    limiter.succeeded()
+    return data
+
+
+def cryptocompare_historical(
+    token: str,
+    currency: str,
+    interval: str,
+    limit: int,
+    to_ts: Optional[float] = None,
+    api_key: Optional[str] = None,
+) -> List[dict]:
+    """Get historical candles from CryptoCompare.
+
+    Args:
+        token: token identifier, "BTC", "ETH", ...
+        currency: the currency of the prices.
+        interval: "minute", "hour" or "day".
+        limit: the number of candles.
+        to_ts: the unix timestamp of the last candle, defaults to now.
+        api_key: CryptoCompare API key.
+
+    Returns:
+        The candles, oldest first.
+    """
+    params = {"fsym": token, "tsym": currency, "limit": str(limit)}
+    if to_ts is not None:
+        params["toTs"] = str(int(to_ts))
+    data = cryptocompare_get(f"v2/histo{interval}", params, api_key=api_key)
+    return data["Data"]["Data"]
+
+
+def cryptocompare_price(
+    tokens: List[str], currency: str, api_key: Optional[str] = None
+) -> Dict[str, Dict[str, float]]:
+    """Get the current prices of multiple tokens from CryptoCompare.
+
+    Args:
+        tokens: token identifiers, "BTC", "ETH", ...
+        currency: the currency of the prices.
+        api_key: CryptoCompare API key.
+
+    Returns:
+        The prices, keyed by token and currency.
+    """
+    return cryptocompare_get(
+        "pricemulti",
+        {"fsyms": ",".join(tokens), "tsyms": currency},
+        api_key=api_key,
+    )
+
+
+# `yfinance.download` keeps its results and errors in module globals, reset by every
+# call, the downloads are serialized
+YFINANCE_LOCK = threading.Lock()
+
+
+def yfinance_download(symbols, **kwargs) -> pd.DataFrame:
+    """Rate limited `yfinance.download`.
+
+    The downloads are serialized, concurrent `yfinance.download` calls would mix or
+    drop each other's data and errors.
+
+    Args:
+        symbols: the stock symbols.
+        **kwargs: passed to `yfinance.download`.
+
+    Returns:
+        The downloaded data.
+
+    Raises:
+        CircuitOpenError: if the API is unreachable.
+    """
+    breaker = get_circuit_breaker("yfinance")
+    breaker.check()
+    limiter = get_rate_limiter("yfinance")
+    # yfinance makes a request per symbol
+    limiter.acquire(1 if isinstance(symbols, str) else len(symbols))
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+    with YFINANCE_LOCK:
+        start = time.monotonic()
+        try:
+            data: pd.DataFrame = yfinance.download(
+                symbols, session=get_session("yfinance"), **kwargs
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            breaker.record_failure()
+            raise
+        finally:
+            get_latency_stats("yfinance").record(time.monotonic() - start)
+        # yfinance doesn't raise, the errors are kept in its shared state
+        errors = [str(error) for error in yfinance.shared._ERRORS.values()]
+    if data.empty and errors and all(map(is_network_error_message, errors)):
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    if any(is_throttled_message(error) for error in errors):
+        limiter.throttled()
+    else:
+        limiter.succeeded()
+    return data
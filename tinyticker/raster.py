@@ -0,0 +1,563 @@
+"""Draw the charts straight into a 1-bit frame at the panel's resolution.
+
+A purpose-built alternative to the `mplfinance` charts of `Display.plot`: no figure,
+no layout pass and no antialiased RGBA canvas, the candles, bars, lines and volume
+bars are filled into a boolean numpy frame, the text is drawn with PIL. The geometry
+follows `mplfinance`'s, its axes limits and its candle and line widths, so both
+backends draw the same charts.
+
+The `Compositor` builds the frames from layers, the chart and the text labels, and
+only redraws the layers which changed.
+"""
+
+import functools
+import math
+from pathlib import Path
+from typing import Optional, Sequence, Tuple, Union
+
+import matplotlib as mpl
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .candles import Candles
+
+FONT_FILE = Path(mpl.get_data_path()) / "fonts" / "ttf" / "DejaVuSans-Bold.ttf"
+# the font sizes of the top and sub strings, in points
+TOP_FONTSIZE = 10
+SUB_FONTSIZE = 8
+# the height of the sub string's baseline, as a fraction of the price axes
+SUB_Y = 0.88
+# the height of the price axes, as a fraction of the chart, when showing the volume
+PRICE_HEIGHT_RATIO = 0.75
+
+# `mplfinance`'s widths, interpolated on the number of candles, the candle, ohlc tick
+# and volume bar widths are in candles, the line widths in points
+WIDTHS_NUMPOINTS = np.arange(30, 241, 30)
+CANDLE_WIDTHS = np.array([0.65, 0.575, 0.50, 0.445, 0.435, 0.425, 0.420, 0.415])
+CANDLE_LINEWIDTHS = np.array([1.00, 0.875, 0.75, 0.625, 0.500, 0.438, 0.435, 0.435])
+VOLUME_WIDTHS = np.array([0.98, 0.96, 0.95, 0.925, 0.9, 0.9, 0.875, 0.825])
+OHLC_LINEWIDTHS = np.array([1.50, 1.175, 0.85, 0.525, 0.525, 0.525, 0.525, 0.525])
+OHLC_TICKSIZE = 0.35
+VOLUME_LINEWIDTH = 0.65
+LINE_WIDTH = 1.0
+
+
+@functools.lru_cache(maxsize=None)
+def _font(size: float) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(str(FONT_FILE), size=size)
+
+
+@functools.lru_cache(maxsize=None)
+def _glyph(char: str, size: float) -> Tuple[int, int, np.ndarray]:
+    """The antialiased bitmap of a character, and its offset from the pen position."""
+    font = _font(size)
+    left, top, right, bottom = font.getbbox(char, anchor="ls")
+    bitmap = Image.new("L", (max(right - left, 0), max(bottom - top, 0)))
+    ImageDraw.Draw(bitmap).text((-left, -top), char, fill=255, font=font, anchor="ls")
+    return left, top, np.asarray(bitmap).astype(np.uint16)
+
+
+@functools.lru_cache(maxsize=4096)
+def _advance(pair: str, size: float) -> float:
+    """The advance of the first character of a pair, kerning included."""
+    font = _font(size)
+    return font.getlength(pair) - font.getlength(pair[1:])
+
+
+class Label:
+    """A text in a white box, drawn once and pasted into the frames.
+
+    The text is assembled from the cached glyphs, placed and composited as PIL places
+    and composites them when drawing the text, so only the new characters are drawn.
+
+    Args:
+        x: the left of the text, in pixels.
+        y: the baseline of the text, in pixels.
+        text: the text.
+        size: the font size, in pixels.
+    """
+
+    __slots__ = ("box_cols", "box_rows", "row", "col", "glyphs")
+
+    def __init__(self, x: float, y: float, text: str, size: float) -> None:
+        # PIL rounds the pen positions, in 64ths of a pixel, to whole pixels, the
+        # columns from the truncated and the rows from the floored position
+        x_start = int(math.modf(x)[0] * 64)
+        y_floor = math.floor(y)
+        baseline = y_floor - ((32 - int((y - y_floor) * 64)) >> 6)
+        pen = 0.0
+        placements = []
+        for i, char in enumerate(text):
+            left, top, bitmap = _glyph(char, size)
+            col = int(x) + ((x_start + int(round(pen * 64)) + 32) >> 6) + left
+            placements.append((baseline + top, col, bitmap))
+            pen += _advance(text[i : i + 2], size)
+        # the box spans the font's ascent and descent, as matplotlib's does, it is
+        # snapped as `Raster.rect` snaps it
+        _, ascent, _, descent = _font(size).getbbox("lp", anchor="ls")
+        self.box_cols = Raster._stroke(x, 1)[0], Raster._stroke(x + pen, 1)[1]
+        self.box_rows = (
+            Raster._stroke(y + ascent, 1)[0],
+            Raster._stroke(y + descent, 1)[1],
+        )
+        self.row = min((row for row, _, _ in placements), default=0)
+        self.col = min((col for _, col, _ in placements), default=0)
+        bottom = max(
+            (row + bitmap.shape[0] for row, _, bitmap in placements), default=0
+        )
+        right = max((col + bitmap.shape[1] for _, col, bitmap in placements), default=0)
+        canvas = np.zeros((bottom - self.row, right - self.col), dtype=np.uint16)
+        for row, col, bitmap in placements:
+            region = canvas[
+                row - self.row : row - self.row + bitmap.shape[0],
+                col - self.col : col - self.col + bitmap.shape[1],
+            ]
+            # composited over the previous glyphs, with PIL's rounding
+            blend = region * (255 - bitmap) + 128
+            region[...] = bitmap + ((blend + (blend >> 8)) >> 8)
+        # antialiased then thresholded, as the matplotlib frames are
+        self.glyphs = canvas >= 128
+
+
+@functools.lru_cache(maxsize=256)
+def _label(x: float, y: float, text: str, size: float) -> Label:
+    return Label(x, y, text, size)
+
+
+class Raster:
+    """A 1-bit frame and the primitives to draw the charts in it.
+
+    The coordinates are in pixels, floats, with the origin at the top left corner of
+    the frame. The rectangles and segments are snapped to the pixels as matplotlib
+    snaps them, the polylines ink every pixel they cross, the shapes are at least a
+    pixel wide.
+
+    Args:
+        width: the width of the frame, in pixels.
+        height: the height of the frame, in pixels.
+        dpi: the resolution, to convert the sizes in points to pixels.
+    """
+
+    def __init__(self, width: int, height: int, dpi: float = 100) -> None:
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        # True for the black pixels
+        self.frame = np.zeros((height, width), dtype=bool)
+        # True for the highlighted pixels, drawn over the black ones
+        self.highlight = np.zeros((height, width), dtype=bool)
+
+    def points(self, size: float) -> float:
+        """Convert a size in points to pixels."""
+        return size * self.dpi / 72
+
+    @staticmethod
+    def _stroke(position: float, stroke: int) -> Tuple[int, int]:
+        """The first and last pixels of a stroke, snapped as matplotlib snaps them.
+
+        The odd strokes are centered on the pixel nearest to the position, the even
+        strokes on the pixel edge nearest to it.
+        """
+        snapped = int(np.floor(position + 0.5))
+        if stroke % 2:
+            return snapped - stroke // 2, snapped + stroke // 2
+        return snapped - stroke // 2, snapped + stroke // 2 - 1
+
+    def _set(
+        self, cols: Tuple[int, int], rows: Tuple[int, int], ink: bool, highlight: bool
+    ) -> None:
+        col_slice = slice(max(cols[0], 0), max(cols[1] + 1, 0))
+        row_slice = slice(max(rows[0], 0), max(rows[1] + 1, 0))
+        if highlight:
+            self.highlight[row_slice, col_slice] = ink
+        else:
+            self.frame[row_slice, col_slice] = ink
+            if not ink:
+                self.highlight[row_slice, col_slice] = False
+
+    @staticmethod
+    def _length(start: float, stop: float, stroke: int) -> Tuple[int, int]:
+        """The first and last pixels along a snapped segment, with butt caps."""
+        first = int(np.floor(min(start, stop) + 0.5))
+        last = int(np.floor(max(start, stop) + 0.5))
+        if stroke % 2:
+            # from and to the pixel centers, the half covered end pixels are inked
+            return first, last
+        return first, max(last - 1, first)
+
+    def segment(
+        self,
+        x0: float,
+        y0: float,
+        x1: float,
+        y1: float,
+        linewidth: float = 1,
+        highlight: bool = False,
+    ) -> None:
+        """Draw a vertical or a horizontal segment.
+
+        Args:
+            x0, y0: the start of the segment.
+            x1, y1: the end of the segment, `x1 == x0` or `y1 == y0`.
+            linewidth: the width of the segment, in pixels.
+            highlight: draw in the highlight plane.
+        """
+        stroke = max(int(np.floor(linewidth + 0.5)), 1)
+        if x0 == x1:
+            cols, rows = self._stroke(x0, stroke), self._length(y0, y1, stroke)
+        else:
+            cols, rows = self._length(x0, x1, stroke), self._stroke(y0, stroke)
+        self._set(cols, rows, True, highlight)
+
+    def rect(
+        self,
+        x0: float,
+        x1: float,
+        y0: float,
+        y1: float,
+        linewidth: float = 1,
+        face: bool = True,
+        ink: bool = True,
+        highlight: bool = False,
+    ) -> None:
+        """Draw a rectangle, its outline and optionally its face.
+
+        Args:
+            x0, x1: the horizontal extent of the rectangle.
+            y0, y1: the vertical extent of the rectangle.
+            linewidth: the width of the outline, in pixels.
+            face: fill the rectangle, otherwise only draw its outline.
+            ink: black, or white to clear the rectangle.
+            highlight: draw in the highlight plane.
+        """
+        stroke = max(int(np.floor(linewidth + 0.5)), 1)
+        left, right = self._stroke(min(x0, x1), stroke), self._stroke(
+            max(x0, x1), stroke
+        )
+        top, bottom = self._stroke(min(y0, y1), stroke), self._stroke(
+            max(y0, y1), stroke
+        )
+        self._set((left[0], right[1]), (top[0], bottom[1]), ink, highlight)
+        if not face and right[0] - left[1] > 1 and bottom[0] - top[1] > 1:
+            self._set(
+                (left[1] + 1, right[0] - 1),
+                (top[1] + 1, bottom[0] - 1),
+                not ink,
+                highlight,
+            )
+
+    def line(
+        self,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        width: float = 1,
+        highlight: bool = False,
+    ) -> None:
+        """Draw a polyline, the NaN points are skipped.
+
+        Args:
+            xs: the horizontal coordinates of the points.
+            ys: the vertical coordinates of the points.
+            width: the width of the line, in pixels.
+            highlight: draw in the highlight plane.
+        """
+        points = np.column_stack([xs, ys])
+        points = points[~np.isnan(points).any(axis=1)]
+        if len(points) == 0:
+            return
+        if len(points) == 1:
+            samples = points
+        else:
+            # sample the segments every quarter pixel
+            lengths = np.abs(np.diff(points, axis=0)).max(axis=1)
+            n_samples = np.maximum(np.ceil(lengths * 4).astype(int), 1)
+            starts = np.repeat(points[:-1], n_samples, axis=0)
+            steps = np.repeat(
+                np.diff(points, axis=0) / n_samples[:, None], n_samples, 0
+            )
+            offsets = np.arange(n_samples.sum()) - np.repeat(
+                np.cumsum(n_samples) - n_samples, n_samples
+            )
+            samples = np.vstack([starts + steps * offsets[:, None], points[-1:]])
+        brush = max(int(round(width)), 1)
+        cols = np.floor(samples[:, 0] - (brush - 1) / 2).astype(int)
+        rows = np.floor(samples[:, 1] - (brush - 1) / 2).astype(int)
+        plane = self.highlight if highlight else self.frame
+        for i in range(brush):
+            for j in range(brush):
+                r, c = rows + i, cols + j
+                inside = (r >= 0) & (r < self.height) & (c >= 0) & (c < self.width)
+                plane[r[inside], c[inside]] = True
+
+    def text(self, x: float, y: float, text: str, size: float) -> None:
+        """Draw text in a white box.
+
+        The labels are cached, drawing the same text at the same position again only
+        pastes it.
+
+        Args:
+            x: the left of the text.
+            y: the baseline of the text.
+            text: the text.
+            size: the font size, in points.
+        """
+        self.paste(_label(x, y, text, self.points(size)))
+
+    def paste(self, label: Label) -> None:
+        """Paste a `Label`, clearing its box."""
+        self._set(label.box_cols, label.box_rows, False, False)
+        rows, cols = label.glyphs.shape
+        top, left = max(label.row, 0), max(label.col, 0)
+        bottom = min(label.row + rows, self.height)
+        right = min(label.col + cols, self.width)
+        if bottom > top and right > left:
+            self.frame[top:bottom, left:right] |= label.glyphs[
+                top - label.row : bottom - label.row,
+                left - label.col : right - label.col,
+            ]
+
+    def copy(self) -> "Raster":
+        """Copy the frame and its planes."""
+        raster = Raster(self.width, self.height, dpi=self.dpi)
+        raster.frame[:] = self.frame
+        raster.highlight[:] = self.highlight
+        return raster
+
+    def to_image(self) -> Image.Image:
+        """The frame as a `PIL.Image.Image`.
+
+        Returns:
+            A "1" mode image, or an "RGB" image with the highlighted pixels in red if
+                there are any.
+        """
+        if not self.highlight.any():
+            return Image.fromarray(~self.frame)
+        rgb = np.where(self.frame[..., None], 0, 255).astype(np.uint8).repeat(3, -1)
+        rgb[self.highlight] = (255, 0, 0)
+        return Image.fromarray(rgb, mode="RGB")
+
+
+def _width(widths: np.ndarray, n_candles: int) -> float:
+    return float(np.interp(n_candles, WIDTHS_NUMPOINTS, widths))
+
+
+def _moving_average(close: np.ndarray, window: int) -> np.ndarray:
+    average = np.full(len(close), np.nan)
+    if window <= len(close):
+        cumsum = np.cumsum(np.insert(close.astype(np.float64), 0, 0))
+        average[window - 1 :] = (cumsum[window:] - cumsum[:-window]) / window
+    return average
+
+
+def _layout(height: int, volume: bool, dpi: float) -> Tuple[float, float]:
+    """The top and the height of the price axes, in pixels."""
+    # the axes start below the top string's ascent
+    _, ascent, _, _ = _font(TOP_FONTSIZE * dpi / 72).getbbox("lp", anchor="ls")
+    top = -ascent
+    axes_height = height - top
+    return top, axes_height * PRICE_HEIGHT_RATIO if volume else axes_height
+
+
+def chart(
+    candles: Candles,
+    width: int,
+    height: int,
+    type: str = "candle",
+    volume: bool = False,
+    mav: Optional[Union[int, Sequence[int]]] = None,
+    xlim: Optional[Tuple[float, float]] = None,
+    highlight: bool = False,
+    dpi: float = 100,
+) -> Raster:
+    """Draw a chart, without its text.
+
+    Args:
+        candles: the candles to draw.
+        width: the width of the frame, in pixels.
+        height: the height of the frame, in pixels.
+        type: the chart type, "candle", "line" or "ohlc".
+        volume: also draw the volume bars, below the chart.
+        mav: the window, or windows, of the moving averages of the close prices.
+        xlim: the horizontal limits, in candles, defaults to all the candles.
+        highlight: draw the moving averages in the highlight plane.
+        dpi: the resolution, to convert the sizes in points to pixels.
+
+    Returns:
+        The `Raster` with the chart.
+    """
+    if type not in ("candle", "line", "ohlc"):
+        raise ValueError(f"Unsupported chart type: {type}")
+    raster = Raster(width, height, dpi=dpi)
+    n_candles = len(candles)
+    xs = np.arange(n_candles, dtype=np.float64)
+    low, high = candles.low.astype(np.float64), candles.high.astype(np.float64)
+    # mplfinance fits the lows and highs, or only the drawn lines when given the xlim
+    y_min, y_max = float(np.nanmin(low)), float(np.nanmax(high))
+    if xlim is not None and type == "line":
+        y_min, y_max = float(np.nanmin(candles.close)), float(np.nanmax(candles.close))
+    if y_max == y_min:
+        y_min, y_max = y_min - 0.5, y_max + 0.5
+    if xlim is None:
+        pad = (n_candles - 1) / n_candles if n_candles > 1 else 0.75
+        xlim = (-pad, n_candles - 1 + pad)
+    x_scale = width / (xlim[1] - xlim[0])
+    px = (xs - xlim[0]) * x_scale
+
+    top, price_height = _layout(height, volume, dpi)
+    axes_height = height - top
+
+    def py(values: np.ndarray) -> np.ndarray:
+        return (
+            top + (y_max - values.astype(np.float64)) / (y_max - y_min) * price_height
+        )
+
+    if volume:
+        volumes = candles.volume.astype(np.float64)
+        v_min, v_max = 0.3 * np.nanmin(volumes), 1.1 * np.nanmax(volumes)
+        v_top = top + price_height
+        v_height = axes_height - price_height
+        half = _width(VOLUME_WIDTHS, n_candles) * x_scale / 2
+        linewidth = raster.points(VOLUME_LINEWIDTH)
+        if v_max > v_min:
+            bar_tops = v_top + (v_max - volumes) / (v_max - v_min) * v_height
+            for x, bar_top in zip(px, bar_tops):
+                if not np.isnan(bar_top):
+                    raster.rect(x - half, x + half, bar_top, height, linewidth)
+
+    open_, close = py(candles.open), py(candles.close)
+    if type == "candle":
+        half = _width(CANDLE_WIDTHS, n_candles) * x_scale / 2
+        linewidth = raster.points(_width(CANDLE_LINEWIDTHS, n_candles))
+        for x, o, h, l, c in zip(px, open_, py(high), py(low), close):
+            raster.segment(x, h, x, l, linewidth)
+            # the rising candles are white
+            raster.rect(x - half, x + half, o, c, linewidth, face=c >= o)
+    elif type == "ohlc":
+        tick = OHLC_TICKSIZE * x_scale
+        linewidth = raster.points(_width(OHLC_LINEWIDTHS, n_candles))
+        for x, o, h, l, c in zip(px, open_, py(high), py(low), close):
+            raster.segment(x, h, x, l, linewidth)
+            raster.segment(x - tick, o, x, o, linewidth)
+            raster.segment(x, c, x + tick, c, linewidth)
+    else:
+        raster.line(px, close, width=raster.points(LINE_WIDTH))
+
+    if mav is not None:
+        for window in [mav] if isinstance(mav, int) else mav:
+            average = _moving_average(candles.close, window)
+            raster.line(
+                px, py(average), width=raster.points(LINE_WIDTH), highlight=highlight
+            )
+
+    return raster
+
+
+def _draw_text(
+    raster: Raster, top_string: str, sub_string: Optional[str], volume: bool
+) -> None:
+    top, price_height = _layout(raster.height, volume, raster.dpi)
+    raster.text(0, top, top_string, TOP_FONTSIZE)
+    if sub_string is not None:
+        raster.text(0, top + (1 - SUB_Y) * price_height, sub_string, SUB_FONTSIZE)
+
+
+def plot(
+    candles: Candles,
+    width: int,
+    height: int,
+    top_string: str,
+    sub_string: Optional[str] = None,
+    type: str = "candle",
+    volume: bool = False,
+    mav: Optional[Union[int, Sequence[int]]] = None,
+    xlim: Optional[Tuple[float, float]] = None,
+    highlight: bool = False,
+    dpi: float = 100,
+) -> Raster:
+    """Draw a chart and its text.
+
+    Args:
+        candles: the candles to draw.
+        width: the width of the frame, in pixels.
+        height: the height of the frame, in pixels.
+        top_string: the text in the top left corner.
+        sub_string: the smaller text below `top_string`.
+        type: the chart type, "candle", "line" or "ohlc".
+        volume: also draw the volume bars, below the chart.
+        mav: the window, or windows, of the moving averages of the close prices.
+        xlim: the horizontal limits, in candles, defaults to all the candles.
+        highlight: draw the moving averages in the highlight plane.
+        dpi: the resolution, to convert the sizes in points to pixels.
+
+    Returns:
+        The `Raster` with the chart.
+    """
+    raster = chart(
+        candles,
+        width,
+        height,
+        type=type,
+        volume=volume,
+        mav=mav,
+        xlim=xlim,
+        highlight=highlight,
+        dpi=dpi,
+    )
+    _draw_text(raster, top_string, sub_string, volume)
+    return raster
+
+
+class Compositor:
+    """Compose the frames from layers, only redrawing the layers which changed.
+
+    A frame is the chart layer, with the text labels pasted over it. The chart layer
+    is kept until the candles or the chart's options change, the labels are cached
+    by text and position. A new price only draws the top string, the same chart and
+    text again are only pasted together.
+
+    Args:
+        width: the width of the frames, in pixels.
+        height: the height of the frames, in pixels.
+        dpi: the resolution, to convert the sizes in points to pixels.
+    """
+
+    def __init__(self, width: int, height: int, dpi: float = 100) -> None:
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self._chart: Optional[Raster] = None
+        self._chart_key: Optional[tuple] = None
+
+    def compose(
+        self,
+        candles: Candles,
+        top_string: str,
+        sub_string: Optional[str] = None,
+        type: str = "candle",
+        volume: bool = False,
+        mav: Optional[Union[int, Sequence[int]]] = None,
+        xlim: Optional[Tuple[float, float]] = None,
+        highlight: bool = False,
+    ) -> Raster:
+        """Compose the frame of a chart and its text, see `plot` for the arguments.
+
+        Returns:
+            The `Raster` of the frame.
+        """
+        chart_key = (candles.digest(), type, volume, mav, xlim, highlight)
+        if self._chart is None or chart_key != self._chart_key:
+            self._chart = chart(
+                candles,
+                self.width,
+                self.height,
+                type=type,
+                volume=volume,
+                mav=mav,
+                xlim=xlim,
+                highlight=highlight,
+                dpi=self.dpi,
+            )
+            self._chart_key = chart_key
+        raster = self._chart.copy()
+        _draw_text(raster, top_string, sub_string, volume)
+        return raster
@@ -0,0 +1,142 @@
+import logging
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional
+
+from .clock import get_clock
+from .paths import CACHE_DIR
+from .store import StoreKey
+
+if TYPE_CHECKING:
+    from .ticker import Response, Ticker
+
+LOGGER = logging.getLogger(__name__)
+
+REPLAY_DIR = CACHE_DIR / "replay"
+REPLAY_MODES = ("record", "replay")
+
+
+class Recorded(NamedTuple):
+    # how long the tick took, in seconds
+    latency: float
+    response: Optional["Response"]
+    # the error message, if the tick failed
+    error: Optional[str] = None
+
+
+class Replay:
+    """Record the `Ticker` responses to disk and replay them, without network access.
+
+    The ticks of each (symbol_type, symbol, interval) key are appended to their own
+    pickle file, with their latencies and errors. When replaying, the recorded ticks
+    are returned in order, looping back to the first one once they are exhausted, a
+    recorded error is raised again.
+
+    Args:
+        mode: "record" to record the ticks, "replay" to replay them.
+        directory: directory of the recorded ticks.
+        latency: when replaying, wait the recorded latencies, otherwise return at once.
+    """
+
+    def __init__(
+        self, mode: str, directory: Path = REPLAY_DIR, latency: bool = True
+    ) -> None:
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"'mode' not in {REPLAY_MODES}")
+        self.mode = mode
+        self.directory = directory
+        self.latency = latency
+        self._recorded: Dict[StoreKey, List[Recorded]] = {}
+        self._positions: Dict[StoreKey, int] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: StoreKey) -> Path:
+        return self.directory / ("_".join(key).replace("/", "-") + ".pkl")
+
+    def record(self, key: StoreKey, recorded: Recorded) -> None:
+        """Append a tick to the recording.
+
+        Args:
+            key: the (symbol_type, symbol, interval) key.
+            recorded: the recorded tick.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock, self._path(key).open("ab") as fp:
+            pickle.dump(recorded, fp)
+
+    def load(self, key: StoreKey) -> List[Recorded]:
+        """Read the recorded ticks.
+
+        Args:
+            key: the (symbol_type, symbol, interval) key.
+
+        Returns:
+            The recorded ticks, in order.
+        """
+        if key not in self._recorded:
+            recorded = []
+            path = self._path(key)
+            if path.is_file():
+                with path.open("rb") as fp:
+                    while True:
+                        try:
+                            recorded.append(pickle.load(fp))
+                        except EOFError:
+                            break
+                LOGGER.info("Loaded %s recorded ticks of %s.", len(recorded), key)
+            self._recorded[key] = recorded
+        return self._recorded[key]
+
+    def next(self, key: StoreKey) -> Recorded:
+        """The next recorded tick.
+
+        Args:
+            key: the (symbol_type, symbol, interval) key.
+
+        Raises:
+            KeyError: if nothing was recorded for this key.
+        """
+        recorded = self.load(key)
+        if not recorded:
+            raise KeyError(f"No recorded ticks for {key} in {self.directory}.")
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = (position + 1) % len(recorded)
+        return recorded[position]
+
+    def wrap(
+        self, ticker: "Ticker", tick: Callable[[], "Response"]
+    ) -> Callable[[], "Response"]:
+        """Wrap a `Ticker`'s tick function, to record or replay it.
+
+        Args:
+            ticker: the `Ticker`.
+            tick: its tick function.
+
+        Returns:
+            The tick function which records the ticks, or which replays them instead
+                of calling `tick`.
+        """
+        key = (ticker.symbol_type, ticker.symbol, ticker.interval)
+
+        def record() -> "Response":
+            start = time.perf_counter()
+            try:
+                response = tick()
+            except Exception as exc:
+                self.record(key, Recorded(time.perf_counter() - start, None, str(exc)))
+                raise
+            self.record(key, Recorded(time.perf_counter() - start, response))
+            return response
+
+        def replay() -> "Response":
+            recorded = self.next(key)
+            if self.latency:
+                get_clock().sleep(recorded.latency)
+            if recorded.response is None:
+                raise ConnectionError(recorded.error)
+            return recorded.response
+
+        return record if self.mode == "record" else replay
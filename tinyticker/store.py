@@ -0,0 +1,163 @@
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+import pandas as pd
+
+from .clock import get_clock
+from .paths import CACHE_DIR
+
+LOGGER = logging.getLogger(__name__)
+
+# (symbol_type, symbol, interval)
+StoreKey = Tuple[str, str, str]
+
+
+class CandleStore:
+    """On disk store of historical candles.
+
+    The candles are kept in one pickle file per (symbol_type, symbol, interval) key,
+    indexed by timestamp. Newly fetched candles are merged into the stored ones, so
+    a `Ticker` only needs to request the candles newer than the last stored one. As
+    the data lives on disk, it survives restarts of the ticker process.
+
+    To spare the SD card, the files are only written when the candles change. An
+    update of only the still forming last candle is written at most once every
+    `write_interval`, the last stored candle is refetched after a restart anyway.
+
+    Args:
+        directory: directory in which to store the candle files.
+        write_interval: minimum time between two writes of a key's file when only its
+            last candle changed, in seconds.
+    """
+
+    suffix = ".pkl"
+
+    def __init__(
+        self, directory: Path = CACHE_DIR, write_interval: float = 900
+    ) -> None:
+        self.directory = directory
+        self.write_interval = write_interval
+        self._cache: Dict[StoreKey, pd.DataFrame] = {}
+        self._written: Dict[StoreKey, float] = {}
+        # the keys with changes which are not written yet
+        self._pending: Set[StoreKey] = set()
+
+    def _path(self, key: StoreKey) -> Path:
+        return self.directory / ("_".join(key).replace("/", "-") + self.suffix)
+
+    def _read(self, path: Path) -> pd.DataFrame:
+        return pd.read_pickle(path)
+
+    def _dump(self, candles: pd.DataFrame, path: Path) -> None:
+        candles.to_pickle(path)
+
+    def get(self, key: StoreKey) -> Optional[pd.DataFrame]:
+        """Get the stored candles.
+
+        Args:
+            key: the (symbol_type, symbol, interval) key.
+
+        Returns:
+            The stored candles, or None if there are none.
+        """
+        if key in self._cache:
+            return self._cache[key]
+        path = self._path(key)
+        if not path.is_file():
+            return None
+        try:
+            candles = self._read(path)
+        except Exception as exc:
+            LOGGER.warning("Could not read stored candles %s: %s", path, exc)
+            return None
+        self._cache[key] = candles
+        return candles
+
+    def last_timestamp(self, key: StoreKey) -> Optional[pd.Timestamp]:
+        """The timestamp of the last stored candle.
+
+        Args:
+            key: the (symbol_type, symbol, interval) key.
+
+        Returns:
+            The timestamp of the last candle, or None if there are no stored candles.
+        """
+        candles = self.get(key)
+        if candles is None or candles.empty:
+            return None
+        return candles.index[-1]  # type: ignore
+
+    def update(
+        self, key: StoreKey, candles: pd.DataFrame, max_length: Optional[int] = None
+    ) -> pd.DataFrame:
+        """Merge new candles into the stored candles and write them to disk.
+
+        Candles with the same timestamp as a stored candle replace it, this way the
+        still forming last candle gets updated. The file is only written if the
+        candles changed, see `write_interval`.
+
+        Args:
+            key: the (symbol_type, symbol, interval) key.
+            candles: the newly fetched candles.
+            max_length: maximum number of candles to keep, the oldest candles are
+                dropped.
+
+        Returns:
+            The merged candles.
+        """
+        stored = self.get(key)
+        if stored is not None and not stored.empty:
+            if stored.index.tz != candles.index.tz:  # type: ignore
+                stored = stored.tz_convert(candles.index.tz)  # type: ignore
+            merged = pd.concat([stored, candles])
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        else:
+            merged = candles
+        if max_length is not None and len(merged) > max_length:
+            merged = merged.iloc[-max_length:]
+        self._cache[key] = merged
+        if self._should_write(key, stored, merged):
+            self._write(key, merged)
+        return merged
+
+    def _should_write(
+        self, key: StoreKey, stored: Optional[pd.DataFrame], merged: pd.DataFrame
+    ) -> bool:
+        """Whether the merged candles should be written to disk."""
+        if (
+            stored is None
+            or not stored.index.equals(merged.index)
+            or not stored.iloc[:-1].equals(merged.iloc[:-1])
+        ):
+            # new candles, or changes to the completed candles
+            return True
+        if not stored.iloc[-1:].equals(merged.iloc[-1:]):
+            self._pending.add(key)
+        # only the last candle changed, since the last write or now
+        written = self._written.get(key)
+        return key in self._pending and (
+            written is None or get_clock().monotonic() - written >= self.write_interval
+        )
+
+    def _write(self, key: StoreKey, candles: pd.DataFrame) -> None:
+        path = self._path(key)
+        self._written[key] = get_clock().monotonic()
+        self._pending.discard(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first, the ticker process can get killed at
+            # any time and we don't want to leave a truncated file behind
+            tmp_path = path.with_suffix(".tmp")
+            self._dump(candles, tmp_path)
+            tmp_path.replace(path)
+        except OSError as exc:
+            LOGGER.warning("Could not write stored candles %s: %s", path, exc)
+
+    def clear(self) -> None:
+        """Remove all the stored candles."""
+        self._cache.clear()
+        self._written.clear()
+        self._pending.clear()
+        for path in self.directory.glob(f"*{self.suffix}"):
+            path.unlink()
@@ -0,0 +1,191 @@
+"""Streaming prices, pushed by the CryptoCompare websocket API.
+
+https://min-api.cryptocompare.com/documentation/websockets
+"""
+
+import json
+import logging
+import threading
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional
+from urllib.parse import urlencode
+
+import websocket
+
+from .clock import get_clock
+
+if TYPE_CHECKING:
+    from .ticker import Ticker
+
+LOGGER = logging.getLogger(__name__)
+
+CRYPTOCOMPARE_STREAM_URL = "wss://streamer.cryptocompare.com/v2"
+STREAM_CURRENCY = "USD"
+# the feed sends a heartbeat message every 30 seconds, even when the prices don't move
+STREAM_HEARTBEAT = 30
+
+
+class Trade(NamedTuple):
+    symbol: str
+    # unix timestamp, in seconds
+    timestamp: float
+    price: float
+    volume: float
+
+
+def parse_trade(message: dict) -> Optional[Trade]:
+    """Parse a CryptoCompare streaming message.
+
+    Args:
+        message: the decoded message.
+
+    Returns:
+        The `Trade`, or None if the message isn't a price update.
+    """
+    message_type = message.get("TYPE")
+    if message_type == "5" and "PRICE" in message:
+        # aggregate index, CCCAGG
+        return Trade(
+            message["FROMSYMBOL"],
+            message.get("LASTUPDATE", get_clock().now().timestamp()),
+            float(message["PRICE"]),
+            float(message.get("LASTVOLUME", 0)),
+        )
+    if message_type == "0":
+        # trade
+        return Trade(
+            message["FSYM"], message["TS"], float(message["P"]), float(message["Q"])
+        )
+    return None
+
+
+class PriceStream:
+    """Pushes the streamed crypto prices to the subscribed `Ticker` instances.
+
+    A background thread keeps a websocket connection to the feed, reconnecting with
+    an exponential backoff. A connection on which nothing, not even a heartbeat, is
+    received for `timeout` seconds is considered dead and reconnected.
+
+    Args:
+        url: the feed's websocket url.
+        api_key: CryptoCompare API key.
+        move_threshold: relative price move from the displayed price which triggers
+            a display update.
+        reconnect_delay: the time to wait before the first reconnection, in seconds.
+        max_reconnect_delay: the maximum time in between reconnections, in seconds.
+        timeout: the time to wait for a message, in seconds, twice the feed's
+            heartbeat interval so that an idle feed stays connected.
+    """
+
+    def __init__(
+        self,
+        url: str = CRYPTOCOMPARE_STREAM_URL,
+        api_key: Optional[str] = None,
+        move_threshold: float = 0.002,
+        reconnect_delay: float = 5,
+        max_reconnect_delay: float = 300,
+        timeout: float = 2 * STREAM_HEARTBEAT,
+    ) -> None:
+        self.url = url
+        if api_key is not None:
+            self.url += ("&" if "?" in url else "?") + urlencode({"api_key": api_key})
+        self.move_threshold = move_threshold
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.timeout = timeout
+        self.tickers: Dict[str, List["Ticker"]] = {}
+        self._ws: Optional[websocket.WebSocket] = None
+        self._connected = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected.is_set()
+
+    @staticmethod
+    def _subscription(symbol: str) -> str:
+        return f"5~CCCAGG~{symbol}~{STREAM_CURRENCY}"
+
+    def _subscribe(self, symbols: List[str]) -> None:
+        if self._ws is not None and symbols:
+            self._ws.send(
+                json.dumps(
+                    {"action": "SubAdd", "subs": list(map(self._subscription, symbols))}
+                )
+            )
+
+    def subscribe(self, ticker: "Ticker") -> None:
+        """Push the streamed prices of a ticker's symbol to it.
+
+        Args:
+            ticker: the `Ticker`.
+        """
+        new = ticker.symbol not in self.tickers
+        self.tickers.setdefault(ticker.symbol, []).append(ticker)
+        if new and self.is_connected:
+            self._subscribe([ticker.symbol])
+
+    def start(self) -> None:
+        """Start streaming, in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stream", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop streaming."""
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            # unblocks the `recv` of the stream's thread
+            ws.abort()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def wait_connected(self, timeout: Optional[float] = None) -> bool:
+        return self._connected.wait(timeout)
+
+    def _run(self) -> None:
+        delay = self.reconnect_delay
+        while not self._stop.is_set():
+            try:
+                self._ws = websocket.create_connection(self.url, timeout=self.timeout)
+                self._subscribe(list(self.tickers))
+                self._connected.set()
+                LOGGER.info("Streaming prices of %s", list(self.tickers))
+                delay = self.reconnect_delay
+                while not self._stop.is_set():
+                    text = self._ws.recv()
+                    if not text:
+                        raise ConnectionError("Websocket closed by the server.")
+                    self._handle(text)
+            except (OSError, ValueError, websocket.WebSocketException) as exc:
+                if self._stop.is_set():
+                    break
+                LOGGER.warning("Price stream disconnected: %s", exc)
+            finally:
+                self._disconnected()
+            self._stop.wait(delay)
+            delay = min(2 * delay, self.max_reconnect_delay)
+
+    def _disconnected(self) -> None:
+        self._connected.clear()
+        for tickers in self.tickers.values():
+            for ticker in tickers:
+                ticker.stream_synced = False
+        if self._ws is not None:
+            self._ws.close(timeout=1)
+            self._ws.shutdown()
+            self._ws = None
+
+    def _handle(self, text: str) -> None:
+        message = json.loads(text)
+        if message.get("TYPE") in ("401", "429", "500"):
+            LOGGER.warning("Price stream error: %s", message.get("MESSAGE"))
+            return
+        trade = parse_trade(message)
+        if trade is None:
+            return
+        for ticker in self.tickers.get(trade.symbol, []):
+            ticker.on_trade(trade.timestamp, trade.price, trade.volume)
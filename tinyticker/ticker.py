@@ -1,14 +1,22 @@
 import dataclasses as dc
 import logging
-import time
-from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 
-import cryptocompare
+import numpy as np
 import pandas as pd
-import yfinance
 
-from . import utils
+from . import providers, trading_calendar, utils
+from .archive import ARCHIVE_DIR, ARCHIVE_SPANS, CandleArchive
+from .candles import CandleRing, Candles
+from .clock import get_clock
 from .config import TinytickerConfig
+from .replay import REPLAY_DIR, Replay
+from .store import CandleStore, StoreKey
+from .stream import PriceStream
 
 CRYPTO_MAX_LOOKBACK = 1440
 CRYPTO_CURRENCY = "USD"
@@ -60,6 +68,35 @@ CRYPTO_INTERVAL_TIMEDELTAS: Dict[str, pd.Timedelta] = {
     "hour": pd.to_timedelta("1h"),
     "day": pd.to_timedelta("1d"),
 }
+# the cryptocompare payload fields we keep, and their column names
+CRYPTO_COLUMNS = {
+    "high": "High",
+    "low": "Low",
+    "open": "Open",
+    "volumefrom": "Volume",
+    "close": "Close",
+}
+
+# how to aggregate the candles when resampling them to a coarser interval
+OHLCV_AGG = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+}
+# the trading session duration used to estimate the number of intraday candles per day
+SESSION_DURATION = pd.to_timedelta("6.5h")
+# how far back, in days, yfinance provides the intraday intervals
+YFINANCE_INTRADAY_MAX_DAYS = {
+    "1m": 7,
+    "2m": 60,
+    "5m": 60,
+    "15m": 60,
+    "30m": 60,
+    "90m": 60,
+    "1h": 730,
+}
 
 LOGGER = logging.getLogger(__name__)
 
@@ -69,96 +106,629 @@ class Response:
     """The api response. Holds the historical and current price data.
 
     Args:
-        historical: DataFrame with columns "Open", "Close", "High", "Low", "Volume"
-            and a time index.
+        candles: The historical data, `Candles` or a DataFrame with columns "Open",
+            "Close", "High", "Low", "Volume" and a time index, which gets converted to
+            `Candles`.
         current_price: The current price of the asset.
+        stale: Whether the data is from a previous fetch, because the last fetch
+            failed.
     """
 
-    historical: pd.DataFrame
+    candles: Candles
     current_price: float
+    stale: bool = False
+
+    def __post_init__(self) -> None:
+        if isinstance(self.candles, pd.DataFrame):
+            self.candles = Candles.from_dataframe(self.candles)
+
+    @property
+    def historical(self) -> pd.DataFrame:
+        """The historical data as a DataFrame, built on each access."""
+        return self.candles.to_dataframe()
+
+    @property
+    def fingerprint(self) -> Tuple[bytes, float, bool]:
+        """Identifies the response's data, equal fingerprints plot the same chart."""
+        return (self.candles.digest(), self.current_price, self.stale)
+
+
+def resample_ohlcv(
+    historical: pd.DataFrame, interval_dt: pd.Timedelta, session: bool = False
+) -> pd.DataFrame:
+    """Resample candles to a coarser interval.
+
+    Args:
+        historical: DataFrame with columns "Open", "Close", "High", "Low", "Volume"
+            and a time index.
+        interval_dt: the coarser interval.
+        session: anchor the intraday candles on the first candle of each day instead of
+            on the epoch, this is how the stock exchanges align their candles with the
+            session open.
+
+    Returns:
+        The resampled candles, without the empty intervals.
+    """
+    agg = {column: how for column, how in OHLCV_AGG.items() if column in historical}
+    if not session:
+        columns = list(agg.keys())
+        timestamps, values = aggregate_ohlcv(
+            historical.index.asi8,  # type: ignore
+            historical[columns].to_numpy(dtype=np.float64),
+            columns,
+            interval_dt.value,
+        )
+        return pd.DataFrame(
+            values,
+            columns=columns,
+            index=pd.to_datetime(timestamps, utc=True).tz_convert(
+                historical.index.tz  # type: ignore
+            ),
+        )
+    if interval_dt < pd.to_timedelta("1d"):
+        resampled = pd.concat(
+            [
+                day.resample(interval_dt, origin="start").agg(agg)  # type: ignore
+                for _, day in historical.groupby(historical.index.date)  # type: ignore
+            ]
+        )
+    else:
+        resampled = historical.resample(interval_dt).agg(agg)  # type: ignore
+    return resampled.dropna(subset=["Open"])
+
+
+def aggregate_ohlcv(
+    timestamps: np.ndarray, values: np.ndarray, columns: List[str], interval: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Aggregate candles into coarser, epoch aligned, candles.
+
+    The candles are split into buckets of `interval` and each column is reduced with a
+    single vectorized operation, as described by `OHLCV_AGG`.
+
+    Args:
+        timestamps: the sorted timestamps of the candles.
+        values: 2D array of the candles' values, with a column per item of `columns`.
+        columns: the column names, "Open", "High", "Low", "Close" or "Volume".
+        interval: the coarser interval duration, in the unit of `timestamps`.
+
+    Returns:
+        The timestamps and the values of the aggregated candles.
+    """
+    if len(timestamps) == 0:
+        return timestamps, values
+    buckets = timestamps // interval
+    # indices of the first and last candles of each bucket
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    ends = np.append(starts[1:], len(buckets)) - 1
+    aggregated = np.empty((len(starts), values.shape[1]), dtype=values.dtype)
+    for i, column in enumerate(columns):
+        how = OHLCV_AGG[column]
+        if how == "first":
+            aggregated[:, i] = values[starts, i]
+        elif how == "last":
+            aggregated[:, i] = values[ends, i]
+        elif how == "max":
+            aggregated[:, i] = np.maximum.reduceat(values[:, i], starts)
+        elif how == "min":
+            aggregated[:, i] = np.minimum.reduceat(values[:, i], starts)
+        else:
+            aggregated[:, i] = np.add.reduceat(values[:, i], starts)
+    return buckets[starts] * interval, aggregated
+
+
+def _crypto_interval(interval_dt: pd.Timedelta) -> Tuple[str, int]:
+    """Get the `cryptocompare` interval to request for the desired interval.
+
+    Args:
+        interval_dt: the desired interval duration.
+
+    Returns:
+        The `cryptocompare` interval and how many of its candles make up a candle of the
+            desired interval.
+    """
+    max_timedelta = pd.Timedelta(0)
+    crypto_interval = "minute"
+    # get the biggest interval_dt which is smaller than the desired interval
+    for interval, timedelta in CRYPTO_INTERVAL_TIMEDELTAS.items():
+        if max_timedelta <= timedelta <= interval_dt:
+            max_timedelta = timedelta
+            crypto_interval = interval
+    crypto_interval_dt = CRYPTO_INTERVAL_TIMEDELTAS[crypto_interval]
+    return crypto_interval, int(interval_dt / crypto_interval_dt)
 
 
 def get_cryptocompare(
     token: str,
     interval_dt: pd.Timedelta,
     lookback: int,
+    api_key: Optional[str] = None,
+    end: Optional[pd.Timestamp] = None,
 ) -> pd.DataFrame:
     """Wraps the crypto data API to have the same interface as the stock API.
 
     This involves working around `cryptocompare`'s 'limited interval choice by
-    requesting more data and resampling ourselves. It also renames the columns and sets
-    a time index.
+    requesting more data and resampling ourselves. The payload is parsed straight into
+    numpy arrays, which are only wrapped in a `pd.DataFrame`, with renamed columns and
+    a time index, once resampled and pruned.
 
     Args:
         token: token identifier e.g. BTC, ETH, ...
         interval_dt: the desired interval duration.
         lookback: how many intervals to fetch data for.
+        api_key: CryptoCompare API key.
+        end: the time of the last candle, defaults to now.
 
     Returns:
         A `pd.DataFrame` containing the Open, Close, High, Low and Volume historical
             data, with a time index.
     """
-
-    max_timedelta = pd.Timedelta(0)
-    crypto_interval = "minute"
-    # get the biggest interval_dt which is smaller than the desired interval
-    for interval, timedelta in CRYPTO_INTERVAL_TIMEDELTAS.items():
-        if max_timedelta <= timedelta <= interval_dt:
-            max_timedelta = timedelta
-            crypto_interval = interval
-    crypto_interval_dt = CRYPTO_INTERVAL_TIMEDELTAS[crypto_interval]
     # how much to extend the query back in time so that after resampling
     # we get the correct lookback
-    scale_factor = int(interval_dt / crypto_interval_dt)
-    api_method = getattr(cryptocompare, "get_historical_price_" + crypto_interval)
+    crypto_interval, scale_factor = _crypto_interval(interval_dt)
     crypto_limit = min(
         lookback * scale_factor,
         CRYPTO_MAX_LOOKBACK,
     )
-    historical: pd.DataFrame = pd.DataFrame(
-        api_method(
-            token,
-            CRYPTO_CURRENCY,
-            toTs=utils.now().timestamp(),
-            limit=crypto_limit,
-        )
-    )
-    LOGGER.debug("crypto historical data columns: %s", historical.columns)
-    historical.set_index("time", inplace=True)
-    historical.index = pd.to_datetime(historical.index.to_numpy(), unit="s", utc=True)
-    historical.drop(
-        columns=["volumeto", "conversionType", "conversionSymbol"],
-        inplace=True,
+    payload = providers.cryptocompare_historical(
+        token,
+        CRYPTO_CURRENCY,
+        crypto_interval,
+        limit=crypto_limit,
+        to_ts=(utils.now() if end is None else end).timestamp(),
+        api_key=api_key,
     )
-    historical.rename(
-        columns={
-            "high": "High",
-            "close": "Close",
-            "low": "Low",
-            "open": "Open",
-            "volumefrom": "Volume",
-        },
-        inplace=True,
+    if not payload:
+        raise ValueError("No historical data returned from cryptocompare API.")
+    values = np.array(
+        [[candle[key] for key in ("time", *CRYPTO_COLUMNS)] for candle in payload],
+        dtype=np.float64,
     )
-    if crypto_interval_dt != interval_dt:
+    timestamps = values[:, 0].astype(np.int64)
+    values = values[:, 1:]
+    columns = list(CRYPTO_COLUMNS.values())
+    if scale_factor != 1:
         LOGGER.debug("resampling historical data")
         # resample the crypto data to get the desired interval
-        historical_index = historical.index
-        historical: pd.DataFrame = historical.resample(interval_dt).agg(
-            {
-                "Open": "first",
-                "High": "max",
-                "Low": "min",
-                "Close": "last",
-                "Volume": "sum",
-            }
-        )  # type: ignore
-        historical.index = historical_index[::scale_factor]
-    LOGGER.debug("crypto historical length: %s", len(historical))
-    if len(historical) > lookback:
-        historical = historical.iloc[-lookback:]
-    LOGGER.debug("crypto historical length pruned: %s", len(historical))
-    return historical
+        timestamps, values = aggregate_ohlcv(
+            timestamps, values, columns, int(interval_dt.total_seconds())
+        )
+    LOGGER.debug("crypto historical length: %s", len(timestamps))
+    timestamps = timestamps[-lookback:]
+    values = values[-lookback:]
+    LOGGER.debug("crypto historical length pruned: %s", len(timestamps))
+    return pd.DataFrame(
+        values,
+        columns=columns,
+        index=pd.to_datetime(timestamps, unit="s", utc=True),
+    )
+
+
+def get_yfinance(
+    symbols: List[str],
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    interval: str,
+    **kwargs,
+) -> Dict[str, pd.DataFrame]:
+    """Download the data of multiple stock symbols in a single `yfinance` call.
+
+    Args:
+        symbols: the stock symbols, "AAPL", "SPY", ...
+        start: start of the requested time range.
+        end: end of the requested time range.
+        interval: the data interval.
+        **kwargs: passed to `yfinance.download`.
+
+    Returns:
+        A `pd.DataFrame` per symbol, containing the Open, Close, High, Low and Volume
+            historical data, with a time index.
+    """
+    data = providers.yfinance_download(
+        symbols,
+        start=start,
+        end=end,
+        interval=interval,
+        group_by="ticker",
+        **kwargs,
+    )
+    if not isinstance(data.columns, pd.MultiIndex):
+        # a single symbol doesn't get grouped
+        return {symbols[0]: data} if len(symbols) == 1 else {}
+    return {
+        symbol: data[symbol].dropna(how="all")
+        for symbol in symbols
+        if symbol in data.columns.get_level_values(0)
+    }
+
+
+class StockBatch:
+    """Batches the `yfinance` downloads of multiple stock `Ticker` instances.
+
+    The tickers are grouped by interval and the historical data of every ticker in a
+    group is downloaded in a single call, the current prices of all the tickers are
+    also downloaded in a single call. The downloaded data is then fanned out to the
+    tickers of the group, each ticker gets a download once: a ticker which already got
+    the group's last download triggers a new one. The tickers of a group share a
+    download per cycle of the sequence, and each tick gets fresh candles.
+
+    The tickers can be ticked concurrently, e.g. by a `FanOut`: a group's download
+    is only made once, the group's other tickers wait for it.
+    """
+
+    def __init__(self) -> None:
+        self.tickers: List["Ticker"] = []
+        self._historical: Dict[str, Tuple[pd.Timestamp, Dict[str, pd.DataFrame]]] = {}
+        # per interval, the tickers which got the group's last download
+        self._served: Dict[str, Set["Ticker"]] = {}
+        self._current: Optional[Tuple[pd.Timestamp, Dict[str, pd.DataFrame]]] = None
+        # held during the downloads, per interval, and for the current prices
+        self._historical_locks: Dict[str, threading.Lock] = {}
+        self._current_lock = threading.Lock()
+
+    def register(self, ticker: "Ticker") -> None:
+        """Add a `Ticker` to the batch."""
+        self.tickers.append(ticker)
+        self._historical_locks.setdefault(ticker.interval, threading.Lock())
+
+    @property
+    def symbols(self) -> List[str]:
+        return sorted({ticker.symbol for ticker in self.tickers})
+
+    def historical(self, ticker: "Ticker") -> pd.DataFrame:
+        """Get the historical data of a `Ticker`.
+
+        Args:
+            ticker: the `Ticker` for which to get the data.
+
+        Returns:
+            The historical data.
+        """
+        with self._historical_locks[ticker.interval]:
+            now = utils.now()
+            fetched = self._historical.get(ticker.interval, None)
+            served = self._served.setdefault(ticker.interval, set())
+            if fetched is None or ticker in served:
+                group = [
+                    tick
+                    for tick in self.tickers
+                    if tick.interval == ticker.interval and tick.source is None
+                ]
+                start = min(tick._get_yfinance_start_end()[0] for tick in group)
+                symbols = sorted({tick.symbol for tick in group})
+                LOGGER.info("Batch download %s: %s", ticker.interval, symbols)
+                fetched = (
+                    now,
+                    get_yfinance(
+                        symbols,
+                        start=start,
+                        end=now,
+                        interval=ticker.interval,
+                    ),
+                )
+                self._historical[ticker.interval] = fetched
+                served.clear()
+            served.add(ticker)
+        return fetched[1].get(ticker.symbol, pd.DataFrame())
+
+    def current(self, ticker: "Ticker") -> pd.DataFrame:
+        """Get the current price data of a `Ticker`.
+
+        Args:
+            ticker: the `Ticker` for which to get the data.
+
+        Returns:
+            The last minutes of price data.
+        """
+        with self._current_lock:
+            now = utils.now()
+            if self._current is None or now - self._current[0] >= pd.to_timedelta("1m"):
+                LOGGER.info("Batch download current prices: %s", self.symbols)
+                self._current = (
+                    now,
+                    get_yfinance(
+                        self.symbols,
+                        start=now - pd.to_timedelta("2m"),
+                        end=now,
+                        interval="1m",
+                    ),
+                )
+            current = self._current
+        return current[1].get(ticker.symbol, pd.DataFrame())
+
+
+class CryptoQuotes:
+    """Current prices of multiple crypto `Ticker` instances.
+
+    The prices of all the registered symbols are fetched in a single `cryptocompare`
+    call and cached for a short time. Concurrent `get` calls share the fetch.
+
+    Args:
+        ttl: how long the fetched prices are valid for, in seconds.
+        api_key: CryptoCompare API key.
+    """
+
+    def __init__(self, ttl: float = 60, api_key: Optional[str] = None) -> None:
+        self.ttl = pd.to_timedelta(ttl, unit="s")
+        self.api_key = api_key
+        self.symbols: List[str] = []
+        self._prices: Dict[str, float] = {}
+        self._fetched: Optional[pd.Timestamp] = None
+        self._lock = threading.Lock()
+
+    def register(self, symbol: str) -> None:
+        """Add a symbol to the symbols to fetch."""
+        with self._lock:
+            if symbol not in self.symbols:
+                self.symbols.append(symbol)
+
+    def _fetch(self, now: pd.Timestamp) -> None:
+        LOGGER.info("Fetching crypto prices: %s", self.symbols)
+        try:
+            current = providers.cryptocompare_price(
+                self.symbols, CRYPTO_CURRENCY, api_key=self.api_key
+            )
+        except Exception as exc:
+            LOGGER.warning("Failed to fetch crypto prices: %s", exc)
+            return
+        self._prices = {
+            symbol: price[CRYPTO_CURRENCY]
+            for symbol, price in current.items()
+            if CRYPTO_CURRENCY in price
+        }
+        self._fetched = now
+
+    def get(self, symbol: str) -> Optional[float]:
+        """Get the current price of a symbol.
+
+        Args:
+            symbol: token identifier, "BTC", "ETH", ...
+
+        Returns:
+            The current price, or None if it could not be fetched.
+        """
+        with self._lock:
+            now = utils.now()
+            if symbol not in self.symbols:
+                self.symbols.append(symbol)
+                self._fetched = None
+            if self._fetched is None or now - self._fetched >= self.ttl:
+                self._fetch(now)
+            return self._prices.get(symbol, None)
+
+
+class Backfill:
+    """Builds long candle histories in a `CandleArchive` and serves the tickers from it.
+
+    A background thread backfills the archived intervals of every registered symbol,
+    see `ARCHIVE_SPANS`, the intervals of the registered tickers first. A `Ticker`'s
+    candles are then resampled from the coarsest archived interval which divides its
+    interval, so changing its lookback or interval is served locally, without a full
+    download. Only the candles since the last archived candle are fetched, to top up
+    the archive.
+
+    Args:
+        archive: `CandleArchive` in which to keep the histories.
+        api_key: CryptoCompare API key.
+        ttl: how long the topped up candles are fresh for, in seconds, the tickers
+            served from the same archived interval share a top-up.
+    """
+
+    def __init__(
+        self, archive: CandleArchive, api_key: Optional[str] = None, ttl: float = 60
+    ) -> None:
+        self.archive = archive
+        self.api_key = api_key
+        self.ttl = pd.to_timedelta(ttl, unit="s")
+        self.tickers: List["Ticker"] = []
+        self._topped_up: Dict[StoreKey, pd.Timestamp] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # set once the backfill thread is done
+        self.done = threading.Event()
+
+    def register(self, ticker: "Ticker") -> None:
+        """Add a `Ticker` to the tickers served from the archive."""
+        self.tickers.append(ticker)
+
+    @staticmethod
+    def base_interval(symbol_type: str, interval: str) -> Optional[str]:
+        """The archived interval from which to resample an interval's candles.
+
+        Args:
+            symbol_type: "crypto" or "stock".
+            interval: the interval of the candles.
+
+        Returns:
+            The coarsest archived interval which divides the interval, or None if the
+                interval's candles can't be resampled from the archive.
+        """
+        spans = ARCHIVE_SPANS[symbol_type]
+        if interval in spans:
+            return interval
+        if interval in YFINANCE_NON_STANDARD_INTERVALS or (
+            # the exchanges' 5 day candles aren't aligned on the epoch
+            symbol_type == "stock"
+            and interval == "5d"
+        ):
+            return None
+        interval_dt = INTERVAL_TIMEDELTAS[interval]
+        bases = [
+            base
+            for base in spans
+            if interval_dt % INTERVAL_TIMEDELTAS[base] == pd.Timedelta(0)
+        ]
+        return max(bases, key=lambda base: INTERVAL_TIMEDELTAS[base], default=None)
+
+    @staticmethod
+    def _max_length(key: StoreKey) -> int:
+        symbol_type, _, interval = key
+        return int(ARCHIVE_SPANS[symbol_type][interval] / INTERVAL_TIMEDELTAS[interval])
+
+    def _fetch(
+        self, key: StoreKey, start: pd.Timestamp, end: pd.Timestamp
+    ) -> pd.DataFrame:
+        """Download the candles of an archived interval in a time range.
+
+        Args:
+            key: the (symbol_type, symbol, interval) key.
+            start: start of the time range.
+            end: end of the time range.
+
+        Returns:
+            The candles, with a timezone aware time index.
+        """
+        symbol_type, symbol, interval = key
+        if symbol_type == "stock":
+            historical = get_yfinance(
+                [symbol], start=start, end=end, interval=interval
+            ).get(symbol, pd.DataFrame())
+            if not historical.empty and historical.index.tzinfo is None:  # type: ignore
+                historical.index = historical.index.tz_localize("utc")  # type: ignore
+            return historical
+        # cryptocompare caps the number of candles per call, page back in time
+        interval_dt = INTERVAL_TIMEDELTAS[interval]
+        page_lookback = CRYPTO_MAX_LOOKBACK // _crypto_interval(interval_dt)[1]
+        pages = []
+        while end > start and not self._stop.is_set():
+            lookback = min(page_lookback, int((end - start) // interval_dt) + 2)
+            page = get_cryptocompare(
+                symbol, interval_dt, lookback, api_key=self.api_key, end=end
+            )
+            # the first resampled candle can be incomplete
+            page = page.iloc[1:]
+            if page.empty:
+                break
+            pages.append(page)
+            if len(page) < lookback - 1:
+                # the start of the symbol's history
+                break
+            end = page.index[0] - pd.to_timedelta("1s")
+        if not pages:
+            return pd.DataFrame()
+        historical = pd.concat(pages[::-1])
+        return historical[historical.index >= start]
+
+    def backfill(self, key: StoreKey) -> None:
+        """Download the full span of an archived interval, unless it is archived.
+
+        Args:
+            key: the (symbol_type, symbol, interval) key.
+        """
+        symbol_type, _, interval = key
+        now = utils.now()
+        start = now - ARCHIVE_SPANS[symbol_type][interval]
+        archived = self.archive.get(key)
+        # some slack, the span can start on a weekend or before the symbol existed
+        if (
+            archived is not None
+            and not archived.empty
+            and archived.index[0] <= start + ARCHIVE_SPANS[symbol_type][interval] / 10
+        ):
+            self.top_up(key)
+            return
+        LOGGER.info("Backfilling %s since %s", key, start)
+        historical = self._fetch(key, start, now)
+        if not historical.empty:
+            self.archive.update(key, historical, max_length=self._max_length(key))
+            self._topped_up[key] = now
+
+    def top_up(self, key: StoreKey) -> Optional[pd.DataFrame]:
+        """Fetch the candles since the last archived candle.
+
+        Args:
+            key: the (symbol_type, symbol, interval) key.
+
+        Returns:
+            The archived candles, or None if the interval isn't backfilled yet.
+        """
+        archived = self.archive.get(key)
+        if archived is None or archived.empty:
+            return None
+        now = utils.now()
+        topped_up = self._topped_up.get(key, None)
+        if topped_up is not None and now - topped_up < self.ttl:
+            return archived
+        symbol_type, _, interval = key
+        # refetch the last archived candle, it might have been incomplete
+        start = max(archived.index[-1], now - ARCHIVE_SPANS[symbol_type][interval])
+        LOGGER.debug("Topping up %s since %s", key, start)
+        historical = self._fetch(key, start, now)
+        self._topped_up[key] = now
+        if historical.empty:
+            return archived
+        return self.archive.update(key, historical, max_length=self._max_length(key))
+
+    def serve(self, ticker: "Ticker") -> Optional[pd.DataFrame]:
+        """Get a `Ticker`'s candles from the archive.
+
+        Args:
+            ticker: the `Ticker` for which to get the candles.
+
+        Returns:
+            The ticker's last `fetch_lookback` candles, or None if the archive doesn't
+                cover them and they need to be downloaded.
+        """
+        base = self.base_interval(ticker.symbol_type, ticker.interval)
+        if base is None:
+            return None
+        try:
+            archived = self.top_up((ticker.symbol_type, ticker.symbol, base))
+        except Exception as exc:
+            LOGGER.warning("Failed to top up %s %s: %s", ticker.symbol, base, exc)
+            return None
+        if archived is None:
+            return None
+        if base != ticker.interval:
+            scale = int(np.ceil(ticker._interval_dt / INTERVAL_TIMEDELTAS[base]))
+            session = ticker.symbol_type == "stock"
+            # only resample the candles needed, the first resampled candle can be
+            # incomplete
+            tail = archived.iloc[-(ticker.fetch_lookback + 1) * scale :]
+            if session:
+                # whole sessions, the candles are aligned on the session open
+                tail = archived.loc[tail.index[0].normalize() :]  # type: ignore
+            archived = resample_ohlcv(tail, ticker._interval_dt, session=session)
+            archived = archived.iloc[1:]
+        if len(archived) < ticker.fetch_lookback:
+            return None
+        return archived.iloc[-ticker.fetch_lookback :]
+
+    def _keys(self) -> List[StoreKey]:
+        """The keys to backfill, those serving the registered tickers first."""
+        keys = []
+        for ticker in self.tickers:
+            base = self.base_interval(ticker.symbol_type, ticker.interval)
+            if base is not None:
+                keys.append((ticker.symbol_type, ticker.symbol, base))
+        for ticker in self.tickers:
+            for interval in ARCHIVE_SPANS[ticker.symbol_type]:
+                keys.append((ticker.symbol_type, ticker.symbol, interval))
+        return list(dict.fromkeys(keys))
+
+    def start(self) -> None:
+        """Start backfilling, in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.done.clear()
+        self._thread = threading.Thread(target=self._run, name="backfill", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop backfilling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        for key in self._keys():
+            if self._stop.is_set():
+                break
+            try:
+                self.backfill(key)
+            except Exception as exc:
+                LOGGER.warning("Failed to backfill %s: %s", key, exc)
+        self.done.set()
 
 
 class Ticker:
@@ -172,6 +742,16 @@ class Ticker:
         interval: Data time interval.
         lookback: How many intervals to look back.
         wait_time: Time to wait in between API calls.
+        store: `CandleStore` in which to keep the fetched candles, when provided only
+            the candles newer than the last stored candle are fetched.
+        batch: `StockBatch` through which to download the stock data.
+        quotes: `CryptoQuotes` from which to get the current crypto price.
+        stream: `PriceStream` pushing the crypto prices, once the candles are fetched
+            they are updated from the streamed prices, without polling.
+        replay: `Replay` with which to record the ticks, or to replay recorded ticks
+            instead of fetching.
+        backfill: `Backfill` from whose archive to serve the candles, once it covers
+            the lookback.
         **kwargs: Extra args are provided to the `Display.plot` method.
     """
 
@@ -183,6 +763,12 @@ class Ticker:
         interval: str = "1d",
         lookback: Optional[int] = None,
         wait_time: Optional[int] = None,
+        store: Optional[CandleStore] = None,
+        batch: Optional[StockBatch] = None,
+        quotes: Optional[CryptoQuotes] = None,
+        stream: Optional[PriceStream] = None,
+        replay: Optional[Replay] = None,
+        backfill: Optional[Backfill] = None,
         **kwargs,
     ) -> None:
         self._log = logging.getLogger(__name__)
@@ -199,8 +785,6 @@ class Ticker:
         if self.symbol_type == "crypto" and api_key is None:
             raise ValueError("No API key provided.")
         self.api_key = api_key
-        if self.api_key is not None:
-            cryptocompare.cryptocompare._set_api_key_parameter(self.api_key)
         self.symbol = symbol
         if lookback is None:
             self._log.debug("lookback None")
@@ -209,11 +793,55 @@ class Ticker:
             self._log.debug("lookback not None")
             self.lookback = lookback  # type: int
         self._log.debug("lookback: %s", self.lookback)
+        # how many candles to fetch, can be larger than lookback when this ticker is the
+        # source of the candles of other tickers
+        self.fetch_lookback = self.lookback
         if wait_time is None:
             self.wait_time = int(self._interval_dt.value * 1e-9)
         else:
             self.wait_time = wait_time  # type: int
         self._log.debug("wait_time: %s", self.wait_time)
+        self.store = store
+        self.batch = batch
+        if self.batch is not None and self.symbol_type == "stock":
+            self.batch.register(self)
+        self.quotes = quotes
+        if self.quotes is not None and self.symbol_type == "crypto":
+            self.quotes.register(self.symbol)
+        # the ticker from which to derive this ticker's candles, see `Sequence`
+        self.source: Optional["Ticker"] = None
+        # the last lookback candles, the responses are copies of it
+        self._candles = CandleRing(self.lookback)
+        self._candles_lock = threading.Lock()
+        # the streamed candles are aligned on the epoch, which doesn't work for the
+        # weekly and monthly candles
+        self.stream = (
+            stream
+            if self.symbol_type == "crypto"
+            and self._interval_dt <= pd.to_timedelta("1d")
+            else None
+        )
+        if self.stream is not None:
+            self.stream.subscribe(self)
+        # whether the candles are kept up to date by the stream
+        self.stream_synced = False
+        self._stream_price: Optional[float] = None
+        self._shown_price: Optional[float] = None
+        self._price_moved = threading.Event()
+        self.replay = replay
+        self.backfill = backfill
+        if self.backfill is not None:
+            self.backfill.register(self)
+        # the last response shown, displayed again when a fetch fails
+        self.last_response: Optional[Response] = None
+        # the time, the full candles and the current price of the last fetch
+        self._fetched: Optional[
+            Tuple[pd.Timestamp, pd.DataFrame, Optional[float]]
+        ] = None
+        # the source's fetch from which the candles were last derived
+        self._derived_from: Optional[
+            Tuple[pd.Timestamp, pd.DataFrame, Optional[float]]
+        ] = None
         self._symbol_type_map: Dict[str, Callable] = {
             "crypto": self._tick_crypto,
             "stock": self._tick_stock,
@@ -227,16 +855,202 @@ class Ticker:
         Returns:
             The response from the API.
         """
+        if self.replay is not None:
+            return self.replay.wrap(self, self._tick_function)
+        return self._tick_function
+
+    @property
+    def _tick_function(self) -> Callable[[], Response]:
+        if self.source is not None:
+            return self._tick_derived
+        if self.stream is not None and self.stream_synced:
+            return self._tick_stream
         return self._symbol_type_map[self.symbol_type]
 
+    def derive_lookback(self, target: "Ticker") -> Optional[int]:
+        """How many candles this ticker needs to fetch to derive the target's candles.
+
+        Args:
+            target: a `Ticker` with the same symbol and a coarser interval.
+
+        Returns:
+            The number of candles, or None if the target's candles can't be derived from
+                this ticker's candles.
+        """
+        if (
+            target.symbol_type != self.symbol_type
+            or target.symbol != self.symbol
+            or target._interval_dt % self._interval_dt != pd.Timedelta(0)
+            or target.interval in YFINANCE_NON_STANDARD_INTERVALS
+        ):
+            return None
+        scale = int(target._interval_dt / self._interval_dt)
+        if self.symbol_type == "crypto":
+            # one extra candle as the first resampled candle can be incomplete
+            lookback = scale * (target.lookback + 1)
+            if lookback * _crypto_interval(self._interval_dt)[1] > CRYPTO_MAX_LOOKBACK:
+                return None
+            return lookback
+        # stock candles only cover the trading sessions
+        if self._interval_dt >= pd.to_timedelta("1d") or target.interval == "5d":
+            return None
+        if target._interval_dt >= pd.to_timedelta("1d"):
+            scale = int(np.ceil(SESSION_DURATION / self._interval_dt))
+        lookback = scale * (target.lookback + 1)
+        # roughly convert the trading days to calendar days
+        n_days = lookback * self._interval_dt / SESSION_DURATION * 7 / 5
+        if n_days > YFINANCE_INTRADAY_MAX_DAYS[self.interval]:
+            return None
+        return lookback
+
+    @property
+    def _store_key(self) -> StoreKey:
+        return (self.symbol_type, self.symbol, self.interval)
+
+    def _stored(self) -> Optional[pd.DataFrame]:
+        """The stored candles, if they can be topped up with an incremental fetch.
+
+        Returns:
+            The stored candles, or None if a full fetch is required.
+        """
+        if self.store is None:
+            return None
+        stored = self.store.get(self._store_key)
+        if stored is None or len(stored) < self.fetch_lookback:
+            return None
+        if utils.now() - stored.index[-1] > self._interval_dt * self.fetch_lookback:
+            # a full fetch would not be any larger
+            return None
+        return stored
+
+    def _merge_stored(self, historical: pd.DataFrame) -> pd.DataFrame:
+        """Merge the fetched candles with the stored candles."""
+        if self.store is not None and not historical.empty:
+            historical = self.store.update(
+                self._store_key, historical, max_length=self.fetch_lookback
+            )
+        return historical
+
+    def _archived(self) -> Optional[pd.DataFrame]:
+        """The candles served from the backfilled archive.
+
+        Returns:
+            The candles, or None if they need to be downloaded.
+        """
+        if self.backfill is None:
+            return None
+        historical = self.backfill.serve(self)
+        if historical is not None:
+            self._log.debug("served from the archive")
+        return historical
+
     def _current_price_fallback(
         self, historical: pd.DataFrame, current_price: Optional[float]
     ) -> Response:
+        self._fetched = (utils.now(), historical, current_price)
+        with self._candles_lock:
+            # only the last lookback candles are kept
+            self._candles.update(
+                Candles.from_dataframe(historical.iloc[-self.lookback :])
+            )
+            # the next update, the stream or a concurrent tick modify the candles in
+            # place, while the response is being displayed
+            candles = self._candles.view().copy()
+            if self.stream is not None:
+                self.stream_synced = self.stream.is_connected
         return Response(
-            historical,
+            candles,
             historical.iloc[-1]["Close"] if current_price is None else current_price,
         )
 
+    def on_trade(self, timestamp: float, price: float, volume: float) -> None:
+        """Update the candles with a streamed trade.
+
+        Args:
+            timestamp: the unix timestamp of the trade, in seconds.
+            price: the trade price.
+            volume: the trade volume.
+        """
+        interval_ns = self._interval_dt.value
+        timestamp_ns = int(timestamp * 1e9)
+        candle_timestamp = timestamp_ns - timestamp_ns % interval_ns
+        with self._candles_lock:
+            if len(self._candles) == 0:
+                # not fetched yet
+                return
+            last = self._candles.view()[-1]
+            if candle_timestamp < last.timestamps[0]:
+                return
+            if candle_timestamp == last.timestamps[0]:
+                open_, high, low, _, candle_volume = last.values[0]
+                values = [open_, max(high, price), min(low, price), price]
+                values.append(candle_volume + volume)
+            else:
+                values = [price, price, price, price, volume]
+            self._candles.update(
+                Candles(
+                    np.array([candle_timestamp]),
+                    np.array([values], dtype=np.float32),
+                    last.tz,
+                )
+            )
+            self._stream_price = price
+        shown = self._shown_price
+        if (
+            self.stream is not None
+            and shown
+            and abs(price - shown) / shown >= self.stream.move_threshold
+        ):
+            self._price_moved.set()
+
+    def _tick_stream(self) -> Response:
+        """Read the candles kept up to date by the stream.
+
+        The streamed candles are merged into the last fetch, which the derived tickers
+        share.
+
+        Returns:
+            The streamed candles and price.
+        """
+        self._log.info("Stream tick.")
+        with self._candles_lock:
+            candles = self._candles.view().copy()
+            price = self._stream_price
+        historical = candles.to_dataframe()
+        if self._fetched is not None:
+            # the fetch goes further back than the streamed candles
+            historical = pd.concat([self._fetched[1], historical])
+            historical = historical[
+                ~historical.index.duplicated(keep="last")
+            ].sort_index()
+        self._fetched = (utils.now(), historical.iloc[-self.fetch_lookback :], price)
+        return Response(candles, float(candles.close[-1]) if price is None else price)
+
+    def shown(self, price: float) -> None:
+        """The ticker is displayed, at this price."""
+        self._shown_price = price
+        self._price_moved.clear()
+
+    def wait_for_move(self, timeout: float) -> bool:
+        """Wait for the streamed price to move away from the displayed price.
+
+        Args:
+            timeout: the maximum time to wait, in seconds.
+
+        Returns:
+            True if the price moved more than the stream's threshold, False if the
+                timeout expired.
+        """
+        if timeout <= 0:
+            return False
+        if self.stream is None or not self.stream_synced:
+            get_clock().sleep(timeout)
+            return False
+        if get_clock().wait(self._price_moved, timeout):
+            self._price_moved.clear()
+            return True
+        return False
+
     def _tick_crypto(self) -> Response:
         """Query the crypto API.
 
@@ -244,25 +1058,56 @@ class Ticker:
             The response from the API.
         """
         self._log.info("Crypto tick.")
-        historical = get_cryptocompare(self.symbol, self._interval_dt, self.lookback)
-        current = cryptocompare.get_price(self.symbol, CRYPTO_CURRENCY)
-        if current is not None:
-            current_price = current[self.symbol][CRYPTO_CURRENCY]
+        historical = self._archived()
+        if historical is None:
+            lookback = self.fetch_lookback
+            stored = self._stored()
+            if stored is not None:
+                # only fetch the candles since the last stored candle, and the one
+                # before it, the first resampled candle can be incomplete and gets
+                # dropped
+                n_new = int((utils.now() - stored.index[-1]) // self._interval_dt)
+                lookback = min(n_new + 2, self.fetch_lookback)
+                self._log.debug("incremental lookback: %s", lookback)
+            historical = get_cryptocompare(
+                self.symbol, self._interval_dt, lookback, api_key=self.api_key
+            )
+            historical = self._merge_stored(historical)
+        if self.quotes is not None:
+            current_price = self.quotes.get(self.symbol)
         else:
-            current_price = None
+            try:
+                current = providers.cryptocompare_price(
+                    [self.symbol], CRYPTO_CURRENCY, api_key=self.api_key
+                )
+                current_price = current[self.symbol][CRYPTO_CURRENCY]
+            except Exception as exc:
+                self._log.warning("Failed to fetch %s price: %s", self.symbol, exc)
+                current_price = None
 
         return self._current_price_fallback(historical, current_price)
 
     def _get_yfinance_start_end(self) -> Tuple[pd.Timestamp, pd.Timestamp]:
         end = utils.now()
+        stored = self._stored()
+        if stored is not None:
+            # refetch the last stored candle, it might have been incomplete
+            return (stored.index[-1], end)  # type: ignore
+        exchange = trading_calendar.get_exchange(self.symbol)
+        if exchange is not None:
+            # the exact range, based on the exchange's trading sessions
+            start = exchange.start_for_lookback(
+                end, self._interval_dt, self.fetch_lookback
+            )
+            return (start, end)
         # depending on the interval we need to increase the time range to compensate for the market
         # being closed
-        start = end - self._interval_dt * self.lookback
+        start = end - self._interval_dt * self.fetch_lookback
         if self._interval_dt < pd.to_timedelta("1d"):
             # to compensate for the market being closed
             # US market is open 6.5h a day, probably roughly the same for other markets
             n_trade_days = (
-                self._interval_dt * self.lookback // pd.to_timedelta("6.5h") + 1
+                self._interval_dt * self.fetch_lookback // SESSION_DURATION + 1
             )
             start -= pd.to_timedelta("1d") * n_trade_days
         # if we passed a weekend, add 2 days and a bit more because the added days can themselves
@@ -288,30 +1133,59 @@ class Ticker:
         self._log.debug("lookback: %s", self.lookback)
         self._log.debug("start: %s", start)
         self._log.debug("end: %s", end)
-        current_price_data: pd.DataFrame = yfinance.download(
-            self.symbol,
-            start=end - pd.to_timedelta("2m"),
-            end=end,
-            interval="1m",
-        )
-        historical: pd.DataFrame = yfinance.download(
-            self.symbol,
-            start=start,
-            end=end,
-            interval=self.interval,
-            timeout=None,  # type: ignore
-        )
+        archived = self._archived()
+        if self.batch is not None:
+            current_price_data = self.batch.current(self)
+            historical = self.batch.historical(self) if archived is None else archived
+        else:
+            current_price_data = providers.yfinance_download(
+                self.symbol,
+                start=end - pd.to_timedelta("2m"),
+                end=end,
+                interval="1m",
+            )
+            historical = (
+                providers.yfinance_download(
+                    self.symbol,
+                    start=start,
+                    end=end,
+                    interval=self.interval,
+                )
+                if archived is None
+                else archived
+            )
         if historical.empty:
             raise ValueError("No historical data returned from yfinance API.")
         if not current_price_data.empty:
             current_price = current_price_data.iloc[-1]["Close"]
         else:
             current_price = None
-        # drop the extra data
-        if len(historical) > self.lookback:
-            historical = historical.iloc[-self.lookback :]
-        if historical.index.tzinfo is None:  # type: ignore
-            historical.index = historical.index.tz_localize("utc")  # type: ignore
+        if archived is None:
+            if historical.index.tzinfo is None:  # type: ignore
+                historical.index = historical.index.tz_localize("utc")  # type: ignore
+            historical = self._merge_stored(historical)
+        return self._current_price_fallback(historical, current_price)
+
+    def _tick_derived(self) -> Response:
+        """Derive the candles from the source ticker's finer candles.
+
+        The source ticker's last fetch is shared by the tickers derived from it, the
+        source only fetches again when this ticker already derived from its last fetch.
+
+        Returns:
+            The response.
+        """
+        self._log.info("Derived tick.")
+        source: Ticker = self.source  # type: ignore
+        if source._fetched is None or source._fetched is self._derived_from:
+            # not through `single_tick`, only the displayed ticks are recorded
+            source._tick_function()
+        self._derived_from = source._fetched
+        _, historical, current_price = source._fetched  # type: ignore
+        if self._interval_dt != source._interval_dt:
+            historical = resample_ohlcv(
+                historical, self._interval_dt, session=self.symbol_type == "stock"
+            )
         return self._current_price_fallback(historical, current_price)
 
     def tick(self) -> Iterator[Response]:
@@ -324,7 +1198,7 @@ class Ticker:
             self._log.info("Ticker start.")
             yield self.single_tick()
             self._log.debug("Sleeping %i s", self.wait_time)
-            time.sleep(self.wait_time)
+            get_clock().sleep(self.wait_time)
 
     def __str__(self) -> str:
         return "\t".join(
@@ -338,6 +1212,82 @@ class Ticker:
         )
 
 
+class DeadlineExceeded(TimeoutError):
+    """A tick didn't complete before its deadline."""
+
+
+class FanOut:
+    """Refreshes the tickers' data concurrently, in a bounded thread pool.
+
+    Each `refresh` refetches, in the background, the tickers whose last fetch is older
+    than their wait time, so all the tickers' data stays about as fresh, however many
+    tickers there are.
+
+    Args:
+        fetch: the function fetching a ticker's data, returns None if the ticker should
+            be skipped.
+        tickers: the `Ticker` instances.
+        concurrency: the maximum number of concurrent fetches.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Ticker], Optional[Response]],
+        tickers: List[Ticker],
+        concurrency: int,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("'concurrency' must be at least 1.")
+        self.fetch = fetch
+        self.tickers = tickers
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="fan-out"
+        )
+        # the last completed fetch, the fetch in flight and when it was submitted
+        self._done: List[Optional[Future]] = [None] * len(tickers)
+        self._pending: List[Optional[Future]] = [None] * len(tickers)
+        self._submitted: List[Optional[float]] = [None] * len(tickers)
+
+    def refresh(self) -> None:
+        """Refetch the tickers whose data is older than their wait time."""
+        now = get_clock().monotonic()
+        for i, ticker in enumerate(self.tickers):
+            pending = self._pending[i]
+            if pending is not None:
+                if not pending.done():
+                    continue
+                self._done[i] = pending
+                self._pending[i] = None
+            submitted = self._submitted[i]
+            if submitted is not None and now - submitted < ticker.wait_time:
+                continue
+            self._submitted[i] = now
+            self._pending[i] = self._executor.submit(self.fetch, ticker)
+
+    def get(self, index: int) -> Optional[Response]:
+        """The freshest data of a ticker.
+
+        Args:
+            index: the index of the ticker.
+
+        Returns:
+            The response of the last completed fetch, waiting for the first fetch to
+                complete.
+        """
+        pending = self._pending[index]
+        if pending is not None and (pending.done() or self._done[index] is None):
+            self._done[index] = pending
+            self._pending[index] = None
+        done = self._done[index]
+        if done is None:
+            # never submitted
+            return self.fetch(self.tickers[index])
+        return done.result()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
 class Sequence:
     @classmethod
     def from_tinyticker_config(cls, tt_config: TinytickerConfig) -> "Sequence":
@@ -349,6 +1299,46 @@ class Sequence:
         Returns:
             The `Sequence` instance.
         """
+        providers.configure_rate_limits(tt_config.rate_limits)
+        replay_config = tt_config.replay
+        replay = (
+            Replay(
+                replay_config.mode,
+                directory=(
+                    REPLAY_DIR
+                    if replay_config.directory is None
+                    else Path(replay_config.directory)
+                ),
+                latency=replay_config.latency,
+            )
+            if replay_config.mode is not None
+            else None
+        )
+        replaying = replay is not None and replay.mode == "replay"
+        store = CandleStore()
+        batch = StockBatch()
+        quotes = CryptoQuotes(api_key=tt_config.api_key)
+        stream = (
+            PriceStream(
+                api_key=tt_config.api_key,
+                move_threshold=tt_config.sequence.stream_threshold,
+            )
+            if tt_config.sequence.stream and not replaying
+            else None
+        )
+        archive_config = tt_config.archive
+        backfill = (
+            Backfill(
+                CandleArchive(
+                    ARCHIVE_DIR
+                    if archive_config.directory is None
+                    else Path(archive_config.directory)
+                ),
+                api_key=tt_config.api_key,
+            )
+            if archive_config.backfill and not replaying
+            else None
+        )
         return Sequence(
             [
                 Ticker(
@@ -361,11 +1351,25 @@ class Sequence:
                     plot_type=ticker.plot_type,
                     mav=ticker.mav,
                     volume=ticker.volume,
+                    store=store,
+                    batch=batch,
+                    quotes=quotes,
+                    stream=stream,
+                    replay=replay,
+                    backfill=backfill,
                 )
                 for ticker in tt_config.tickers
             ],
             skip_empty=tt_config.sequence.skip_empty,
-            skip_outdated=tt_config.sequence.skip_outdated,
+            # the replayed candles are outdated
+            skip_outdated=tt_config.sequence.skip_outdated and not replaying,
+            prefetch=tt_config.sequence.prefetch,
+            resample=tt_config.sequence.resample,
+            stream=stream,
+            concurrency=tt_config.sequence.concurrency,
+            fetch_timeout=tt_config.sequence.fetch_timeout,
+            cycle_timeout=tt_config.sequence.cycle_timeout,
+            backfill=backfill,
         )
 
     def __init__(
@@ -373,6 +1377,13 @@ class Sequence:
         tickers: List[Ticker],
         skip_empty: bool = True,
         skip_outdated: bool = True,
+        prefetch: bool = False,
+        resample: bool = True,
+        stream: Optional[PriceStream] = None,
+        concurrency: int = 1,
+        fetch_timeout: Optional[float] = None,
+        cycle_timeout: Optional[float] = None,
+        backfill: Optional[Backfill] = None,
     ):
         """Runs multiple `Ticker` instances in sequence.
 
@@ -381,12 +1392,259 @@ class Sequence:
             skip_empty: if the response doesn't contain any data, move on to the next ticker.
             skip_outdated: if the last candle of the response is too old, move on to the next
                 ticker. This typically happens when the stock market closes.
+            prefetch: fetch the next ticker's data in the background, while waiting on the
+                current ticker.
+            resample: when the same symbol is used at multiple intervals, only fetch the
+                finest interval and derive the coarser intervals' candles from it.
+            stream: `PriceStream` of the tickers, started with the sequence. The
+                displayed ticker is refreshed as soon as its streamed price moves.
+            concurrency: when larger than 1, all the tickers are refreshed in the
+                background, with up to `concurrency` concurrent fetches, and the
+                tickers are displayed with their freshest data, see `FanOut`.
+                `prefetch` is then ignored.
+            fetch_timeout: the deadline of a ticker's fetch, in seconds. A fetch which
+                doesn't complete in time is abandoned, and the ticker's last response
+                is shown instead, marked as stale. None, the default, for no deadline.
+            cycle_timeout: the time budget, in seconds, to find the next ticker to
+                display, including the fetches of the skipped tickers. Once it is spent,
+                the remaining tickers aren't fetched and show their last responses.
+                None, the default, for no budget.
+            backfill: `Backfill` of the tickers' archive, started with the sequence.
         """
         if len(tickers) == 0:
             raise ValueError("No tickers provided.")
         self.tickers = tickers
         self.skip_empty = skip_empty
         self.skip_outdated = skip_outdated
+        self.prefetch = prefetch
+        self.resample = resample
+        self.stream = stream
+        if concurrency < 1:
+            raise ValueError("'concurrency' must be at least 1.")
+        self.concurrency = concurrency
+        self.fetch_timeout = fetch_timeout
+        self.cycle_timeout = cycle_timeout
+        self.backfill = backfill
+        # the ticks which exceeded their deadline and are still running, shared by the
+        # prefetch and fan-out threads
+        self._abandoned: Dict[Ticker, Future] = {}
+        self._abandoned_lock = threading.Lock()
+        # runs the deadline bound ticks, a ticker has at most one tick running
+        self._tick_executor: Optional[ThreadPoolExecutor] = None
+        if self.resample:
+            self._link_sources()
+
+    def _link_sources(self) -> None:
+        """Derive the candles of the coarser intervals from the finest interval."""
+        symbol_tickers: Dict[Tuple[str, str], List[Ticker]] = {}
+        for ticker in self.tickers:
+            symbol_tickers.setdefault((ticker.symbol_type, ticker.symbol), []).append(
+                ticker
+            )
+        for tickers in symbol_tickers.values():
+            source, *targets = sorted(tickers, key=lambda ticker: ticker._interval_dt)
+            for target in targets:
+                fetch_lookback = source.derive_lookback(target)
+                if fetch_lookback is None:
+                    continue
+                LOGGER.debug(f"{target} derived from {source}")
+                target.source = source
+                source.fetch_lookback = max(source.fetch_lookback, fetch_lookback)
+
+    @staticmethod
+    def _outdated_min_delta(ticker: Ticker) -> pd.Timedelta:
+        """The age after which a ticker's last candle is considered outdated."""
+        # we want to skip the ticker if the last candle is too old, but because running
+        # this code takes some time, we relax the min constraint a bit.
+        outdated_min_delta = max(pd.to_timedelta("5m"), ticker._interval_dt)
+        # when fetching daily data from yfinance, the timestamps are 00:00:00 of the day in question
+        # which covers the full day's trade from open to close, so we relax the outdated constraint.
+        if outdated_min_delta == pd.to_timedelta("1d"):
+            outdated_min_delta *= 2
+        return outdated_min_delta
+
+    def _closed_until(self, ticker: Ticker) -> Optional[pd.Timestamp]:
+        """When a ticker's market closure ends, if it would be skipped as outdated.
+
+        Args:
+            ticker: the `Ticker` to check.
+
+        Returns:
+            The next session open, or None if the ticker should be fetched.
+        """
+        if not self.skip_outdated or ticker.symbol_type != "stock":
+            return None
+        exchange = trading_calendar.get_exchange(ticker.symbol)
+        if exchange is None:
+            return None
+        now = utils.now()
+        if exchange.is_open(now):
+            return None
+        # the last candle is at most as recent as the last close
+        if now - exchange.previous_close(now) <= self._outdated_min_delta(ticker):
+            return None
+        return exchange.next_open(now)
+
+    def _timeout(self, deadline: Optional[float]) -> Optional[float]:
+        """The time left for a fetch, in seconds.
+
+        Args:
+            deadline: the `Clock.monotonic` deadline of the cycle.
+
+        Returns:
+            The smallest of `fetch_timeout` and the time left until the deadline, None
+                if there is neither.
+        """
+        timeouts = [self.fetch_timeout]
+        if deadline is not None:
+            timeouts.append(deadline - get_clock().monotonic())
+        return min(
+            (timeout for timeout in timeouts if timeout is not None), default=None
+        )
+
+    def _tick(self, ticker: Ticker, timeout: Optional[float]) -> Response:
+        """Tick a ticker, within a deadline.
+
+        The tick runs in a bounded thread pool. When the deadline passes it is
+        cancelled if it didn't start yet, otherwise it is abandoned: its result is
+        discarded, and the ticker isn't ticked again until it completes, so hung
+        requests don't pile up threads.
+
+        Args:
+            ticker: the `Ticker` to tick.
+            timeout: the time allowed for the tick, in seconds, None for no deadline.
+
+        Returns:
+            The response from the API.
+
+        Raises:
+            DeadlineExceeded: if the tick didn't complete in time, or if the previous
+                tick is still running.
+        """
+        if timeout is None:
+            return ticker.single_tick()
+        with self._abandoned_lock:
+            abandoned = self._abandoned.get(ticker, None)
+            if abandoned is not None:
+                if not abandoned.done():
+                    raise DeadlineExceeded("previous tick still running.")
+                del self._abandoned[ticker]
+            if timeout <= 0:
+                raise DeadlineExceeded("not ticked, the cycle's budget is spent.")
+            if self._tick_executor is None:
+                self._tick_executor = ThreadPoolExecutor(
+                    max_workers=len(self.tickers), thread_name_prefix="tick"
+                )
+            future = self._tick_executor.submit(ticker.single_tick)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise DeadlineExceeded(
+                    f"tick not started after {timeout:.1f}s."
+                ) from None
+            with self._abandoned_lock:
+                self._abandoned[ticker] = future
+            raise DeadlineExceeded(f"tick abandoned after {timeout:.1f}s.") from None
+
+    def _fetch(
+        self, ticker: Ticker, deadline: Optional[float] = None
+    ) -> Optional[Response]:
+        """Fetch a ticker's data.
+
+        Args:
+            ticker: the `Ticker` to fetch.
+            deadline: the `Clock.monotonic` deadline of the cycle.
+
+        Returns:
+            The response from the API, or None if the ticker should be skipped. If the
+                fetch fails, the ticker's last response, marked as stale.
+        """
+        try:
+            response = self._tick(ticker, self._timeout(deadline))
+        except Exception as e:
+            LOGGER.error(f"{ticker} failed with {e}")
+            if ticker.last_response is None:
+                return None
+            # show the previous data while the provider is unavailable
+            return dc.replace(ticker.last_response, stale=True)
+        if self.skip_empty and (response.candles is None or response.candles.empty):
+            LOGGER.debug(f"{ticker} response empty, skipping.")
+            return None
+        if self.skip_outdated:
+            outdated_min_delta = self._outdated_min_delta(ticker)
+            last_candle_age = utils.now() - response.candles.last_timestamp
+            if last_candle_age > outdated_min_delta:
+                LOGGER.debug(f"{ticker} response outdated, skipping.")
+                return None
+        ticker.last_response = response
+        return response
+
+    def _fetch_open(
+        self, ticker: Ticker, deadline: Optional[float] = None
+    ) -> Optional[Response]:
+        """Fetch a ticker's data, unless its market is closed.
+
+        Args:
+            ticker: the `Ticker` to fetch.
+            deadline: the `Clock.monotonic` deadline of the cycle.
+
+        Returns:
+            The response from the API, or None if the ticker should be skipped.
+        """
+        closed_until = self._closed_until(ticker)
+        if closed_until is not None:
+            LOGGER.debug(f"{ticker} market closed until {closed_until}, skipping.")
+            return None
+        return self._fetch(ticker, deadline)
+
+    def _next(
+        self, index: int, fan_out: Optional[FanOut] = None
+    ) -> Optional[Tuple[int, Ticker, Response]]:
+        """Fetch the tickers, starting at `index`, until one isn't skipped.
+
+        Args:
+            index: the index of the first ticker to fetch.
+            fan_out: the `FanOut` from which to read the tickers' data, instead of
+                fetching it.
+
+        Returns:
+            The index of the ticker, the `Ticker` instance and the response from the API,
+                or None if all the tickers were skipped.
+        """
+        deadline = (
+            None
+            if self.cycle_timeout is None
+            else get_clock().monotonic() + self.cycle_timeout
+        )
+        for offset in range(len(self.tickers)):
+            i = (index + offset) % len(self.tickers)
+            if fan_out is not None:
+                response = fan_out.get(i)
+            else:
+                response = self._fetch_open(self.tickers[i], deadline)
+            if response is not None:
+                return (i, self.tickers[i], response)
+        return None
+
+    def _sleep_time(self, cooldown: float) -> float:
+        """How long to sleep when all the tickers were skipped.
+
+        Args:
+            cooldown: the sleep time when some tickers were skipped for reasons other
+                than their market being closed.
+
+        Returns:
+            The time to sleep, in seconds.
+        """
+        closed_until = [self._closed_until(ticker) for ticker in self.tickers]
+        opens = [open_ for open_ in closed_until if open_ is not None]
+        if not opens:
+            return cooldown
+        sleep_time = max((min(opens) - utils.now()).total_seconds(), 1)
+        if len(opens) < len(closed_until):
+            sleep_time = min(sleep_time, cooldown)
+        return sleep_time
 
     def start(self) -> Iterator[Tuple[Ticker, Response]]:
         """Start iterating through the tickers.
@@ -397,43 +1655,70 @@ class Sequence:
         # if all tickers are skipped, we want to sleep a bit
         all_skipped_cooldown = 300  # 5min
 
-        all_skipped = False
-        while True:
-            if all_skipped:
-                LOGGER.info(f"All tickers skipped, sleeping {all_skipped_cooldown}s.")
-                time.sleep(all_skipped_cooldown)
-            all_skipped = True
-            for ticker in self.tickers:
-                try:
-                    response = ticker.single_tick()
-                except Exception as e:
-                    LOGGER.error(f"{ticker} failed with {e}")
-                    continue
-                if self.skip_empty and (
-                    response.historical is None or response.historical.empty
-                ):
-                    LOGGER.debug(f"{ticker} response empty, skipping.")
+        fan_out = (
+            FanOut(self._fetch_open, self.tickers, self.concurrency)
+            if self.concurrency > 1
+            else None
+        )
+        executor = (
+            ThreadPoolExecutor(max_workers=1)
+            if self.prefetch and fan_out is None
+            else None
+        )
+        next_future: Optional[Future] = None
+        index = 0
+        if self.stream is not None:
+            self.stream.start()
+        if self.backfill is not None:
+            self.backfill.start()
+        try:
+            while True:
+                if next_future is not None:
+                    next_ = next_future.result()
+                    next_future = None
+                elif fan_out is not None:
+                    fan_out.refresh()
+                    next_ = self._next(index, fan_out)
+                else:
+                    next_ = self._next(index)
+                if next_ is None:
+                    # sleep until the next market open, if all the markets are closed
+                    sleep_time = self._sleep_time(all_skipped_cooldown)
+                    LOGGER.info(f"All tickers skipped, sleeping {sleep_time}s.")
+                    get_clock().sleep(sleep_time)
                     continue
-                if self.skip_outdated:
-                    # we want to skip the ticker if the last candle is too old, but because running
-                    # this code takes some time, we relax the min constraint a bit.
-                    outdated_min_delta = max(pd.to_timedelta("5m"), ticker._interval_dt)
-                    # when fetching daily data from yfinance, the timestamps are 00:00:00 of the day in question
-                    # which covers the full day's trade from open to close, so we relax the outdated constraint.
-                    if outdated_min_delta == pd.to_timedelta("1d"):
-                        outdated_min_delta *= 2
-                    if (
-                        (utils.now() - response.historical.index[-1])  # type: ignore
-                        > outdated_min_delta
-                    ):
-                        LOGGER.debug(f"{ticker} response outdated, skipping.")
-                        continue
-                all_skipped = False
+                index, ticker, response = next_
+                index = (index + 1) % len(self.tickers)
+                if executor is not None:
+                    # fetch the next ticker while the current one is displayed
+                    next_future = executor.submit(self._next, index)
+                ticker.shown(response.current_price)
                 yield (ticker, response)
-                time.sleep(ticker.wait_time)
+                # with a stream, the ticker is refreshed when its price moves
+                deadline = get_clock().monotonic() + ticker.wait_time
+                while ticker.wait_for_move(deadline - get_clock().monotonic()):
+                    refreshed = self._fetch(ticker)
+                    if refreshed is None:
+                        break
+                    ticker.shown(refreshed.current_price)
+                    yield (ticker, refreshed)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+            if fan_out is not None:
+                fan_out.shutdown()
+            with self._abandoned_lock:
+                if self._tick_executor is not None:
+                    self._tick_executor.shutdown(wait=False, cancel_futures=True)
+                    self._tick_executor = None
+            if self.stream is not None:
+                self.stream.stop()
+            if self.backfill is not None:
+                self.backfill.stop()
 
     def __str__(self):
         return (
-            f"Sequence(skip_outdated={self.skip_outdated}, skip_empty={self.skip_empty}): \n"
+            f"Sequence(skip_outdated={self.skip_outdated}, skip_empty={self.skip_empty}, "
+            + f"prefetch={self.prefetch}, concurrency={self.concurrency}): \n"
             + "\n".join([ticker.__str__() for ticker in self.tickers])
         )
@@ -0,0 +1,460 @@
+"""Trading sessions of the stock exchanges.
+
+Used to compute the smallest time range which still contains a given number of
+candles, and to know when the markets are open.
+"""
+
+import dataclasses as dc
+import datetime as dt
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+
+import pandas as pd
+
+# how far back to look for trading sessions before giving up
+MAX_LOOKBACK_DAYS = 5 * 366
+
+
+def easter(year: int) -> dt.date:
+    """Easter Sunday, using the anonymous Gregorian algorithm.
+
+    Args:
+        year: the year.
+
+    Returns:
+        The date of Easter Sunday.
+    """
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l_ = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l_) // 451
+    month, day = divmod(h + l_ - 7 * m + 114, 31)
+    return dt.date(year, month, day + 1)
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> dt.date:
+    """The nth weekday of a month, negative `n` counts from the end of the month.
+
+    Args:
+        year: the year.
+        month: the month.
+        weekday: the day of the week, 0 for Monday, 6 for Sunday.
+        n: which occurrence of the weekday, 1 for the first, -1 for the last.
+
+    Returns:
+        The date.
+    """
+    if n > 0:
+        first = dt.date(year, month, 1)
+        return first + dt.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (
+        dt.date(year + month // 12, month % 12 + 1, 1) - dt.timedelta(days=1)
+        if month != 12
+        else dt.date(year, 12, 31)
+    )
+    return last - dt.timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))
+
+
+def _observed(day: dt.date) -> dt.date:
+    """Move weekend holidays to the nearest weekday, US style."""
+    if day.weekday() == 5:
+        return day - dt.timedelta(days=1)
+    if day.weekday() == 6:
+        return day + dt.timedelta(days=1)
+    return day
+
+
+def _substitute(day: dt.date, taken: FrozenSet[dt.date] = frozenset()) -> dt.date:
+    """Move weekend holidays to the next free weekday, UK and Canada style."""
+    while day.weekday() >= 5 or day in taken:
+        day += dt.timedelta(days=1)
+    return day
+
+
+def nyse_holidays(year: int) -> FrozenSet[dt.date]:
+    """NYSE and NASDAQ holidays."""
+    holidays = {
+        nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        easter(year) - dt.timedelta(days=2),  # Good Friday
+        nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(dt.date(year, 7, 4)),  # Independence Day
+        nth_weekday(year, 9, 0, 1),  # Labor Day
+        nth_weekday(year, 11, 3, 4),  # Thanksgiving Day
+        _observed(dt.date(year, 12, 25)),  # Christmas Day
+    }
+    new_year = dt.date(year, 1, 1)
+    # the NYSE doesn't close on the Friday before when New Year's Day is a Saturday
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    if year >= 2022:
+        holidays.add(_observed(dt.date(year, 6, 19)))  # Juneteenth
+    return frozenset(holidays)
+
+
+def nyse_early_closes(year: int) -> Dict[dt.date, dt.time]:
+    """NYSE and NASDAQ half days."""
+    early_closes = {}
+    holidays = nyse_holidays(year)
+    for day in (
+        dt.date(year, 7, 3),  # Independence Day eve
+        nth_weekday(year, 11, 3, 4) + dt.timedelta(days=1),  # Black Friday
+        dt.date(year, 12, 24),  # Christmas Eve
+    ):
+        if day.weekday() < 5 and day not in holidays:
+            early_closes[day] = dt.time(13)
+    return early_closes
+
+
+def lse_holidays(year: int) -> FrozenSet[dt.date]:
+    """London Stock Exchange holidays."""
+    christmas = _substitute(dt.date(year, 12, 25))
+    boxing_day = _substitute(dt.date(year, 12, 26), frozenset({christmas}))
+    return frozenset(
+        {
+            _substitute(dt.date(year, 1, 1)),  # New Year's Day
+            easter(year) - dt.timedelta(days=2),  # Good Friday
+            easter(year) + dt.timedelta(days=1),  # Easter Monday
+            nth_weekday(year, 5, 0, 1),  # Early May bank holiday
+            nth_weekday(year, 5, 0, -1),  # Spring bank holiday
+            nth_weekday(year, 8, 0, -1),  # Summer bank holiday
+            christmas,
+            boxing_day,
+        }
+    )
+
+
+def lse_early_closes(year: int) -> Dict[dt.date, dt.time]:
+    """London Stock Exchange half days."""
+    return {
+        day: dt.time(12, 30)
+        for day in (dt.date(year, 12, 24), dt.date(year, 12, 31))
+        if day.weekday() < 5
+    }
+
+
+def xetra_holidays(year: int) -> FrozenSet[dt.date]:
+    """Deutsche Börse Xetra holidays."""
+    return frozenset(
+        {
+            dt.date(year, 1, 1),
+            easter(year) - dt.timedelta(days=2),  # Good Friday
+            easter(year) + dt.timedelta(days=1),  # Easter Monday
+            dt.date(year, 5, 1),  # Labour Day
+            dt.date(year, 12, 24),
+            dt.date(year, 12, 25),
+            dt.date(year, 12, 26),
+            dt.date(year, 12, 31),
+        }
+    )
+
+
+def euronext_holidays(year: int) -> FrozenSet[dt.date]:
+    """Euronext holidays."""
+    return frozenset(
+        {
+            dt.date(year, 1, 1),
+            easter(year) - dt.timedelta(days=2),  # Good Friday
+            easter(year) + dt.timedelta(days=1),  # Easter Monday
+            dt.date(year, 5, 1),  # Labour Day
+            dt.date(year, 12, 25),
+            dt.date(year, 12, 26),
+        }
+    )
+
+
+def euronext_early_closes(year: int) -> Dict[dt.date, dt.time]:
+    """Euronext half days."""
+    return {
+        day: dt.time(14, 5)
+        for day in (dt.date(year, 12, 24), dt.date(year, 12, 31))
+        if day.weekday() < 5
+    }
+
+
+def tsx_holidays(year: int) -> FrozenSet[dt.date]:
+    """Toronto Stock Exchange holidays."""
+    christmas = _substitute(dt.date(year, 12, 25))
+    boxing_day = _substitute(dt.date(year, 12, 26), frozenset({christmas}))
+    return frozenset(
+        {
+            _substitute(dt.date(year, 1, 1)),  # New Year's Day
+            nth_weekday(year, 2, 0, 3),  # Family Day
+            easter(year) - dt.timedelta(days=2),  # Good Friday
+            # Victoria Day, the Monday preceding May 25th
+            dt.date(year, 5, 24) - dt.timedelta(days=dt.date(year, 5, 24).weekday()),
+            _substitute(dt.date(year, 7, 1)),  # Canada Day
+            nth_weekday(year, 8, 0, 1),  # Civic Holiday
+            nth_weekday(year, 9, 0, 1),  # Labour Day
+            nth_weekday(year, 10, 0, 2),  # Thanksgiving Day
+            christmas,
+            boxing_day,
+        }
+    )
+
+
+def _no_early_closes(_: int) -> Dict[dt.date, dt.time]:
+    return {}
+
+
+@dc.dataclass(frozen=True)
+class Exchange:
+    """A stock exchange's trading sessions.
+
+    Args:
+        name: the exchange's name.
+        tz: the exchange's time zone.
+        open: the session open, local time.
+        close: the session close, local time.
+        holidays: returns the holidays of a year.
+        early_closes: returns the early closing times of a year.
+    """
+
+    name: str
+    tz: str
+    open: dt.time
+    close: dt.time
+    holidays: Callable[[int], FrozenSet[dt.date]]
+    early_closes: Callable[[int], Dict[dt.date, dt.time]] = _no_early_closes
+
+    def is_trading_day(self, day: dt.date) -> bool:
+        """Whether the exchange is open on a given day."""
+        return day.weekday() < 5 and day not in _holidays(self, day.year)
+
+    def session(self, day: dt.date) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """The trading session of a day.
+
+        Args:
+            day: the day, in the exchange's time zone.
+
+        Returns:
+            The session's open and close timestamps, or None if the exchange is closed.
+        """
+        if not self.is_trading_day(day):
+            return None
+        close = _early_closes(self, day.year).get(day, self.close)
+        return (
+            pd.Timestamp(dt.datetime.combine(day, self.open)).tz_localize(self.tz),
+            pd.Timestamp(dt.datetime.combine(day, close)).tz_localize(self.tz),
+        )
+
+    def start_for_lookback(
+        self, end: pd.Timestamp, interval_dt: pd.Timedelta, lookback: int
+    ) -> pd.Timestamp:
+        """The latest start timestamp which still yields `lookback` candles.
+
+        The intraday candles start at the session open and are spaced by `interval_dt`,
+        the daily candles are labeled with the day's midnight.
+
+        Args:
+            end: the end of the time range.
+            interval_dt: the candle interval.
+            lookback: the number of candles.
+
+        Returns:
+            The start of the time range.
+        """
+        if interval_dt > pd.to_timedelta("1d"):
+            # weekly and monthly candles are aligned on the calendar, add an extra
+            # interval to make up for the incomplete last candle
+            return end - interval_dt * (lookback + 1)
+        day = end.tz_convert(self.tz).date()
+        n_candles = 0
+        for _ in range(MAX_LOOKBACK_DAYS):
+            session = self.session(day)
+            if session is not None and session[0] < end:
+                open_, close = session
+                if interval_dt == pd.to_timedelta("1d"):
+                    n_day_candles = 1
+                else:
+                    n_day_candles = -(-(min(close, end) - open_) // interval_dt)
+                if n_candles + n_day_candles >= lookback:
+                    if interval_dt == pd.to_timedelta("1d"):
+                        return pd.Timestamp(day).tz_localize(self.tz)
+                    return open_ + interval_dt * (
+                        n_day_candles - (lookback - n_candles)
+                    )
+                n_candles += n_day_candles
+            day -= dt.timedelta(days=1)
+        raise ValueError(f"Could not find {lookback} candles in {self.name} sessions.")
+
+    def is_open(self, time: pd.Timestamp) -> bool:
+        """Whether the exchange is open at a given time."""
+        session = self.session(time.tz_convert(self.tz).date())
+        return session is not None and session[0] <= time < session[1]
+
+    def next_open(self, time: pd.Timestamp) -> pd.Timestamp:
+        """The open of the first session starting after `time`.
+
+        Args:
+            time: the reference time.
+
+        Returns:
+            The session open.
+        """
+        day = time.tz_convert(self.tz).date()
+        for _ in range(MAX_LOOKBACK_DAYS):
+            session = self.session(day)
+            if session is not None and session[0] > time:
+                return session[0]
+            day += dt.timedelta(days=1)
+        raise ValueError(f"Could not find the next {self.name} session.")
+
+    def previous_close(self, time: pd.Timestamp) -> pd.Timestamp:
+        """The close of the last session ended at `time`.
+
+        Args:
+            time: the reference time.
+
+        Returns:
+            The session close.
+        """
+        day = time.tz_convert(self.tz).date()
+        for _ in range(MAX_LOOKBACK_DAYS):
+            session = self.session(day)
+            if session is not None and session[1] <= time:
+                return session[1]
+            day -= dt.timedelta(days=1)
+        raise ValueError(f"Could not find the previous {self.name} session.")
+
+
+@lru_cache(maxsize=None)
+def _holidays(exchange: Exchange, year: int) -> FrozenSet[dt.date]:
+    return exchange.holidays(year)
+
+
+@lru_cache(maxsize=None)
+def _early_closes(exchange: Exchange, year: int) -> Dict[dt.date, dt.time]:
+    return exchange.early_closes(year)
+
+
+NYSE = Exchange(
+    "NYSE",
+    "America/New_York",
+    dt.time(9, 30),
+    dt.time(16),
+    nyse_holidays,
+    nyse_early_closes,
+)
+LSE = Exchange(
+    "LSE",
+    "Europe/London",
+    dt.time(8),
+    dt.time(16, 30),
+    lse_holidays,
+    lse_early_closes,
+)
+XETRA = Exchange(
+    "XETRA",
+    "Europe/Berlin",
+    dt.time(9),
+    dt.time(17, 30),
+    xetra_holidays,
+)
+EURONEXT = Exchange(
+    "Euronext",
+    "Europe/Paris",
+    dt.time(9),
+    dt.time(17, 30),
+    euronext_holidays,
+    euronext_early_closes,
+)
+TSX = Exchange(
+    "TSX",
+    "America/Toronto",
+    dt.time(9, 30),
+    dt.time(16),
+    tsx_holidays,
+)
+
+# yfinance symbol suffixes
+EXCHANGE_SUFFIXES: Dict[str, Exchange] = {
+    "": NYSE,
+    "L": LSE,
+    "DE": XETRA,
+    "F": XETRA,
+    "PA": EURONEXT,
+    "AS": EURONEXT,
+    "BR": EURONEXT,
+    "LS": EURONEXT,
+    "TO": TSX,
+    "V": TSX,
+}
+# the indices without a suffix which follow the NYSE sessions, the others, "^N225",
+# "^FTSE", ..., are computed during the sessions of their own exchange
+US_INDICES = frozenset(
+    {
+        "^GSPC",
+        "^SPX",
+        "^DJI",
+        "^DJT",
+        "^DJU",
+        "^IXIC",
+        "^NDX",
+        "^NYA",
+        "^RUT",
+        "^OEX",
+        "^SOX",
+        "^XAX",
+    }
+)
+# the quote currencies of the yfinance "BTC-EUR" like pairs, traded around the clock,
+# a "-" is otherwise a share class, "BRK-B"
+PAIR_CURRENCIES = frozenset(
+    {
+        "USD",
+        "EUR",
+        "GBP",
+        "JPY",
+        "CHF",
+        "CAD",
+        "AUD",
+        "NZD",
+        "CNY",
+        "HKD",
+        "SGD",
+        "KRW",
+        "INR",
+        "BRL",
+        "RUB",
+        "TRY",
+        "ZAR",
+        "MXN",
+        "SEK",
+        "NOK",
+        "DKK",
+        "PLN",
+        "USDT",
+        "USDC",
+        "BUSD",
+        "DAI",
+        "BTC",
+        "ETH",
+        "BNB",
+    }
+)
+
+
+def get_exchange(symbol: str) -> Optional[Exchange]:
+    """Get the exchange of a yfinance stock symbol.
+
+    Args:
+        symbol: the yfinance symbol, "AAPL", "^GSPC", "VOD.L", ...
+
+    Returns:
+        The `Exchange`, or None if it isn't known, or if the symbol isn't traded in
+            sessions, e.g. currencies, futures or crypto.
+    """
+    if "=" in symbol:
+        return None
+    if "-" in symbol and symbol.rsplit("-", 1)[1].upper() in PAIR_CURRENCIES:
+        return None
+    if symbol.startswith("^"):
+        return NYSE if symbol.upper() in US_INDICES else None
+    suffix = symbol.rsplit(".", 1)[1] if "." in symbol else ""
+    return EXCHANGE_SUFFIXES.get(suffix.upper(), None)
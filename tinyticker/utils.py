@@ -9,6 +9,8 @@ import qrcode
 from packaging.version import Version
 from PIL import Image, ImageChops
 
+from .clock import get_clock
+
 
 def dashboard_qrcode(epd_width: int, epd_height: int, port: int = 8000) -> Image.Image:
     """Generate a qrcode pointing to the dashboard url.
@@ -78,9 +80,8 @@ def check_for_update(current_version: str, **kwargs) -> bool:
 
 
 def now() -> pd.Timestamp:
-    """Return the current timestamp."""
-    return pd.to_datetime("now", utc=True)
-    # return datetime.now(timezone.utc)
+    """Return the current timestamp, of the process wide `clock.Clock`."""
+    return get_clock().now()
 
 
 def set_verbosity(logger: logging.Logger, verbosity: int) -> logging.Logger:
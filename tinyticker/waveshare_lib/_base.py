@@ -1,6 +1,7 @@
 from abc import abstractmethod
-from typing import Literal, Optional
+from typing import Literal, Optional, Tuple
 
+import numpy as np
 from PIL import Image
 
 
@@ -28,6 +29,42 @@ class EPDBase:
     def sleep(self) -> None:
         ...
 
+    def orient(self, frame: np.ndarray) -> np.ndarray:
+        """Orient a frame as the panel's rows, as `getbuffer` orients its image.
+
+        A landscape frame is rotated by 90 degrees counterclockwise to the panel's
+        portrait orientation.
+
+        Args:
+            frame: the (height, width, ...) array of the frame's pixels.
+
+        Returns:
+            A view of the frame in the panel's orientation.
+        """
+        if frame.shape[:2] == (self.height, self.width):
+            return frame
+        if frame.shape[:2] == (self.width, self.height):
+            return np.rot90(frame)
+        raise ValueError(f"Wrong frame dimensions: must be {self.width}x{self.height}")
+
+    def pack(self, ink: np.ndarray) -> bytearray:
+        """Pack the black pixels of a frame into the panel's buffer.
+
+        Produces the buffer `getbuffer` produces from the frame's mode "1" image: a
+        bit per pixel, set for the white pixels, most significant bit first, in rows
+        of whole bytes.
+
+        Args:
+            ink: boolean array of the frame's black pixels, in the panel's
+                orientation, see `orient`.
+
+        Returns:
+            The buffer to send to the panel.
+        """
+        buffer = np.packbits(ink, axis=1)
+        np.invert(buffer, out=buffer)
+        return bytearray(buffer)
+
 
 class EPDMonochrome(EPDBase):
     """EPD with only black and white color"""
@@ -44,6 +81,23 @@ class EPDHighlight(EPDBase):
     def display(self, imageblack: bytearray, highlights: Optional[bytearray]) -> None:
         ...
 
+    def pack_planes(self, planes: np.ndarray) -> Tuple[bytearray, bytearray]:
+        """Pack the black and the highlighted pixels of a frame into the panel's buffers.
+
+        Both planes are packed at once, as `pack` packs a plane.
+
+        Args:
+            planes: (2, height, width) boolean array, of the frame's black pixels
+                then of its highlighted pixels, in the panel's orientation, see
+                `orient`.
+
+        Returns:
+            The black and the highlight buffers to send to the panel.
+        """
+        buffers = np.packbits(planes, axis=-1)
+        np.invert(buffers, out=buffers)
+        return bytearray(buffers[0]), bytearray(buffers[1])
+
 
 # Could be used later to utilize the partial refresh feature of some of the EPDs
 # class EPDPartial(EPDBase):
@@ -30,6 +30,8 @@
 
 import logging
 
+import numpy as np
+
 from ._base import EPDMonochrome
 from .epdconfig import CONFIG
 
@@ -372,6 +374,16 @@ class EPD(EPDMonochrome):
                         buf[int(newx / 8) + newy * linewidth] &= ~(0x80 >> (y % 8))
         return bytearray(buf)
 
+    def orient(self, frame):
+        # as in getbuffer, a portrait frame is mirrored and offset by a pixel, a
+        # landscape frame is transposed
+        if frame.shape[:2] == (self.height, self.width):
+            padding = [(0, 0), (1, 0)] + [(0, 0)] * (frame.ndim - 2)
+            return np.pad(frame[:, ::-1], padding)
+        if frame.shape[:2] == (self.width, self.height):
+            return frame.swapaxes(0, 1)
+        return super().orient(frame)
+
     def display(self, image):
         self.send_command(0x24)
         self.send_data2(image)
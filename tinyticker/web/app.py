@@ -1,3 +1,4 @@
+import dataclasses as dc
 import logging
 import socket
 import subprocess
@@ -11,7 +12,7 @@ from urllib.error import HTTPError, URLError
 from flask import Flask, abort, redirect, render_template, request, send_from_directory
 
 from .. import __version__
-from ..config import PLOT_TYPES, SequenceConfig, TickerConfig, TinytickerConfig
+from ..config import PLOT_TYPES, TickerConfig, TinytickerConfig
 from ..paths import CONFIG_FILE, LOG_DIR
 from ..ticker import INTERVAL_LOOKBACKS, INTERVAL_TIMEDELTAS, SYMBOL_TYPES
 from ..utils import check_for_update
@@ -109,7 +110,14 @@ def create_app(config_file: Path = CONFIG_FILE, log_dir: Path = LOG_DIR) -> Flas
         tickers["mav"] = request.args.getlist("mav", type=no_empty_int)
         tickers["volume"] = request.args.getlist("volume", type=str_to_bool)
 
-        sequence = SequenceConfig(
+        # keep the options which can't be set from the web app
+        current_config = (
+            TinytickerConfig.from_file(config_file)
+            if config_file.is_file()
+            else TinytickerConfig()
+        )
+        sequence = dc.replace(
+            current_config.sequence,
             skip_outdated=request.args.get("skip_outdated", False, type=bool),
             # Note: currently not toggleable from the web app
             skip_empty=request.args.get("skip_empty", True, type=bool),
@@ -125,6 +133,10 @@ def create_app(config_file: Path = CONFIG_FILE, log_dir: Path = LOG_DIR) -> Flas
             epd_model=request.args.get("epd_model", "EPD_v3"),
             tickers=tickers,
             sequence=sequence,
+            render_backend=current_config.render_backend,
+            rate_limits=current_config.rate_limits,
+            replay=current_config.replay,
+            archive=current_config.archive,
         )
         LOGGER.debug(tt_config)
         tt_config.to_file(config_file)